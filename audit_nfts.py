@@ -1,14 +1,24 @@
 """
-5-Pass NFT Audit Script
+Multi-Pass NFT Audit Script
 Checks consistency between .json metadata and .png images in candy_machine/assets.
 """
 
+import argparse
+import contextvars
+import hashlib
+import io
 import json
 import os
 import struct
+import sys
+import threading
 import zlib
+from functools import partial
 from pathlib import Path
 from collections import Counter, defaultdict
+from typing import Callable, NamedTuple, Tuple
+
+from trait_vocab import load_vocab, titleish
 
 ASSETS_DIR = Path(r"d:\00_2026_Files\sol-sprites\solsprites_backup\source_files\assets\images\candy_machine\assets")
 SOURCE_IMAGES_DIR = Path(r"d:\00_2026_Files\sol-sprites\solsprites_backup\source_files\assets\images")
@@ -16,10 +26,27 @@ SOURCE_IMAGES_DIR = Path(r"d:\00_2026_Files\sol-sprites\solsprites_backup\source
 # Also check the backup copy
 BACKUP_ASSETS_DIR = Path(r"d:\00_2026_Files\sol-sprites\solsprites_backup\backup_assets\candy_machine\assets")
 
+# Digest cache used by pass 5 (None => ASSETS_DIR / "_hash_cache.json")
+HASH_CACHE_PATH = None
+
 issues = []
 
+# While run_audit is active each pass (and each item shard in a worker process) logs into its
+# own buffer; buffers are merged into `issues` in pass order, so concurrency never reorders output.
+_issue_buffer = contextvars.ContextVar("audit_issue_buffer", default=None)
+_output_buffer = contextvars.ContextVar("audit_output_buffer", default=None)
+
+# Process pool used by map_items to shard per-item checks. run_audit sets _item_jobs; the pool
+# is only started by a pass with more than one shard per worker, since spawning the workers
+# costs more than checking a few shards' worth of items in-process.
+_item_pool = None
+_item_jobs = 1
+_item_pool_lock = threading.Lock()
+ITEM_SHARD_SIZE = 256
+
 def log_issue(pass_num, severity, file_ref, description):
-    issues.append({
+    buf = _issue_buffer.get()
+    (issues if buf is None else buf).append({
         "pass": pass_num,
         "severity": severity,
         "file": file_ref,
@@ -55,20 +82,364 @@ def read_png_info(png_path):
         return None, str(e)
 
 
-def pass_1_file_pairing():
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+PNG_BIT_DEPTHS = {0: {1, 2, 4, 8, 16}, 2: {8, 16}, 3: {1, 2, 4, 8}, 4: {8, 16}, 6: {8, 16}}
+# Adam7 passes: (x start, y start, x step, y step)
+ADAM7_PASSES = [(0, 0, 8, 8), (4, 0, 8, 8), (0, 4, 4, 8), (2, 0, 4, 4), (0, 2, 2, 4), (1, 0, 2, 2), (0, 1, 1, 2)]
+
+
+def png_raw_size(width, height, bit_depth, color_type, interlace):
+    """Size of the filtered (pre-zlib) image data the IHDR implies."""
+    bits_per_pixel = PNG_CHANNELS[color_type] * bit_depth
+
+    def scanlines(w, h):
+        if w == 0 or h == 0:
+            return 0
+        return h * (1 + (w * bits_per_pixel + 7) // 8)
+
+    if not interlace:
+        return scanlines(width, height)
+    return sum(
+        scanlines((width - x0 + dx - 1) // dx if width > x0 else 0, (height - y0 + dy - 1) // dy if height > y0 else 0)
+        for x0, y0, dx, dy in ADAM7_PASSES
+    )
+
+
+def validate_png_stream(png_path, buffer_size=64 * 1024):
+    """Walk every chunk of a PNG with fixed-size buffers, checking CRCs and IDAT contents.
+
+    Each chunk's CRC is verified with zlib.crc32, and the IDAT stream is decompressed
+    incrementally (output capped at buffer_size per step) to confirm it holds exactly the
+    number of bytes the IHDR dimensions imply. Memory use stays constant per file.
+    Returns (info, None) like read_png_info, or (None, error).
+    """
+    buf = bytearray(buffer_size)
+    view = memoryview(buf)
+    try:
+        file_size = os.path.getsize(png_path)
+        with open(png_path, "rb") as f:
+            if f.read(8) != PNG_SIGNATURE:
+                return None, "Not a valid PNG file"
+
+            info = None
+            expected_raw = 0
+            raw_total = 0
+            inflater = zlib.decompressobj()
+            inflate_error = None
+            idat_state = "before"  # before -> inside -> after
+            chunk_count = 0
+
+            while True:
+                header = f.read(8)
+                if len(header) == 0:
+                    return None, "Truncated: missing IEND chunk"
+                if len(header) < 8:
+                    return None, f"Truncated chunk header at byte {f.tell() - len(header)}"
+                length, ctype = struct.unpack(">I4s", header)
+                chunk_count += 1
+                name = ctype.decode("latin-1")
+                if not ctype.isalpha():
+                    return None, f"Corrupt chunk type {ctype!r} at chunk {chunk_count}"
+                if chunk_count == 1 and ctype != b'IHDR':
+                    return None, "Missing IHDR chunk"
+
+                if ctype == b'IDAT':
+                    if info is None:
+                        return None, "IDAT before IHDR"
+                    if idat_state == "after":
+                        return None, "IDAT chunks are not consecutive"
+                    idat_state = "inside"
+                elif idat_state == "inside":
+                    idat_state = "after"
+
+                crc = zlib.crc32(ctype)
+                ihdr_data = b""
+                remaining = length
+                while remaining:
+                    n = f.readinto(view[:min(remaining, buffer_size)])
+                    if not n:
+                        return None, f"Truncated {name} chunk ({length - remaining} of {length} bytes)"
+                    piece = view[:n]
+                    crc = zlib.crc32(piece, crc)
+                    remaining -= n
+                    if ctype == b'IHDR':
+                        ihdr_data += bytes(piece)
+                    elif ctype == b'IDAT' and not inflater.eof and inflate_error is None:
+                        # A zlib error is only reported once the chunk CRC has been checked,
+                        # so plain corruption shows up as a CRC mismatch.
+                        try:
+                            out = inflater.decompress(piece, buffer_size)
+                            raw_total += len(out)
+                            while inflater.unconsumed_tail and raw_total <= expected_raw:
+                                out = inflater.decompress(inflater.unconsumed_tail, buffer_size)
+                                raw_total += len(out)
+                        except zlib.error as e:
+                            inflate_error = str(e)
+                        if raw_total > expected_raw:
+                            return None, f"IDAT decompresses to more than the {expected_raw:,}B the IHDR implies"
+
+                stored = f.read(4)
+                if len(stored) < 4:
+                    return None, f"Truncated CRC for {name} chunk"
+                if struct.unpack(">I", stored)[0] != crc & 0xFFFFFFFF:
+                    return None, f"CRC mismatch in {name} chunk (chunk {chunk_count})"
+                if inflate_error is not None:
+                    return None, f"Corrupt IDAT data: {inflate_error}"
+
+                if ctype == b'IHDR':
+                    if length != 13:
+                        return None, f"IHDR has length {length} (expected 13)"
+                    width, height, bit_depth, color_type, _comp, _filt, interlace = struct.unpack(">IIBBBBB", ihdr_data)
+                    if color_type not in PNG_CHANNELS or bit_depth not in PNG_BIT_DEPTHS[color_type]:
+                        return None, f"Invalid bit depth {bit_depth} for color type {color_type}"
+                    info = {
+                        "width": width,
+                        "height": height,
+                        "bit_depth": bit_depth,
+                        "color_type": color_type,
+                        "interlace": interlace,
+                        "file_size": file_size,
+                    }
+                    expected_raw = png_raw_size(width, height, bit_depth, color_type, interlace)
+                elif ctype == b'IEND':
+                    break
+
+            if idat_state == "before":
+                return None, "No IDAT chunk"
+            if not inflater.eof:
+                return None, f"IDAT stream is incomplete ({raw_total:,}B of {expected_raw:,}B decoded)"
+            if inflater.unused_data:
+                return None, "Trailing data after the end of the IDAT zlib stream"
+            if raw_total != expected_raw:
+                return None, f"IDAT decodes to {raw_total:,}B but IHDR implies {expected_raw:,}B"
+            info["trailing_bytes"] = file_size - f.tell()
+            return info, None
+    except Exception as e:
+        return None, str(e)
+
+
+class AssetCollection:
+    """Metadata for one candy_machine/assets dir, read from disk at most once per file.
+
+    Every pass goes through the same instance, so each N.json is opened and parsed once per
+    audit no matter how many passes inspect it.
+    """
+
+    def __init__(self, assets_dir):
+        self.assets_dir = Path(assets_dir)
+        self._names = None
+        self._json = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def names(self):
+        if self._names is None:
+            self._names = {f.name for f in self.assets_dir.iterdir()}
+        return self._names
+
+    def indices(self, suffix):
+        """Numeric stems of all `N<suffix>` files in the dir."""
+        return {int(n[:-len(suffix)]) for n in self.names if n.endswith(suffix) and n[:-len(suffix)].isdigit()}
+
+    def load_json(self, idx):
+        """Return (data, error) for N.json, parsing it on first use only."""
+        cached = self._json.get(idx)
+        if cached is None:
+            with self._lock:
+                cached = self._json.get(idx)
+                if cached is None:
+                    try:
+                        with open(self.assets_dir / f"{idx}.json", "r", encoding="utf-8") as f:
+                            cached = (json.load(f), None)
+                    except Exception as e:
+                        cached = (None, e)
+                    self._json[idx] = cached
+        return cached
+
+    def subset(self, indices, needs_json=True):
+        """A picklable copy holding only `indices`, with their JSON already parsed if `needs_json`."""
+        part = AssetCollection(self.assets_dir)
+        part._names = self._names
+        if needs_json:
+            part._json = {idx: self.load_json(idx) for idx in indices}
+        return part
+
+
+def _run_item_shard(item_fn, collection, indices):
+    buf = []
+    _issue_buffer.set(buf)
+    results = [item_fn(idx, collection) for idx in indices]
+    return buf, results
+
+
+def _get_item_pool():
+    global _item_pool
+    with _item_pool_lock:
+        if _item_pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # Passes run on threads, so workers are spawned rather than forked from a threaded parent.
+            _item_pool = ProcessPoolExecutor(max_workers=_item_jobs, mp_context=multiprocessing.get_context("spawn"))
+        return _item_pool
+
+
+def map_items(item_fn, indices, collection, needs_json=True):
+    """Return [item_fn(idx, collection) for idx in indices], sharded over the item pool when run_audit has jobs > 1.
+
+    JSON is parsed once in this process and shipped to the workers with each shard, so the
+    shared collection stays the single reader of every N.json. Shard issues are merged in
+    index order.
+    """
+    indices = list(indices)
+    if _item_jobs <= 1 or len(indices) <= ITEM_SHARD_SIZE * _item_jobs:
+        return [item_fn(idx, collection) for idx in indices]
+
+    pool = _get_item_pool()
+    futures = []
+    for start in range(0, len(indices), ITEM_SHARD_SIZE):
+        shard = indices[start:start + ITEM_SHARD_SIZE]
+        futures.append(pool.submit(_run_item_shard, item_fn, collection.subset(shard, needs_json), shard))
+
+    results = []
+    for fut in futures:
+        shard_issues, shard_results = fut.result()
+        buf = _issue_buffer.get()
+        (issues if buf is None else buf).extend(shard_issues)
+        results.extend(shard_results)
+    return results
+
+
+class HashCache:
+    """Streamed BLAKE2b digests of files, cached on disk per (path, size, mtime).
+
+    A file is only re-read when its size or mtime changed since the digest was taken, so
+    unchanged assets cost one stat() on later audits. sample_digest() hashes just the
+    size plus the head and tail blocks, a cheap first test that can prove two files differ.
+    """
+
+    SAMPLE_BLOCK = 64 * 1024
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.dirty = False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def _entry(self, file_path):
+        st = os.stat(file_path)
+        key = str(Path(file_path).resolve())
+        entry = self.entries.get(key)
+        if not entry or entry.get("size") != st.st_size or entry.get("mtime_ns") != st.st_mtime_ns:
+            entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            self.entries[key] = entry
+            self.dirty = True
+        return entry
+
+    def size(self, file_path):
+        return self._entry(file_path)["size"]
+
+    def digest(self, file_path, chunk_size=1 << 20):
+        entry = self._entry(file_path)
+        if "blake2b" not in entry:
+            h = hashlib.blake2b(digest_size=20)
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(chunk_size), b""):
+                    h.update(chunk)
+            entry["blake2b"] = h.hexdigest()
+            self.dirty = True
+        return entry["blake2b"]
+
+    def sample_digest(self, file_path):
+        entry = self._entry(file_path)
+        if "sample" not in entry:
+            h = hashlib.blake2b(str(entry["size"]).encode("ascii"), digest_size=20)
+            with open(file_path, "rb") as f:
+                h.update(f.read(self.SAMPLE_BLOCK))
+                if entry["size"] > 2 * self.SAMPLE_BLOCK:
+                    f.seek(-self.SAMPLE_BLOCK, os.SEEK_END)
+                    h.update(f.read(self.SAMPLE_BLOCK))
+            entry["sample"] = h.hexdigest()
+            self.dirty = True
+        return entry["sample"]
+
+    def same_content(self, path_a, path_b, quick=False):
+        """Compare two files by size, then (quick mode) sampled blocks, then full digest."""
+        if self.size(path_a) != self.size(path_b):
+            return False
+        if quick and self.sample_digest(path_a) != self.sample_digest(path_b):
+            return False
+        return self.digest(path_a) == self.digest(path_b)
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+def load_index_map(assets_dir=None):
+    """Load index_map.json in either layout, returning (rows, layout) or (None, None) if absent.
+
+    Legacy maps repeat the whole variants_by_index dict in every row; current maps carry a
+    per-row "variants" list (plus an optional _variants_by_index.json sidecar). Rows are
+    always returned in the current layout.
+    """
+    assets_dir = Path(assets_dir or ASSETS_DIR)
+    index_map_path = assets_dir / "index_map.json"
+    if not index_map_path.exists():
+        return None, None
+    with open(index_map_path, "r", encoding="utf-8") as f:
+        raw = json.load(f)
+
+    sidecar = {}
+    sidecar_path = assets_dir / "_variants_by_index.json"
+    if sidecar_path.exists():
+        with open(sidecar_path, "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+
+    layout = "legacy" if any("variants_by_index" in entry for entry in raw) else "current"
+    rows = []
+    for entry in raw:
+        key = str(entry.get("final_idx"))
+        if "variants" in entry:
+            variants = entry["variants"]
+        else:
+            variants = (entry.get("variants_by_index") or sidecar).get(key, [])
+        rows.append({
+            "final_idx": entry.get("final_idx"),
+            "src_idx": entry.get("src_idx"),
+            "variants": variants,
+            "src_file": entry.get("src_file", ""),
+        })
+    return rows, layout
+
+
+def pass_1_file_pairing(collection=None):
     """PASS 1: Verify every N.json has a matching N.png and vice versa."""
     print("=" * 70)
     print("PASS 1: File Pairing — Every N.json must have a matching N.png")
     print("=" * 70)
 
-    json_indices = set()
-    png_indices = set()
-
-    for f in ASSETS_DIR.iterdir():
-        if f.suffix == ".json" and f.stem.isdigit():
-            json_indices.add(int(f.stem))
-        elif f.suffix == ".png" and f.stem.isdigit():
-            png_indices.add(int(f.stem))
+    collection = collection or AssetCollection(ASSETS_DIR)
+    json_indices = collection.indices(".json")
+    png_indices = collection.indices(".png")
 
     json_only = sorted(json_indices - png_indices)
     png_only = sorted(png_indices - json_indices)
@@ -104,74 +475,78 @@ def pass_1_file_pairing():
     return matched
 
 
-def pass_2_json_internal_consistency(matched_indices):
-    """PASS 2: Verify each JSON file's internal references are correct."""
-    print()
-    print("=" * 70)
-    print("PASS 2: JSON Internal Consistency — name, image, uri fields")
-    print("=" * 70)
+def check_item_references(idx, collection):
+    """Pass 2 check for one item. Returns the number of issues logged."""
+    data, e = collection.load_json(idx)
+    if e is not None:
+        log_issue(2, "ERROR", f"{idx}.json", f"Cannot parse JSON: {e}")
+        return 1
 
     err_count = 0
-    for idx in matched_indices:
-        json_path = ASSETS_DIR / f"{idx}.json"
-        try:
-            with open(json_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except Exception as e:
-            log_issue(2, "ERROR", f"{idx}.json", f"Cannot parse JSON: {e}")
-            err_count += 1
-            continue
 
-        # Check name matches index
-        expected_name = f"SolSprites #{idx}"
-        actual_name = data.get("name", "")
-        if actual_name != expected_name:
-            log_issue(2, "ERROR", f"{idx}.json", f"Name mismatch: expected '{expected_name}', got '{actual_name}'")
+    # Check name matches index
+    expected_name = f"SolSprites #{idx}"
+    actual_name = data.get("name", "")
+    if actual_name != expected_name:
+        log_issue(2, "ERROR", f"{idx}.json", f"Name mismatch: expected '{expected_name}', got '{actual_name}'")
+        err_count += 1
+
+    # Check image field
+    expected_image = f"{idx}.png"
+    actual_image = data.get("image", "")
+    if actual_image != expected_image:
+        log_issue(2, "ERROR", f"{idx}.json", f"Image field mismatch: expected '{expected_image}', got '{actual_image}'")
+        err_count += 1
+
+    # Check properties.files[0].uri
+    files = data.get("properties", {}).get("files", [])
+    if not files:
+        log_issue(2, "ERROR", f"{idx}.json", "Missing properties.files array")
+        err_count += 1
+    else:
+        uri = files[0].get("uri", "")
+        if uri != expected_image:
+            log_issue(2, "ERROR", f"{idx}.json", f"File URI mismatch: expected '{expected_image}', got '{uri}'")
             err_count += 1
-
-        # Check image field
-        expected_image = f"{idx}.png"
-        actual_image = data.get("image", "")
-        if actual_image != expected_image:
-            log_issue(2, "ERROR", f"{idx}.json", f"Image field mismatch: expected '{expected_image}', got '{actual_image}'")
+        ftype = files[0].get("type", "")
+        if ftype != "image/png":
+            log_issue(2, "WARN", f"{idx}.json", f"File type is '{ftype}' instead of 'image/png'")
             err_count += 1
 
-        # Check properties.files[0].uri
-        files = data.get("properties", {}).get("files", [])
-        if not files:
-            log_issue(2, "ERROR", f"{idx}.json", "Missing properties.files array")
-            err_count += 1
-        else:
-            uri = files[0].get("uri", "")
-            if uri != expected_image:
-                log_issue(2, "ERROR", f"{idx}.json", f"File URI mismatch: expected '{expected_image}', got '{uri}'")
-                err_count += 1
-            ftype = files[0].get("type", "")
-            if ftype != "image/png":
-                log_issue(2, "WARN", f"{idx}.json", f"File type is '{ftype}' instead of 'image/png'")
-                err_count += 1
-
-        # Check symbol
-        if data.get("symbol") != "SPRITE":
-            log_issue(2, "WARN", f"{idx}.json", f"Symbol is '{data.get('symbol')}' (expected 'SPRITE')")
-            err_count += 1
+    # Check symbol
+    if data.get("symbol") != "SPRITE":
+        log_issue(2, "WARN", f"{idx}.json", f"Symbol is '{data.get('symbol')}' (expected 'SPRITE')")
+        err_count += 1
 
-        # Check seller_fee_basis_points
-        if data.get("seller_fee_basis_points") != 1000:
-            log_issue(2, "WARN", f"{idx}.json", f"seller_fee_basis_points is {data.get('seller_fee_basis_points')} (expected 1000)")
-            err_count += 1
+    # Check seller_fee_basis_points
+    if data.get("seller_fee_basis_points") != 1000:
+        log_issue(2, "WARN", f"{idx}.json", f"seller_fee_basis_points is {data.get('seller_fee_basis_points')} (expected 1000)")
+        err_count += 1
 
-        # Check creators
-        creators = data.get("properties", {}).get("creators", [])
-        if not creators:
-            log_issue(2, "ERROR", f"{idx}.json", "Missing creators")
-            err_count += 1
-        elif creators[0].get("address") != "777ePKXhcxMdJPMA22YeiR6pdMUTadnpT7AUyto2Y24N":
-            log_issue(2, "ERROR", f"{idx}.json", f"Creator address wrong: {creators[0].get('address')}")
-            err_count += 1
-        elif creators[0].get("share") != 100:
-            log_issue(2, "WARN", f"{idx}.json", f"Creator share is {creators[0].get('share')} (expected 100)")
-            err_count += 1
+    # Check creators
+    creators = data.get("properties", {}).get("creators", [])
+    if not creators:
+        log_issue(2, "ERROR", f"{idx}.json", "Missing creators")
+        err_count += 1
+    elif creators[0].get("address") != "777ePKXhcxMdJPMA22YeiR6pdMUTadnpT7AUyto2Y24N":
+        log_issue(2, "ERROR", f"{idx}.json", f"Creator address wrong: {creators[0].get('address')}")
+        err_count += 1
+    elif creators[0].get("share") != 100:
+        log_issue(2, "WARN", f"{idx}.json", f"Creator share is {creators[0].get('share')} (expected 100)")
+        err_count += 1
+
+    return err_count
+
+
+def pass_2_json_internal_consistency(matched_indices, collection=None):
+    """PASS 2: Verify each JSON file's internal references are correct."""
+    print()
+    print("=" * 70)
+    print("PASS 2: JSON Internal Consistency — name, image, uri fields")
+    print("=" * 70)
+
+    collection = collection or AssetCollection(ASSETS_DIR)
+    err_count = sum(map_items(check_item_references, matched_indices, collection))
 
     if err_count == 0:
         print(f"  [OK] All {len(matched_indices)} JSON files have correct internal references")
@@ -179,137 +554,161 @@ def pass_2_json_internal_consistency(matched_indices):
         print(f"  [!!] Found {err_count} issues in internal consistency")
 
 
-def pass_3_attribute_validity(matched_indices):
+# Same vocabulary the builder parses with (trait_vocab.json); "Unknown" is its no-element fallback
+VOCAB = load_vocab()
+VALID_ELEMENTS = {titleish(e) for e in VOCAB.elements} | {"Unknown"}
+VALID_TYPES = set(VOCAB.type_aliases.values())
+REQUIRED_TRAITS = {"Element", "Type", "Background"}
+KNOWN_TRAIT_TYPES = {"Element", "Type", "Strain", "Background", "Sprite Color", "Aura", "Aura Style", "Motif", "Accessory", "Variant"}
+
+
+def check_item_attributes(idx, collection):
+    """Pass 3 check for one item. Returns a summary dict, or None if the JSON is unreadable."""
+    data, e = collection.load_json(idx)
+    if e is not None:
+        return None
+
+    result = {"errors": 0, "warnings": 0, "missing": [], "duplicates": []}
+
+    attrs = data.get("attributes", [])
+    if not attrs:
+        log_issue(3, "ERROR", f"{idx}.json", "No attributes at all")
+        result["errors"] += 1
+        return result
+
+    trait_types_seen = []
+    for attr in attrs:
+        tt = attr.get("trait_type", "")
+        vv = attr.get("value", "")
+
+        if not tt:
+            log_issue(3, "ERROR", f"{idx}.json", f"Attribute with empty trait_type: {attr}")
+            result["errors"] += 1
+            continue
+
+        if not vv:
+            log_issue(3, "WARN", f"{idx}.json", f"Attribute '{tt}' has empty value")
+            result["warnings"] += 1
+
+        trait_types_seen.append(tt)
+
+        if tt not in KNOWN_TRAIT_TYPES:
+            log_issue(3, "WARN", f"{idx}.json", f"Unknown trait_type: '{tt}'")
+            result["warnings"] += 1
+
+        # Validate Element values
+        if tt == "Element" and vv not in VALID_ELEMENTS:
+            log_issue(3, "WARN", f"{idx}.json", f"Unusual Element value: '{vv}'")
+            result["warnings"] += 1
+
+        # Validate Type values
+        if tt == "Type" and vv not in VALID_TYPES:
+            log_issue(3, "WARN", f"{idx}.json", f"Unusual Type value: '{vv}'")
+            result["warnings"] += 1
+
+    # Check for required traits
+    for req in REQUIRED_TRAITS:
+        if req not in trait_types_seen:
+            log_issue(3, "ERROR", f"{idx}.json", f"Missing required trait: {req}")
+            result["errors"] += 1
+            result["missing"].append(req)
+
+    # Check for duplicate trait types (same trait_type appearing more than once)
+    trait_counter = Counter(trait_types_seen)
+    for tt, count in trait_counter.items():
+        if count > 1:
+            log_issue(3, "WARN", f"{idx}.json", f"Duplicate trait_type '{tt}' appears {count} times")
+            result["warnings"] += 1
+            result["duplicates"].append((idx, tt, count))
+
+    return result
+
+
+def pass_3_attribute_validity(matched_indices, collection=None):
     """PASS 3: Validate attribute schema and value validity."""
     print()
     print("=" * 70)
     print("PASS 3: Attribute Validity — required traits, valid values, schema")
     print("=" * 70)
 
-    VALID_ELEMENTS = {"Air", "Earth", "Electric", "Fire", "Light", "Magic", "Shadow", "Water", "Unknown", "Forest", "Fern", "Sunflower", "Spleenwort", "Calypso", "Void"}
-    VALID_TYPES = {"Cannabis", "Cubes", "Mushroom", "Plant", "Root", "Sprite", "Goblin", "Fairy"}
-    REQUIRED_TRAITS = {"Element", "Type", "Background"}
-    KNOWN_TRAIT_TYPES = {"Element", "Type", "Strain", "Background", "Sprite Color", "Aura", "Aura Style", "Motif", "Accessory", "Variant"}
-
+    collection = collection or AssetCollection(ASSETS_DIR)
     err_count = 0
     warn_count = 0
-    missing_element = []
-    missing_type = []
-    missing_bg = []
-    unknown_traits = defaultdict(list)
-    empty_values = []
+    missing = defaultdict(list)
     duplicate_traits = []
 
-    for idx in matched_indices:
-        json_path = ASSETS_DIR / f"{idx}.json"
-        try:
-            with open(json_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except:
+    for idx, result in zip(matched_indices, map_items(check_item_attributes, matched_indices, collection)):
+        if result is None:
             continue
-
-        attrs = data.get("attributes", [])
-        if not attrs:
-            log_issue(3, "ERROR", f"{idx}.json", "No attributes at all")
-            err_count += 1
-            continue
-
-        trait_types_seen = []
-        for attr in attrs:
-            tt = attr.get("trait_type", "")
-            vv = attr.get("value", "")
-
-            if not tt:
-                log_issue(3, "ERROR", f"{idx}.json", f"Attribute with empty trait_type: {attr}")
-                err_count += 1
-                continue
-
-            if not vv:
-                log_issue(3, "WARN", f"{idx}.json", f"Attribute '{tt}' has empty value")
-                warn_count += 1
-                empty_values.append(idx)
-
-            trait_types_seen.append(tt)
-
-            if tt not in KNOWN_TRAIT_TYPES:
-                log_issue(3, "WARN", f"{idx}.json", f"Unknown trait_type: '{tt}'")
-                unknown_traits[tt].append(idx)
-                warn_count += 1
-
-            # Validate Element values
-            if tt == "Element" and vv not in VALID_ELEMENTS:
-                log_issue(3, "WARN", f"{idx}.json", f"Unusual Element value: '{vv}'")
-                warn_count += 1
-
-            # Validate Type values
-            if tt == "Type" and vv not in VALID_TYPES:
-                log_issue(3, "WARN", f"{idx}.json", f"Unusual Type value: '{vv}'")
-                warn_count += 1
-
-        # Check for required traits
-        for req in REQUIRED_TRAITS:
-            if req not in trait_types_seen:
-                log_issue(3, "ERROR", f"{idx}.json", f"Missing required trait: {req}")
-                err_count += 1
-                if req == "Element": missing_element.append(idx)
-                elif req == "Type": missing_type.append(idx)
-                elif req == "Background": missing_bg.append(idx)
-
-        # Check for duplicate trait types (same trait_type appearing more than once)
-        trait_counter = Counter(trait_types_seen)
-        for tt, count in trait_counter.items():
-            if count > 1:
-                log_issue(3, "WARN", f"{idx}.json", f"Duplicate trait_type '{tt}' appears {count} times")
-                warn_count += 1
-                duplicate_traits.append((idx, tt, count))
+        err_count += result["errors"]
+        warn_count += result["warnings"]
+        for req in result["missing"]:
+            missing[req].append(idx)
+        duplicate_traits.extend(result["duplicates"])
 
     if err_count == 0 and warn_count == 0:
         print(f"  [OK] All {len(matched_indices)} JSON files have valid attributes")
     else:
         print(f"  [!!] {err_count} errors, {warn_count} warnings in attribute validation")
-        if missing_element:
-            print(f"       Missing Element: indices {missing_element[:20]}")
-        if missing_type:
-            print(f"       Missing Type: indices {missing_type[:20]}")
-        if missing_bg:
-            print(f"       Missing Background: indices {missing_bg[:20]}")
+        if missing["Element"]:
+            print(f"       Missing Element: indices {missing['Element'][:20]}")
+        if missing["Type"]:
+            print(f"       Missing Type: indices {missing['Type'][:20]}")
+        if missing["Background"]:
+            print(f"       Missing Background: indices {missing['Background'][:20]}")
         if duplicate_traits:
             print(f"       Duplicate traits: {duplicate_traits[:20]}")
 
 
-def pass_4_png_validity(matched_indices):
+def check_item_png(idx, collection, deep=True):
+    """Pass 4 check for one item. Returns (png info or None, error count).
+
+    deep=True runs the full chunk/CRC/IDAT validation; deep=False only reads the IHDR.
+    """
+    png_path = collection.assets_dir / f"{idx}.png"
+    info, error = validate_png_stream(png_path) if deep else read_png_info(png_path)
+    if error:
+        log_issue(4, "ERROR", f"{idx}.png", f"Invalid PNG: {error}")
+        return None, 1
+
+    err_count = 0
+
+    if info.get("trailing_bytes"):
+        log_issue(4, "WARN", f"{idx}.png", f"{info['trailing_bytes']:,} extra bytes after IEND chunk")
+
+    # Check for suspiciously small files (< 1KB likely corrupted)
+    if info["file_size"] < 100:
+        log_issue(4, "ERROR", f"{idx}.png", f"Suspiciously small file: {info['file_size']} bytes")
+        err_count += 1
+
+    # Check for zero-dimension images
+    if info["width"] == 0 or info["height"] == 0:
+        log_issue(4, "ERROR", f"{idx}.png", f"Zero dimensions: {info['width']}x{info['height']}")
+        err_count += 1
+
+    return info, err_count
+
+
+def pass_4_png_validity(matched_indices, collection=None, deep=True):
     """PASS 4: Verify PNG files are valid images with consistent dimensions."""
     print()
     print("=" * 70)
-    print("PASS 4: PNG Validity — file integrity, dimensions, consistency")
+    print("PASS 4: PNG Validity — file integrity (chunk CRCs, IDAT size), dimensions, consistency")
     print("=" * 70)
 
+    collection = collection or AssetCollection(ASSETS_DIR)
     infos = {}
     err_count = 0
     dimensions = Counter()
 
-    for idx in matched_indices:
-        png_path = ASSETS_DIR / f"{idx}.png"
-        info, error = read_png_info(png_path)
-        if error:
-            log_issue(4, "ERROR", f"{idx}.png", f"Invalid PNG: {error}")
-            err_count += 1
+    for idx, (info, item_errors) in zip(matched_indices, map_items(partial(check_item_png, deep=deep), matched_indices, collection, needs_json=False)):
+        err_count += item_errors
+        if info is None:
             continue
-
         infos[idx] = info
         dim_key = f"{info['width']}x{info['height']}"
         dimensions[dim_key] += 1
 
-        # Check for suspiciously small files (< 1KB likely corrupted)
-        if info["file_size"] < 100:
-            log_issue(4, "ERROR", f"{idx}.png", f"Suspiciously small file: {info['file_size']} bytes")
-            err_count += 1
-
-        # Check for zero-dimension images
-        if info["width"] == 0 or info["height"] == 0:
-            log_issue(4, "ERROR", f"{idx}.png", f"Zero dimensions: {info['width']}x{info['height']}")
-            err_count += 1
-
     # Check dimension consistency
     if len(dimensions) > 1:
         most_common_dim = dimensions.most_common(1)[0][0]
@@ -347,36 +746,44 @@ def pass_4_png_validity(matched_indices):
         print(f"  [!!] {err_count} PNG validity errors")
 
 
-def pass_5_cross_reference(matched_indices):
-    """PASS 5: Cross-reference source PNGs to output, check backup consistency."""
+def pass_5_cross_reference(matched_indices, collection=None, backup=None, hash_cache=None, quick_hash=False,
+                           source_dir=None, backup_dir=None):
+    """PASS 5: Cross-reference source PNGs to output, check backup consistency.
+
+    Output files are read from `collection`; sources from `source_dir` and the backup from
+    `backup` (or `backup_dir`), falling back to SOURCE_IMAGES_DIR / BACKUP_ASSETS_DIR.
+    """
     print()
     print("=" * 70)
     print("PASS 5: Cross-Reference — source images, backup consistency, trait audit")
     print("=" * 70)
 
+    collection = collection or AssetCollection(ASSETS_DIR)
+    source_dir = Path(source_dir or SOURCE_IMAGES_DIR)
+    if backup is None:
+        backup_dir = Path(backup_dir or BACKUP_ASSETS_DIR)
+        backup = AssetCollection(backup_dir) if backup_dir.exists() else None
     err_count = 0
 
     # 5a: Check if source images exist and load index_map if available
-    index_map_path = ASSETS_DIR / "index_map.json"
-    if index_map_path.exists():
-        with open(index_map_path, "r", encoding="utf-8") as f:
-            index_map = json.load(f)
-        print(f"  Index map loaded: {len(index_map)} entries")
+    index_map, layout = load_index_map(collection.assets_dir)
+    if index_map is not None:
+        print(f"  Index map loaded: {len(index_map)} entries ({layout} layout)")
 
         # Check each entry in index_map
         for entry in index_map:
             final_idx = entry.get("final_idx")
             src_file = entry.get("src_file", "")
-            src_path = SOURCE_IMAGES_DIR / src_file
+            src_path = source_dir / src_file
             if not src_path.exists():
                 log_issue(5, "WARN", f"{final_idx}.png", f"Source file missing: {src_file}")
     else:
         print("  [SKIP] No index_map.json found")
 
     # 5b: Compare main assets to backup assets
-    if BACKUP_ASSETS_DIR.exists():
-        backup_jsons = {f.name for f in BACKUP_ASSETS_DIR.iterdir() if f.suffix == ".json" and f.stem.isdigit()}
-        main_jsons = {f.name for f in ASSETS_DIR.iterdir() if f.suffix == ".json" and f.stem.isdigit()}
+    if backup is not None:
+        backup_jsons = {f"{i}.json" for i in backup.indices(".json")}
+        main_jsons = {f"{i}.json" for i in collection.indices(".json")}
 
         only_main = sorted(main_jsons - backup_jsons)
         only_backup = sorted(backup_jsons - main_jsons)
@@ -386,17 +793,17 @@ def pass_5_cross_reference(matched_indices):
         if only_backup:
             print(f"  [INFO] JSONs only in backup (not in main): {only_backup[:20]}")
 
-        # Compare JSON content between main and backup
+        hashes = hash_cache or HashCache(HASH_CACHE_PATH or collection.assets_dir / "_hash_cache.json")
+
+        # Compare JSON content between main and backup (identical digests skip parsing)
         shared = main_jsons & backup_jsons
         diff_count = 0
         for name in sorted(shared):
-            main_path = ASSETS_DIR / name
-            backup_path = BACKUP_ASSETS_DIR / name
             try:
-                with open(main_path, "r", encoding="utf-8") as f:
-                    main_data = json.load(f)
-                with open(backup_path, "r", encoding="utf-8") as f:
-                    backup_data = json.load(f)
+                if hashes.same_content(collection.assets_dir / name, backup.assets_dir / name, quick_hash):
+                    continue
+                main_data, _ = collection.load_json(int(name[:-5]))
+                backup_data, _ = backup.load_json(int(name[:-5]))
 
                 # Compare attributes specifically
                 main_attrs = {(a["trait_type"], a["value"]) for a in main_data.get("attributes", [])}
@@ -421,28 +828,36 @@ def pass_5_cross_reference(matched_indices):
         else:
             print(f"  [!!] {diff_count} JSONs differ between main and backup")
 
-        # Compare PNG sizes between main and backup
-        backup_pngs = {f.name for f in BACKUP_ASSETS_DIR.iterdir() if f.suffix == ".png" and f.stem.isdigit()}
-        main_pngs = {f.name for f in ASSETS_DIR.iterdir() if f.suffix == ".png" and f.stem.isdigit()}
+        # Compare PNG content hashes between main and backup
+        backup_pngs = {f"{i}.png" for i in backup.indices(".png")}
+        main_pngs = {f"{i}.png" for i in collection.indices(".png")}
         shared_pngs = main_pngs & backup_pngs
         png_diff_count = 0
         for name in sorted(shared_pngs):
-            main_size = os.path.getsize(ASSETS_DIR / name)
-            backup_size = os.path.getsize(BACKUP_ASSETS_DIR / name)
+            main_path = collection.assets_dir / name
+            backup_path = backup.assets_dir / name
+            if hashes.same_content(main_path, backup_path, quick_hash):
+                continue
+            idx = name.replace(".png", "")
+            main_size = hashes.size(main_path)
+            backup_size = hashes.size(backup_path)
             if main_size != backup_size:
-                idx = name.replace(".png", "")
                 log_issue(5, "WARN", f"{idx}.png", f"PNG differs from backup: main={main_size:,}B backup={backup_size:,}B")
-                png_diff_count += 1
+            else:
+                log_issue(5, "WARN", f"{idx}.png", f"PNG content differs from backup (same size {main_size:,}B)")
+            png_diff_count += 1
+
+        hashes.save()
 
         if png_diff_count == 0:
-            print(f"  [OK] All {len(shared_pngs)} shared PNGs match (size) between main and backup")
+            print(f"  [OK] All {len(shared_pngs)} shared PNGs match (content hash) between main and backup")
         else:
-            print(f"  [!!] {png_diff_count} PNGs differ in size between main and backup")
+            print(f"  [!!] {png_diff_count} PNGs differ in content between main and backup")
     else:
         print("  [SKIP] No backup directory found")
 
     # 5c: Validate trait_audit.json matches actual data
-    audit_path = ASSETS_DIR / "_trait_audit.json"
+    audit_path = collection.assets_dir / "_trait_audit.json"
     if audit_path.exists():
         with open(audit_path, "r", encoding="utf-8") as f:
             audit = json.load(f)
@@ -459,10 +874,8 @@ def pass_5_cross_reference(matched_indices):
         actual_values_by_trait = defaultdict(set)
 
         for idx in matched_indices:
-            json_path = ASSETS_DIR / f"{idx}.json"
+            data, _ = collection.load_json(idx)
             try:
-                with open(json_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
                 for attr in data.get("attributes", []):
                     tt = attr.get("trait_type", "")
                     vv = attr.get("value", "")
@@ -498,7 +911,199 @@ def pass_5_cross_reference(matched_indices):
         print("  [SKIP] No _trait_audit.json found")
 
 
+# Near-duplicate thresholds: Hamming distance over the combined 128-bit (pHash, dHash) value,
+# and the largest per-cell, per-channel difference of the colour grids (so recolors don't match).
+NEAR_DUPLICATE_MAX_DISTANCE = 10
+NEAR_DUPLICATE_COLOR_TOLERANCE = 32
+
+
+def compute_item_hashes(idx, collection):
+    """Pass 6 helper: image_hashes.image_signature of N.png, or None if it can't be decoded."""
+    import image_hashes
+
+    png_path = collection.assets_dir / f"{idx}.png"
+    try:
+        return image_hashes.image_signature(png_path)
+    except Exception:
+        return None  # undecodable PNGs are already reported by pass 4
+
+
+def pass_6_near_duplicates(matched_indices, collection=None):
+    """PASS 6: Find visually identical / near-identical sprites saved under different indices."""
+    print()
+    print("=" * 70)
+    print("PASS 6: Near-Duplicates — perceptual hashes (pHash + dHash) + colour grid, multi-index lookup")
+    print("=" * 70)
+
+    try:
+        import image_hashes
+    except ImportError as e:
+        print(f"  [SKIP] Needs Pillow + NumPy ({e})")
+        return
+
+    collection = collection or AssetCollection(ASSETS_DIR)
+    results = map_items(compute_item_hashes, matched_indices, collection, needs_json=False)
+    signatures = {idx: s for idx, s in zip(matched_indices, results) if s is not None}
+
+    # Exact copies are reported as one group; near-duplicates are looked for among one
+    # representative per distinct image, and reported pair by pair with their own distances.
+    groups = image_hashes.identical_groups({idx: digest for idx, (_h, _c, digest) in signatures.items()})
+    for keys in groups:
+        names = ", ".join(f"{k}.png" for k in keys)
+        log_issue(6, "WARN", f"{keys[0]}.png", f"Identical images: {names}")
+    copies = {k for keys in groups for k in keys[1:]}
+    pairs = image_hashes.near_duplicate_pairs(
+        {idx: (h, colors) for idx, (h, colors, _d) in signatures.items() if idx not in copies},
+        NEAR_DUPLICATE_MAX_DISTANCE, NEAR_DUPLICATE_COLOR_TOLERANCE)
+    for a, b, distance, color_distance in pairs:
+        log_issue(6, "WARN", f"{a}.png",
+                  f"Near-duplicate images: {a}.png, {b}.png (hash distance {distance}, colour distance {color_distance})")
+
+    if not groups and not pairs:
+        print(f"  [OK] No near-duplicates among {len(signatures)} PNGs")
+    else:
+        print(f"  [!!] {len(groups)} groups of identical PNGs ({sum(len(k) for k in groups)} files), "
+              f"{len(pairs)} near-duplicate pairs")
+
+
+class AuditPass(NamedTuple):
+    number: int
+    name: str
+    run: Callable  # run(ctx) -> dict of new context values, or None
+    requires: Tuple[str, ...]
+
+
+# Pass registry. Each pass reads what it needs from a shared context dict ("collection", the
+# run_audit options such as "source_dir"/"backup_dir", plus whatever earlier passes provide,
+# e.g. "matched" from pass 1). Extra passes can be plugged in
+# with @register_pass; run_audit runs every pass whose requirements are met concurrently.
+AUDIT_PASSES = []
+
+
+def register_pass(number, name, requires=()):
+    def decorator(fn):
+        AUDIT_PASSES.append(AuditPass(number, name, fn, tuple(requires)))
+        AUDIT_PASSES.sort(key=lambda p: p.number)
+        return fn
+    return decorator
+
+
+@register_pass(1, "pairing")
+def _run_pass_1(ctx):
+    return {"matched": pass_1_file_pairing(ctx["collection"])}
+
+
+@register_pass(2, "references", requires=("matched",))
+def _run_pass_2(ctx):
+    pass_2_json_internal_consistency(ctx["matched"], ctx["collection"])
+
+
+@register_pass(3, "attributes", requires=("matched",))
+def _run_pass_3(ctx):
+    pass_3_attribute_validity(ctx["matched"], ctx["collection"])
+
+
+@register_pass(4, "png", requires=("matched",))
+def _run_pass_4(ctx):
+    pass_4_png_validity(ctx["matched"], ctx["collection"], deep=not ctx.get("quick_png"))
+
+
+@register_pass(5, "cross-reference", requires=("matched",))
+def _run_pass_5(ctx):
+    pass_5_cross_reference(ctx["matched"], ctx["collection"], quick_hash=ctx.get("quick_hash", False),
+                           source_dir=ctx.get("source_dir"), backup_dir=ctx.get("backup_dir"))
+
+
+@register_pass(6, "near-duplicates", requires=("matched",))
+def _run_pass_6(ctx):
+    pass_6_near_duplicates(ctx["matched"], ctx["collection"])
+
+
+class _PassOutput(io.TextIOBase):
+    """sys.stdout stand-in that routes print() from a pass into that pass's output buffer."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        buf = _output_buffer.get()
+        return (self.stream if buf is None else buf).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def _run_pass_buffered(audit_pass, ctx):
+    out = io.StringIO()
+    buf = []
+    _output_buffer.set(out)
+    _issue_buffer.set(buf)
+    try:
+        provided = audit_pass.run(ctx) or {}
+    finally:
+        _output_buffer.set(None)
+        _issue_buffer.set(None)
+    return provided, out.getvalue(), buf
+
+
+def run_pass(audit_pass, ctx):
+    """Run one pass on `ctx` by itself; returns (context it provides, its printed output, its issues).
+
+    Nothing is printed or added to `issues`, so a single pass can be timed or inspected
+    (e.g. by bench.py) without run_audit's scheduling.
+    """
+    real_stdout = sys.stdout
+    sys.stdout = _PassOutput(real_stdout)
+    try:
+        return _run_pass_buffered(audit_pass, ctx)
+    finally:
+        sys.stdout = real_stdout
+
+
+def run_audit(passes=None, jobs=1, concurrent=True, collection=None, **options):
+    """Run the registered passes (or `passes`), returning the shared context.
+
+    Passes whose requirements are satisfied run together on a thread pool; their printed
+    output and issues are buffered and flushed in pass-number order. With jobs > 1 the
+    per-item checks of passes 2-4 (and 6) are sharded over a process pool once a pass has more
+    than ITEM_SHARD_SIZE items per job.
+    """
+    # Pool machinery is imported here, not at module level, to keep `import audit_nfts` cheap
+    from concurrent.futures import ThreadPoolExecutor
+
+    global _item_pool, _item_jobs
+    pending = sorted(passes if passes is not None else AUDIT_PASSES, key=lambda p: p.number)
+    ctx = {"collection": collection or AssetCollection(ASSETS_DIR), **options}
+
+    real_stdout = sys.stdout
+    sys.stdout = _PassOutput(real_stdout)
+    _item_jobs = jobs
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, len(pending)) if concurrent else 1) as pass_pool:
+            while pending:
+                ready = [p for p in pending if all(r in ctx for r in p.requires)]
+                if not ready:
+                    missing = {r for p in pending for r in p.requires if r not in ctx}
+                    raise SystemExit(f"Audit passes {[p.number for p in pending]} need {sorted(missing)}, which no selected pass provides")
+                pending = [p for p in pending if p not in ready]
+                wave = ctx.copy()
+                futures = [pass_pool.submit(_run_pass_buffered, p, wave) for p in ready]
+                for fut in futures:
+                    provided, text, buf = fut.result()
+                    real_stdout.write(text)
+                    issues.extend(buf)
+                    ctx.update(provided)
+    finally:
+        sys.stdout = real_stdout
+        if _item_pool is not None:
+            _item_pool.shutdown()
+            _item_pool = None
+        _item_jobs = 1
+    return ctx
+
+
 def print_summary():
+    """Print every logged issue grouped by severity; returns the number of ERRORs."""
     print()
     print("=" * 70)
     print("SUMMARY OF ALL ISSUES")
@@ -506,7 +1111,7 @@ def print_summary():
 
     if not issues:
         print("  NO ISSUES FOUND — Collection looks clean!")
-        return
+        return 0
 
     errors = [i for i in issues if i["severity"] == "ERROR"]
     warnings = [i for i in issues if i["severity"] == "WARN"]
@@ -533,17 +1138,39 @@ def print_summary():
             print(f"    [Pass {i['pass']}] {i['file']}: {i['description']}")
         if len(infos) > 50:
             print(f"    ... and {len(infos) - 50} more INFO items")
+    return len(errors)
 
 
-if __name__ == "__main__":
-    print("NFT Collection Audit — 5 Passes")
-    print(f"Assets dir: {ASSETS_DIR}")
-    print(f"Source dir: {SOURCE_IMAGES_DIR}")
+def parse_args(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Audit candy_machine/assets metadata and images.")
+    parser.add_argument("assets_dir", nargs="?", type=Path, default=ASSETS_DIR, help="collection to audit (default: ASSETS_DIR)")
+    parser.add_argument("--source", type=Path, default=SOURCE_IMAGES_DIR, metavar="DIR", help="source images for pass 5 (default: SOURCE_IMAGES_DIR)")
+    parser.add_argument("--backup", type=Path, default=BACKUP_ASSETS_DIR, metavar="DIR", help="backup collection for pass 5 (default: BACKUP_ASSETS_DIR)")
+    parser.add_argument("--jobs", "-j", type=int, default=1, metavar="N", help="shard per-item checks over N worker processes")
+    parser.add_argument("--passes", metavar="LIST", help="comma-separated pass numbers to run (default: all registered passes)")
+    parser.add_argument("--serial", action="store_true", help="run passes one after another instead of concurrently")
+    parser.add_argument("--quick-png", action="store_true", help="pass 4 reads only the IHDR instead of validating every chunk")
+    parser.add_argument("--quick-hash", action="store_true", help="pass 5 compares sampled head/tail blocks before full backup digests")
+    return parser.parse_args(argv)
+
+
+def main(argv=None, prog=None):
+    """Run the audit from command-line arguments; returns the exit status (1 if any ERROR)."""
+    args = parse_args(argv, prog)
+
+    print(f"NFT Collection Audit — {len(AUDIT_PASSES)} Passes")
+    print(f"Assets dir: {args.assets_dir}")
+    print(f"Source dir: {args.source}")
     print()
 
-    matched = pass_1_file_pairing()
-    pass_2_json_internal_consistency(matched)
-    pass_3_attribute_validity(matched)
-    pass_4_png_validity(matched)
-    pass_5_cross_reference(matched)
-    print_summary()
+    selected = None
+    if args.passes:
+        wanted = {int(n) for n in args.passes.split(",") if n.strip()}
+        selected = [p for p in AUDIT_PASSES if p.number in wanted]
+    run_audit(selected, jobs=args.jobs, concurrent=not args.serial, collection=AssetCollection(args.assets_dir),
+              source_dir=args.source, backup_dir=args.backup, quick_png=args.quick_png, quick_hash=args.quick_hash)
+    return 1 if print_summary() else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
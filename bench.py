@@ -0,0 +1,249 @@
+"""
+Benchmarks for the asset pipeline on synthetic collections.
+
+Generates source trees of the requested sizes from build_assets.py's own vocabularies
+(elements, type/strain/accessory/motif/color aliases, phrase traits, bg-* backgrounds, plus
+some unknown and variant tokens and element sub-folders) with small RGBA PNGs, then times:
+  - parse_traits over every stem (directly and through a warm ParseCache) and discover_images over the tree
+  - a full build and a no-op incremental build (with build()'s own per-stage times)
+  - each audit_nfts.py pass on the build output (5b's backup comparison is skipped)
+
+Each measurement runs --repeat times; min and median are reported. The report is printed and
+written to bench_output.txt. --save-baseline stores the results as JSON; --baseline compares
+against a stored run and exits 1 if any timing regressed by more than --threshold.
+
+  python bench.py --sizes 1000 10000 --save-baseline bench_baseline.json
+  python bench.py --sizes 1000 --baseline bench_baseline.json
+
+IDX_RE only accepts 4-digit indices, so trees above 10,000 items are benchmarked with a
+widened IDX_RE (the build itself is otherwise unchanged).
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import re
+import statistics
+import struct
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import audit_nfts
+import build_assets as ba
+
+BENCH_DIR = Path(tempfile.gettempdir()) / "solsprites-bench"
+PNG_SIZE = 16
+PNG_VARIANTS = 64
+
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+
+def tiny_png(rng: random.Random, size: int = PNG_SIZE) -> bytes:
+    """A valid size x size RGBA PNG: a colored disc on a transparent background."""
+    color = bytes(rng.randrange(256) for _ in range(3)) + b"\xff"
+    r2 = (size // 2 - 1) ** 2
+    rows = []
+    for y in range(size):
+        row = bytearray(b"\0")
+        for x in range(size):
+            inside = (x - size // 2) ** 2 + (y - size // 2) ** 2 <= r2
+            row += color if inside else b"\0\0\0\0"
+        rows.append(bytes(row))
+    ihdr = struct.pack(">IIBBBBB", size, size, 8, 6, 0, 0, 0)
+    return (audit_nfts.PNG_SIGNATURE + _chunk(b"IHDR", ihdr)
+            + _chunk(b"IDAT", zlib.compress(b"".join(rows), 9)) + _chunk(b"IEND", b""))
+
+
+def _vocab() -> Dict[str, List[str]]:
+    colors = sorted(set(ba.COLOR_ALIASES) | ba.EXTRA_COLOR_TOKENS)
+    return {
+        "elements": sorted(ba.ELEMENTS),
+        "types": sorted(ba.TYPE_ALIASES),
+        "strains": sorted(ba.STRAIN_TOKENS) + ["_".join(phrase) for phrase, (tt, _v) in ba.PHRASE_TRAITS if tt == "Strain"],
+        "accessories": sorted(ba.ACCESSORY_ALIASES),
+        "motifs": sorted(ba.MOTIF_ALIASES) + ["_".join(phrase) for phrase, (tt, _v) in ba.PHRASE_TRAITS if tt == "Motif"],
+        "colors": colors,
+    }
+
+
+def synthetic_name(rng: random.Random, idx: int, vocab: Dict[str, List[str]]) -> str:
+    tokens = [rng.choice(vocab["elements"])]
+    if rng.random() < 0.6:
+        tokens.append(rng.choice(vocab["types"]))
+    if rng.random() < 0.4:
+        tokens.append(rng.choice(vocab["strains"]))
+    if rng.random() < 0.3:
+        tokens.append(rng.choice(vocab["motifs"]))
+    if rng.random() < 0.2:
+        tokens.append(rng.choice(vocab["accessories"]))
+    if rng.random() < 0.5:
+        tokens.append(rng.choice(vocab["colors"]))
+    if rng.random() < 0.1:
+        tokens.append("".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 8))))
+    if rng.random() < 0.05:
+        tokens.append("variant2")
+    rng.shuffle(tokens)
+    if rng.random() < 0.7:
+        tokens.append(f"bg-{rng.choice(vocab['colors'])}")
+    return f"{idx:03d}_" + "_".join(tokens) + ".png"
+
+
+def generate_collection(root: Path, count: int, seed: int = 0) -> Path:
+    """Create (or reuse) a synthetic source tree of `count` PNGs under `root`; returns its path."""
+    src = root / f"src_{count}_{seed}"
+    marker = src / ".complete"
+    stamp = ba.vocab_fingerprint()
+    if marker.exists() and marker.read_text() == stamp:
+        return src
+
+    rng = random.Random(seed)
+    vocab = _vocab()
+    pngs = [tiny_png(rng) for _ in range(PNG_VARIANTS)]
+    for idx in range(count):
+        name = synthetic_name(rng, idx, vocab)
+        element = name.split("_")[1]
+        folder = rng.choice(["", "", element, f"{element}/extra"])
+        path = src / folder / name if folder else src / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(rng.choice(pngs))
+    marker.write_text(stamp)
+    return src
+
+
+def measure(fn: Callable[[], object], repeat: int, setup: Callable[[], object] = None) -> Dict:
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return {"min_s": round(min(times), 6), "median_s": round(statistics.median(times), 6)}
+
+
+def bench_size(count: int, args: argparse.Namespace) -> Dict[str, Dict]:
+    src = generate_collection(args.work, count, args.seed)
+    out = args.work / f"out_{count}_{args.seed}"
+    out.mkdir(parents=True, exist_ok=True)
+    ba.SRC_IMAGES_DIR = src
+    ba.OUT_ASSETS_DIR = out
+    ba.IDX_RE = re.compile(r"^(\d{1,4})_") if count <= 10000 else re.compile(r"^(\d{1,7})_")
+
+    results: Dict[str, Dict] = {}
+    pngs = ba.discover_images()
+    results["discover_images"] = measure(ba.discover_images, args.repeat)
+    rels = [(p.stem, p.relative_to(src)) for _i, p in pngs]
+    results["parse_traits"] = measure(lambda: [ba.parse_traits(stem, rel) for stem, rel in rels], args.repeat)
+    cache = ba.ParseCache(ba.vocab_fingerprint())
+    for stem, rel in rels:
+        cache.parse(stem, rel)
+    results["parse_traits.cached"] = measure(lambda: [cache.parse(stem, rel) for stem, rel in rels], args.repeat)
+
+    stages: Dict[str, List[float]] = {}
+
+    def build(full: bool) -> None:
+        argv = ["--full"] if full else []
+        if args.jobs > 1:
+            argv += ["--jobs", str(args.jobs), "--pool", args.pool]
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = ba.build(ba.parse_args(argv))
+        for stage, seconds in stats["stages_s"].items():
+            stages.setdefault(f"build.{'full' if full else 'noop'}.{stage}", []).append(seconds)
+
+    results["build.full"] = measure(lambda: build(True), args.repeat)
+    results["build.noop"] = measure(lambda: build(False), args.repeat)
+    for key, values in stages.items():
+        results[key] = {"min_s": round(min(values), 6), "median_s": round(statistics.median(values), 6)}
+
+    ctx = {"collection": audit_nfts.AssetCollection(out), "source_dir": src, "backup_dir": args.work / "no-backup"}
+    ctx.update(audit_nfts.run_pass(audit_nfts.AUDIT_PASSES[0], ctx)[0])
+    for audit_pass in audit_nfts.AUDIT_PASSES:
+        if args.passes and audit_pass.number not in args.passes:
+            continue
+
+        def run_pass(p=audit_pass) -> None:
+            audit_nfts.run_pass(p, {**ctx, "collection": audit_nfts.AssetCollection(out)})
+        results[f"audit.pass{audit_pass.number}.{audit_pass.name}"] = measure(run_pass, args.repeat)
+    return results
+
+
+def compare(current: Dict, baseline: Dict, threshold: float, floor_s: float = 0.001) -> List[str]:
+    """Return report lines for timings that got slower than baseline by more than `threshold`."""
+    regressions = []
+    for size, timings in current.items():
+        for key, t in timings.items():
+            old = baseline.get(size, {}).get(key)
+            if not old or max(old["min_s"], t["min_s"]) < floor_s:
+                continue
+            ratio = t["min_s"] / old["min_s"] if old["min_s"] else float("inf")
+            if ratio > 1 + threshold:
+                regressions.append(f"  {size:>7} {key:<40} {old['min_s']:.4f}s -> {t['min_s']:.4f}s  x{ratio:.2f}")
+    return regressions
+
+
+def format_report(results: Dict, baseline: Dict = None) -> List[str]:
+    lines = [f"Python {platform.python_version()} on {platform.platform()}"]
+    for size, timings in results.items():
+        lines.append("")
+        lines.append(f"== {size} items ==")
+        for key, t in timings.items():
+            old = (baseline or {}).get(size, {}).get(key)
+            delta = f"  ({t['min_s'] / old['min_s']:.2f}x baseline)" if old and old["min_s"] else ""
+            lines.append(f"  {key:<40} min {t['min_s']:>9.4f}s  median {t['median_s']:>9.4f}s{delta}")
+    return lines
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the asset pipeline on synthetic collections")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000], help="collection sizes (default: 1000)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="build workers")
+    parser.add_argument("--pool", choices=("thread", "process"), default="thread")
+    parser.add_argument("--passes", type=int, nargs="*", help="audit passes to time (default: all)")
+    parser.add_argument("--work", type=Path, default=BENCH_DIR, help="where synthetic trees and outputs live (reused between runs)")
+    parser.add_argument("--output", type=Path, default=Path("bench_output.txt"))
+    parser.add_argument("--baseline", type=Path, help="compare against this saved run")
+    parser.add_argument("--save-baseline", type=Path, help="save this run's results as a baseline")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown before a timing counts as a regression (default: 0.15)")
+    return parser.parse_args(argv)
+
+
+def main(args: argparse.Namespace) -> int:
+    args.work.mkdir(parents=True, exist_ok=True)
+    results = {str(size): bench_size(size, args) for size in args.sizes}
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))["results"] if args.baseline else None
+
+    lines = format_report(results, baseline)
+    status = 0
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        lines.append("")
+        if regressions:
+            lines.append(f"Regressions (> {args.threshold:.0%} slower than {args.baseline}):")
+            lines.extend(regressions)
+            status = 1
+        else:
+            lines.append(f"No regressions against {args.baseline}")
+
+    report = "\n".join(lines)
+    print(report)
+    args.output.write_text(report + "\n", encoding="utf-8")
+    if args.save_baseline:
+        payload = {"python": platform.python_version(), "platform": platform.platform(), "repeat": args.repeat,
+                   "seed": args.seed, "jobs": args.jobs, "results": results}
+        args.save_baseline.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main(parse_args()))
@@ -17,12 +17,21 @@
 ********************************************************************************************
 """
 # import necessary libraries
+import argparse
+import errno
+import hashlib
 import json
+import os
 import re
 import shutil
-from collections import Counter, defaultdict
+import time
+from collections import Counter, OrderedDict, defaultdict
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import trait_vocab
+from trait_audit import AUDIT_STATE_NAME, audit_state_text
+from trait_vocab import titleish
 
 
 # ---------------- SOLSPRITES CONFIG -----------------------
@@ -53,10 +62,47 @@ CLEAN_OUTPUT_NUMERIC_ASSETS = True
 # If True, will delete existing numeric .png and .json files in the output dir before writing new ones. Set to False to keep existing files (useful if you want to preserve manually added metadata or images that aren't generated by this script).
 WRITE_INDEX_MAP = True 
 # If True, will write an index_map.json file that maps source indices to output indices and includes the original source file paths. Useful for tracking and debugging, especially if renumbering or if source indices are non-contiguous.
+WRITE_VARIANTS_SIDECAR = False
+# If True, will also write a _variants_by_index.json file ({final_idx: [variants]}) next to index_map.json. Each index_map row already carries its own "variants" list, so this is only a convenience for tools that want the whole map in one object.
 WRITE_TRAIT_AUDIT = True 
 # If True, will write a _trait_audit.json file that summarizes the traits found across all items, including counts and unique values. Useful for auditing and refining trait parsing logic.
+WRITE_RARITY = False
+# If True, will write a rarity.json file with per-trait value frequencies and per-item rarity scores and ranks (information content, statistical rarity, rarity score) computed from the metadata attributes. Needs NumPy (see rarity.py).
 INCLUDE_VARIANTS_IN_METADATA = False 
 # If True, will include Variant traits in the metadata JSON files. If False, Variant traits will be excluded from metadata but still counted in the trait audit and included in the index map for reference.
+WRITE_SNAPSHOT = True
+# If True, will write a _collection_snapshot.bin file: every item's metadata traits as dictionary-encoded int32 columns in one memory-mappable file, so tools can answer whole-collection queries without opening every N.json (see snapshot.py).
+INCREMENTAL_BUILD = True
+# If True, keeps a _build_manifest.json in the output dir (source size/mtime/hash, vocab fingerprint, output files) and only re-copies or re-writes items whose source, parsed traits or output slot changed since the last run. Run with --full (or set False) to force a clean rebuild.
+BUILD_MANIFEST_NAME = "_build_manifest.json"
+BUILD_MANIFEST_VERSION = 1
+MATERIALIZE = "copy"
+# How output PNGs are created from the sources: "copy" (shutil.copy2), "hardlink" (no extra space or I/O; the output shares the source's inode, so editing one edits both), "reflink" (copy-on-write clone where the filesystem supports it, e.g. btrfs/XFS, else an in-kernel os.copy_file_range, else a copy) or "symlink". Anything the filesystem refuses falls back to a copy. Outputs are always swapped in by rename, so re-materializing never writes through an existing link into a source. Override per run with --materialize. Optimized PNGs and thumbnails are reflinked or copied out of the build cache whatever the mode, so deleting the cache never breaks the assets.
+MATERIALIZE_MODES = ("copy", "hardlink", "reflink", "symlink")
+OPTIMIZE_PNGS = False
+# If True, output PNGs are re-encoded after copying (see png_optimize.py; needs Pillow + NumPy): ancillary chunks are stripped, the image is reduced losslessly where possible (opaque RGBA -> RGB, <= 256 colors -> palette), every PNG filter/zlib strategy combination is tried and the smallest kept. 16-bit PNGs, and colour-managed ones whose iCCP/gAMA/sRGB/cHRM chunks aren't in OPTIMIZE_KEEP_CHUNKS, are left as they are. Work runs on a process pool (--jobs) and results are cached by source hash in the build cache, so unchanged sources are never re-encoded.
+OPTIMIZE_RESIZE: Optional[Tuple[int, int]] = None  # e.g. (1024, 1024) to resize every output PNG (lossy)
+OPTIMIZE_RESAMPLE = "lanczos"                       # "lanczos", "bicubic" or "nearest" (hard pixel edges)
+OPTIMIZE_QUANTIZE_COLORS: Optional[int] = None      # e.g. 64 to quantize to a palette (lossy); None keeps every color
+OPTIMIZE_KEEP_CHUNKS: Tuple[str, ...] = ()          # ancillary chunks to keep, e.g. ("sRGB", "gAMA")
+WRITE_THUMBNAILS = False
+# If True, writes preview tiers of every item to OUT_ASSETS_DIR/THUMBNAIL_DIR as <n>-<size>.<format> (longest side = size, aspect kept, never enlarged; see thumbnails.py, needs Pillow). Tiers are rendered on a process pool (--jobs) into the build cache keyed by source hash, so unchanged sources are never re-rendered; PNG tiers are also optimized when OPTIMIZE_PNGS is on.
+THUMBNAIL_DIR = "thumbs"
+THUMBNAIL_SIZES: Tuple[int, ...] = (64, 256, 512)
+THUMBNAIL_FORMATS: Tuple[str, ...] = ("png", "webp")
+THUMBNAIL_RESAMPLE = "lanczos"                 # "lanczos", "bicubic" or "nearest" (hard pixel edges)
+THUMBNAIL_WEBP_QUALITY: Optional[int] = None   # None => lossless WebP (usually smallest for flat art); e.g. 85 for lossy
+THUMBNAILS_IN_METADATA = False                 # also list every tier in each item JSON's properties.files
+PARSE_CACHE = True
+# If True, parse_traits results are memoized (in memory, LRU, up to PARSE_CACHE_SIZE names) and persisted in the build cache under the vocab fingerprint, so items the manifest can't answer for (--full, renamed sources, a fresh output dir) cost a lookup instead of a parse. Any vocabulary change gives a new fingerprint and so a cold cache.
+PARSE_CACHE_SIZE = 200_000
+BUILD_CACHE_DIR: Optional[Path] = None
+# Where derived-file caches (optimized PNGs, thumbnails, parsed traits, ...) live. None => a .build_cache folder next to OUT_ASSETS_DIR, outside the uploaded assets.
+WRITE_BUILD_STATS = True
+# If True, will write a _build_stats.json file with wall time per build stage, per-item latency histograms, summed per-item time for hashing/parsing/copying/JSON writing, and bytes copied, so throughput regressions show up when the vocabulary or the collection grows. --profile and --tracemalloc add cProfile and memory data.
+BUILD_STATS_NAME = "_build_stats.json"
+# Upper bucket edges (ms) for the per-item latency histograms in _build_stats.json
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
 
 # Background fallback if no bg/mg token is found (set to "None" to disable)
 DEFAULT_BACKGROUND: Optional[str] = "Black"
@@ -69,249 +115,27 @@ EXCLUDE_SOURCE_INDICES = set()  # e.g. {31, 72, 105, 200}
 EXCLUDE_NAME_CONTAINS = []      # e.g. ["bad", "test"]
 
 # ---------------- TRAIT VOCAB ----------------
-# Elemental categories (e.g. fire, water, earth, air, void, electric, light, shadow)
-ELEMENTS = {
-    "fire", "water", "earth", "air", "void", "electric", "light", "shadow",
-    #* Additional elements that might be used in traits or folder names:
-    "forest", "fern", "sunflower", "spleenwort", "calypso", "magic",
-}
-
-# Type/form categories (e.g. cannabis, mushroom, halo, etc.)
-TYPE_ALIASES = {
-    # base
-    "sprite": "Sprite",
-    "regular": "Sprite",
-
-    # mushroom family
-    "mushroom": "Mushroom",
-    "shroom": "Mushroom",
-    "agaric": "Mushroom",
-    "teonanacatl": "Mushroom",
-    "psilocybe": "Mushroom",
-    "shaggy": "Mushroom",
-    "mane": "Mushroom",
-    "reshi": "Mushroom",
-    "ink": "Mushroom",
-    
-
-    # plant family
-    "cannabis": "Cannabis",
-    "weed": "Cannabis",
-    "ganja": "Cannabis",
-    "maryjane": "Cannabis",
-    "marijuana": "Cannabis",
-    "hemp": "Cannabis",
-    "bud": "Cannabis",
-    "indica": "Cannabis",
-    "sativa": "Cannabis",
-    "kush": "Cannabis",
-    "gorilla": "Cannabis",
-    "glue": "Cannabis",
-    "cookies": "Cannabis",
-
-    # other
-    "goblin": "Goblin",
-    "fairy": "Fairy",
-    "root": "Root",
-    "cubes": "Cubes",
-    "cube": "Cubes",
-
-    # plant-like sprites
-    "sprout": "Plant",
-    "plant": "Plant",
-    "tree": "Plant",
-    "fern": "Plant",
-    "cactus": "Plant",
-    "orchid": "Plant",
-    "vine": "Plant",
-    "poppy": "Plant",
-    "willow": "Plant",
-    "cedar": "Plant",
-    "cypress": "Plant",
-    "sunflower": "Plant",
-    "spleenwort": "Plant",
-    "khat": "Plant",
-    "kratom": "Plant",
-    "ayahuasca": "Plant",
-    "cocoa": "Plant",
-}
-
-# Accessories and adornments
-ACCESSORY_ALIASES = {
-    "eyeglasses": "Eyeglasses",
-    "glasses": "Eyeglasses",
-    "sunglasses": "Sunglasses",
-    "Sunglasses": "Sunglasses",
-    "hat": "Hat",
-    "crown": "Crown",
-    "halo": "Halo",
-}
-
-# Motifs/patterns
-MOTIF_ALIASES = {
-    "tribal": "Tribal",
-    "swirl": "Swirl",
-    "double-tribal": "Double Tribal",
-}
-
-# Phrase traits (multi-token patterns)
-PHRASE_TRAITS = [
-    (("girl", "scout", "cookies"), ("Strain", "Girl Scout Cookies")),
-    (("girl", "scout"), ("Strain", "Girl Scout")),
-    (("death", "star"), ("Strain", "Death Star")),
-    (("gorilla", "glue"), ("Strain", "Gorilla Glue")),
-    (("pink", "kush"), ("Strain", "Pink Kush")),
-    (("green", "md"), ("Strain", "Green Md")),
-    (("white", "md"), ("Strain", "White Md")),
-    (("death", "star"), ("Strain", "Death Star")),
-
-    (("z", "strain"), ("Strain", "Z Strain")),
-    (("golden", "teacher"), ("Strain", "Golden Teacher")),
-    (("flying", "saucer"), ("Strain", "Flying Saucer")),
-    (("liberty", "cap"), ("Strain", "Liberty Cap")),
-    (("azure", "cap"), ("Strain", "Azure Cap")),
-    # ((shaggy := "shaggy", mane := "mane"), ("Strain", "Shaggy Mane")),  # Example of using walrus operator for readability
-    (("shaggy", "mane"), ("Strain", "Shaggy Mane")),
-    (("inky", "cap"), ("Strain", "Inky Cap")),
-    (("khat", "plant"), ("Strain", "Khat Plant")),
-    (("cocoa", "plant"), ("Strain", "Cocoa Plant")),
-    (("ayahuasca", "plant"), ("Strain", "Ayahuasca Plant")),
-    (("poppy", "plant"), ("Strain", "Poppy Plant")),
-    (("opium", "poppy"), ("Strain", "Opium Poppy")),
-    (("willow", "herb"), ("Strain", "Willow Herb")),
-    (("willow", "tree"), ("Strain", "Willow Tree")),
-    (("philosophers", "stone"), ("Strain", "Philosophers Stone")),
-    (("wavy", "caps"), ("Strain", "Wavy Caps")),
-    (("psilocyben", "cubensis"), ("Strain", "Psilocyben Cubensis")),
-    (("sacred", "mexica"), ("Strain", "Sacred Mexica")),
-    (("san", "pedro"), ("Strain", "San Pedro")),
-    # (("shaggy", "mane"), ("Strain", "Shaggy Mane")),
-    (("swirl", "echo"), ("Motif", "Swirl Echo")),
-    (("double", "tribal"), ("Motif", "Double Tribal")),
-    (("double", "tribal", "aura"), ("Aura Style", "Double Tribal")),
-    (("double", "aura"), ("Aura Style", "Double")),
-    (("knobby", "tops"), ("Strain", "Knobby Tops")),
-]
-
-# Strain tokens (single-word indicators of specific strains or variants, not already covered by phrase traits)
-STRAIN_TOKENS = {
-    "indica",
-    "sativa",
-    "kush",
-    "bohemica",
-    "borneo",
-    "cyanscens",
-    "cubensis",
-    "psilocyben",
-    "psilocybin",
-    "teonanacatl",
-    "reshi",
-    "agaric",
-    # "shaggy",
-    # "mane",
-    "ink",
-    "dmt",
-    "kratom",
-}
-
-# Strains that should force Type= Mushroom even if no type token is present. This is based on known mushroom strains, any strain names here should be categorized as Mushroom even if the filename doesn't explicitly include a type token.
-MUSHROOM_STRAINS = {
-    "Golden Teacher",
-    "Psilocyben Cubensis",
-    "Sacred Mexica",
-    "Wavy Caps",
-    "Shaggy Mane",
-    "Liberty Cap",
-    "Azure",
-    "Knobby Tops",
-    "Flying Saucer",
-    "Psilocybin",
-    "Z Strain",
-    "Philosophers Stone",
-}
-
-# Strains that should force Type= Cannabis even if no type token is present. This is based on known cannabis strains, any strain names here should be categorized as cannabis even if the filename doesn't explicitly include a type token.
-CANNABIS_STRAINS = {
-    "Death Star",
-    "Gorilla Glue",
-    "Girl Scout Cookies",
-    "Green Md",
-    "White Md",
-    "Pink Kush",
-    "Kush",
-    "Indica",
-    "Sativa",
-}
-
-# Strains that should force Type= Plant even if no type token is present. This is based on known plant strains, any strain names here should be categorized as Plant even if the filename doesn't explicitly include a type token.
-PLANT_STRAINS = {
-    "Khat Plant",
-    "Cocoa Plant",
-    "Poppy Plant",
-    "Willow Tree",
-    "San Pedro",
-    "Dmt",
-    "Kratom",
-    "Borneo",
-    "Ayahuasca Plant",
-}
-
-# Color tokens and their normalized forms. This is used to identify color traits and normalize them to a consistent format. You can expand this list with any additional color tokens you expect to encounter in your filenames.
-COLOR_ALIASES = {
-    "grey": "Gray",
-    "gray": "Gray",
-    "charcoal": "Charcoal",
-    "cream": "Cream",
-    "coal": "Coal",
-    "ivory": "Ivory",
-    "tan": "Tan",
-    "azure": "Azure",
-    "cyan": "Cyan",
-    "teal": "Teal",
-    "magenta": "Magenta",
-    "purple": "Purple",
-    "violet": "Violet",
-    "pink": "Pink",
-    "orange": "Orange",
-    "yellow": "Yellow",
-    "red": "Red",
-    "green": "Green",
-    "blue": "Blue",
-    "black": "Black",
-    "white": "White",
-    "gold": "Gold",
-    "silver": "Silver",
-    "ember": "Ember",
-    "lava": "Lava",
-    "redbackdrop": "Red Backdrop",
-    "bar": "Bar",
-    "dive-bar": "Dive Bar",
-    "satanic-dive-bar": "Satanic Dive Bar",
-    "solana-convention": "Solana Convention",
-    "nft-nyc": "Nft Nyc",
-    "parchment": "Parchment",
-    "brown": "Brown",
-    "beige": "Beige",
-}
-
-# Additional color tokens that are recognized as colors but don't have specific normalized forms (they will be title-cased). This is used to catch any color tokens that aren't in the COLOR_ALIASES but should still be treated as colors.
-EXTRA_COLOR_TOKENS = {
-    "delicate", "seashell", "ivory", "peach", "mint", "sage", "olive", "mustard", "cobalt", "indigo", "plum", "rose", "blush", "coral", "apricot", "bronze", "copper", "steel", "slate", "ash", "charcoal", "cream", "coal", "tan", "azure", "cyan", "teal", "magenta", "purple", "violet", "pink", "orange", "yellow", "red", "green", "blue", "black", "white", "gold", "silver",
-}
+# The tables live in trait_vocab.json and are compiled once into a cached artifact next to it (see trait_vocab.py); edit the JSON, not this file. The module-level copies below are what parse_traits reads, so they can still be changed at runtime (call compile_trait_matcher() afterwards).
+VOCAB = trait_vocab.load_vocab()
+ELEMENTS = set(VOCAB.elements)
+TYPE_ALIASES = dict(VOCAB.type_aliases)
+ACCESSORY_ALIASES = dict(VOCAB.accessory_aliases)
+MOTIF_ALIASES = dict(VOCAB.motif_aliases)
+PHRASE_TRAITS = list(VOCAB.phrase_traits)
+STRAIN_TOKENS = set(VOCAB.strain_tokens)
+MUSHROOM_STRAINS = set(VOCAB.mushroom_strains)
+CANNABIS_STRAINS = set(VOCAB.cannabis_strains)
+PLANT_STRAINS = set(VOCAB.plant_strains)
+COLOR_ALIASES = dict(VOCAB.color_aliases)
+EXTRA_COLOR_TOKENS = set(VOCAB.extra_color_tokens)
+VARIANT_IGNORE = set(VOCAB.variant_ignore)
 
 # Regular expressions for parsing indices from filenames and identifying numeric asset files. The IDX_RE looks for a numeric prefix followed by an underscore (e.g. "000_", "31_", etc.) to extract the source index. The NUMERIC_ASSET_RE is used to identify files that are named with just a number and .png or .json extension, which are the expected output asset files.
 IDX_RE = re.compile(r"^(\d{1,4})_")
 NUMERIC_ASSET_RE = re.compile(r"^\d+\.(png|json)$", re.IGNORECASE)
-
-# Tokens that would otherwise be treated as variants but we want to ignore (e.g., common words that aren't meaningful traits).
-VARIANT_IGNORE = {"variant", "variant2"}
+THUMBNAIL_RE = re.compile(r"^\d+-\d+\.(png|webp)$", re.IGNORECASE)
 
 # Utility functions for parsing and normalizing traits from filenames. These functions help convert raw tokens from the filenames into structured traits that can be included in the metadata JSON files.
-def titleish(s: str) -> str:
-    s = s.replace("-", " ").replace(".", " ").strip()
-    return " ".join(w.capitalize() for w in s.split() if w)
-
-
 def normalize_color(token: str) -> str:
     t = token.lower().strip()
     return COLOR_ALIASES.get(t, titleish(t))
@@ -322,7 +146,22 @@ def is_color_token(token: str) -> bool:
     return t in COLOR_ALIASES or t in EXTRA_COLOR_TOKENS
 
 
-def validate_config() -> None:
+class BuildSettings(NamedTuple):
+    """Stage switches for one build() call: the module config, overridden by that call's CLI flags."""
+    materialize: str
+    optimize_pngs: bool
+    write_thumbnails: bool
+
+
+def resolve_settings(args: Optional[argparse.Namespace] = None) -> BuildSettings:
+    return BuildSettings(
+        materialize=getattr(args, "materialize", None) or MATERIALIZE,
+        optimize_pngs=OPTIMIZE_PNGS or bool(getattr(args, "optimize", False)),
+        write_thumbnails=WRITE_THUMBNAILS or bool(getattr(args, "thumbnails", False)),
+    )
+
+
+def validate_config(settings: BuildSettings) -> None:
     if not OUT_ASSETS_DIR.parts:
         raise SystemExit("OUT_ASSETS_DIR is invalid.")
 
@@ -338,6 +177,20 @@ def validate_config() -> None:
     if INDEX_MODE not in {"renumber", "preserve"}:
         raise SystemExit('INDEX_MODE must be "renumber" or "preserve".')
 
+    if settings.materialize not in MATERIALIZE_MODES:
+        raise SystemExit(f"MATERIALIZE must be one of {', '.join(MATERIALIZE_MODES)}.")
+
+    if OPTIMIZE_RESAMPLE not in {"lanczos", "bicubic", "nearest"}:
+        raise SystemExit('OPTIMIZE_RESAMPLE must be "lanczos", "bicubic" or "nearest".')
+
+    if settings.write_thumbnails:
+        if THUMBNAIL_RESAMPLE not in {"lanczos", "bicubic", "nearest"}:
+            raise SystemExit('THUMBNAIL_RESAMPLE must be "lanczos", "bicubic" or "nearest".')
+        if not set(THUMBNAIL_FORMATS) <= {"png", "webp"}:
+            raise SystemExit('THUMBNAIL_FORMATS may only contain "png" and "webp".')
+        if not THUMBNAIL_SIZES or any(int(size) < 1 for size in THUMBNAIL_SIZES):
+            raise SystemExit("THUMBNAIL_SIZES must be positive pixel sizes.")
+
 
 def clean_output_dir() -> None:
     if not OUT_ASSETS_DIR.exists():
@@ -345,10 +198,16 @@ def clean_output_dir() -> None:
 
     for p in OUT_ASSETS_DIR.iterdir():
         if p.is_file() and (NUMERIC_ASSET_RE.match(p.name) or p.name in {
-            "collection.json", "collection.png", "index_map.json", "_trait_audit.json"
+            "collection.json", "collection.png", "index_map.json", "_variants_by_index.json", "_trait_audit.json", AUDIT_STATE_NAME, "rarity.json", "_collection_snapshot.bin", ".collection_snapshot_state.json", BUILD_MANIFEST_NAME, BUILD_STATS_NAME, "_build_profile.prof"
         }):
             p.unlink(missing_ok=True)
 
+    thumbs = OUT_ASSETS_DIR / THUMBNAIL_DIR
+    if thumbs.is_dir():
+        for p in thumbs.iterdir():
+            if p.is_file() and THUMBNAIL_RE.match(p.name):
+                p.unlink(missing_ok=True)
+
 
 def add_bucket(bucket: Dict[str, List[str]], trait_type: str, value: str) -> None:
     if not value:
@@ -400,56 +259,138 @@ def tokenize(stem: str) -> List[str]:
     return out
 
 
-def apply_phrase_traits(tokens: List[str], used: set, bucket: Dict[str, List[str]]) -> None:
-    for phrase, (tt, val) in sorted(PHRASE_TRAITS, key=lambda x: len(x[0]), reverse=True):
-        plen = len(phrase)
-        for i in range(0, len(tokens) - plen + 1):
+# Compiled trait matcher. All vocabularies are folded into a phrase trie plus one token -> TokenTraits table, so parse_traits classifies every token in a single pass instead of one scan per category. Category precedence (Background > Element > Type > Strain > Aura > Motif > Accessory > Sprite Color > Variant) matches the old pass order exactly.
+class TokenTraits(NamedTuple):
+    element: bool
+    type_value: Optional[str]
+    strain: bool
+    aura: bool
+    motif: Optional[str]
+    accessory: Optional[str]
+    color: Optional[str]
+
+
+class TraitMatcher:
+    def __init__(self, compiled: Optional[Dict] = None) -> None:
+        # `compiled` is trait_vocab.compile_matcher() output; without it the current module tables are compiled. See compile_matcher for the phrase trie layout.
+        compiled = compiled or trait_vocab.compile_matcher(vocab_tables())
+        self.phrase_trie: Dict = compiled["phrase_trie"]
+        self.tokens: Dict[str, TokenTraits] = {t: TokenTraits._make(traits) for t, traits in compiled["tokens"].items()}
+
+    def match_phrases(self, tokens: List[str], used: set, bucket: Dict[str, List[str]]) -> None:
+        matches = []
+        n = len(tokens)
+        for i in range(n):
+            node = self.phrase_trie
+            for j in range(i, n):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                term = node.get(None)
+                if term is not None:
+                    matches.append((term[0], i, j - i + 1, term[1], term[2]))
+
+        # Accept by (phrase rank, position), skipping overlaps: the same result as scanning each phrase in rank order.
+        matches.sort()
+        for _rank, i, plen, tt, val in matches:
             if any((i + k) in used for k in range(plen)):
                 continue
-            if tuple(tokens[i:i + plen]) == phrase:
-                add_bucket(bucket, tt, val)
-                for k in range(plen):
-                    used.add(i + k)
+            add_bucket(bucket, tt, val)
+            used.update(range(i, i + plen))
+
+
+_TRAIT_MATCHER: Optional[TraitMatcher] = None
+
+
+def compile_trait_matcher() -> TraitMatcher:
+    """(Re)compile the vocab tables. Call this after changing any vocabulary at runtime."""
+    global _TRAIT_MATCHER, _PARSE_CACHE
+    # Untouched tables reuse the trie/token table precompiled into the vocab cache
+    _TRAIT_MATCHER = TraitMatcher(VOCAB.matcher if vocab_tables() == VOCAB.tables() else None)
+    _PARSE_CACHE = None
+    return _TRAIT_MATCHER
+
+
+def get_trait_matcher() -> TraitMatcher:
+    return _TRAIT_MATCHER or compile_trait_matcher()
+
+
+def apply_phrase_traits(tokens: List[str], used: set, bucket: Dict[str, List[str]]) -> None:
+    get_trait_matcher().match_phrases(tokens, used, bucket)
+
+
+def match_background(tokens: List[str], i: int, used: set) -> Optional[Tuple[str, int]]:
+    """Return (background, tokens consumed) if tokens[i] starts a bg-*/mg-* pattern."""
+    t = tokens[i]
+    if (t.startswith("bg-") or t.startswith("mg-")) and len(t) > 3:
+        return t[3:], 1
+    if t in {"bg", "mg"} and i + 1 < len(tokens) and (i + 1) not in used:
+        return tokens[i + 1], 2
+    if (t.startswith("bg") or t.startswith("mg")) and len(t) > 2 and t[2] != "-":
+        return t[2:], 1
+    return None
 
 
 def parse_traits(stem: str, rel_path: Path) -> Tuple[List[Dict[str, str]], List[str]]:
+    matcher = get_trait_matcher()
     tokens = tokenize(stem)
     used = set()
     bucket: Dict[str, List[str]] = {}
 
-    apply_phrase_traits(tokens, used, bucket)
+    matcher.match_phrases(tokens, used, bucket)
 
-    # Background
     background: Optional[str] = None
+    element: Optional[str] = None
+    type_val: Optional[str] = bucket.get("Type", [None])[0]
+    type_taken = type_val is not None
+    aura_present = False
+    sprite_colors: List[str] = []
+    leftovers: List[str] = []
+    unknown_tokens: List[str] = []
+
     for i, t in enumerate(tokens):
         if i in used:
             continue
-        if t.startswith("bg-") and len(t) > 3:
-            background = t[3:]
-            used.add(i)
-            break
-        if t.startswith("mg-") and len(t) > 3:
-            background = t[3:]
-            used.add(i)
-            break
-        if t == "bg" and i + 1 < len(tokens) and (i + 1) not in used:
-            background = tokens[i + 1]
-            used.add(i)
-            used.add(i + 1)
-            break
-        if t == "mg" and i + 1 < len(tokens) and (i + 1) not in used:
-            background = tokens[i + 1]
-            used.add(i)
-            used.add(i + 1)
-            break
-        if t.startswith("bg") and t != "bg" and not t.startswith("bg-") and len(t) > 2:
-            background = t[2:]
-            used.add(i)
-            break
-        if t.startswith("mg") and t != "mg" and not t.startswith("mg-") and len(t) > 2:
-            background = t[2:]
-            used.add(i)
-            break
+
+        if background is None:
+            bg = match_background(tokens, i, used)
+            if bg:
+                background, consumed = bg
+                used.update(range(i, i + consumed))
+                continue
+
+        cls = matcher.tokens.get(t)
+        if cls is not None:
+            if cls.element and element is None:
+                element = t
+                continue
+            if cls.type_value and not type_taken:
+                type_val = cls.type_value
+                type_taken = True
+                continue
+            if cls.strain:
+                add_bucket(bucket, "Strain", titleish(t))
+                continue
+            if cls.aura and not aura_present:
+                aura_present = True
+                continue
+            if cls.motif:
+                add_bucket(bucket, "Motif", cls.motif)
+                continue
+            if cls.accessory:
+                add_bucket(bucket, "Accessory", cls.accessory)
+                continue
+            if cls.color:
+                sprite_colors.append(cls.color)
+                continue
+
+        # Track leftover tokens as Variant traits
+        if t in {"bg", "mg"}:
+            continue
+        if t in VARIANT_IGNORE:
+            unknown_tokens.append(t)
+            continue
+        leftovers.append(t)
 
     if background:
         add_bucket(bucket, "Background", normalize_color(background) if is_color_token(background) else titleish(background))
@@ -457,13 +398,6 @@ def parse_traits(stem: str, rel_path: Path) -> Tuple[List[Dict[str, str]], List[
         add_bucket(bucket, "Background", titleish(DEFAULT_BACKGROUND))
 
     # Element (token or folder fallback)
-    element: Optional[str] = None
-    for i, t in enumerate(tokens):
-        if i not in used and t in ELEMENTS:
-            element = t
-            used.add(i)
-            break
-
     if not element:
         for part in rel_path.parts:
             p = part.lower()
@@ -472,27 +406,8 @@ def parse_traits(stem: str, rel_path: Path) -> Tuple[List[Dict[str, str]], List[
                 break
 
     add_bucket(bucket, "Element", titleish(element or "Unknown"))
-
-    # Type
-    type_val: Optional[str] = bucket.get("Type", [None])[0]
-    if type_val is None:
-        for i, t in enumerate(tokens):
-            if i in used:
-                continue
-            if t in TYPE_ALIASES:
-                type_val = TYPE_ALIASES[t]
-                used.add(i)
-                break
     add_bucket(bucket, "Type", type_val or "Sprite")
 
-    # Strain/specific variants (skip indices already consumed by phrase matching)
-    for i, t in enumerate(tokens):
-        if i in used:
-            continue
-        if t in STRAIN_TOKENS:
-            add_bucket(bucket, "Strain", titleish(t))
-            used.add(i)
-
     # Strains that imply a specific Type even if no type token is present
     if bucket.get("Type") == ["Sprite"]:
         if any(s in MUSHROOM_STRAINS for s in bucket.get("Strain", [])):
@@ -502,58 +417,12 @@ def parse_traits(stem: str, rel_path: Path) -> Tuple[List[Dict[str, str]], List[
         elif any(s in PLANT_STRAINS for s in bucket.get("Strain", [])):
             bucket["Type"] = ["Plant"]
 
-    # Aura
-    aura_present = False
-    for i, t in enumerate(tokens):
-        if i in used:
-            continue
-        if t == "aura":
-            aura_present = True
-            used.add(i)
-            break
     if aura_present:
         add_bucket(bucket, "Aura", "Yes")
 
-    # Motifs
-    for i, t in enumerate(tokens):
-        if i in used:
-            continue
-        if t in MOTIF_ALIASES:
-            add_bucket(bucket, "Motif", MOTIF_ALIASES[t])
-            used.add(i)
-
-    # Accessories
-    for i, t in enumerate(tokens):
-        if i in used:
-            continue
-        if t in ACCESSORY_ALIASES:
-            add_bucket(bucket, "Accessory", ACCESSORY_ALIASES[t])
-            used.add(i)
-
-    # Sprite colors (remaining color tokens)
-    sprite_colors: List[str] = []
-    for i, t in enumerate(tokens):
-        if i in used:
-            continue
-        if is_color_token(t) and t.lower() not in ELEMENTS:
-            sprite_colors.append(normalize_color(t))
-            used.add(i)
     if sprite_colors:
         add_bucket(bucket, "Sprite Color", " / ".join(sprite_colors))
 
-    # Track leftover tokens as Variant traits
-    leftovers: List[str] = []
-    unknown_tokens: List[str] = []
-    for i, t in enumerate(tokens):
-        if i in used:
-            continue
-        if t in {"bg", "mg"}:
-            continue
-        if t in VARIANT_IGNORE:
-            unknown_tokens.append(t)
-            continue
-        leftovers.append(t)
-
     # Deduplicate variants while preserving order
     seen_variant = set()
     for t in leftovers:
@@ -566,9 +435,122 @@ def parse_traits(stem: str, rel_path: Path) -> Tuple[List[Dict[str, str]], List[
     return bucket_to_attributes(bucket), unknown_tokens
 
 
-def make_item_json(idx: int, source_path: Path, rel_path: Path) -> Dict:
+# Parse cache. parse_traits depends on rel_path only through the first folder named like an element, so (stem, that folder) plus the vocab fingerprint fully determines the result. Bump PARSE_CACHE_VERSION when the parsing code itself changes.
+PARSE_CACHE_VERSION = 1
+
+ParseResult = Tuple[List[Dict[str, str]], List[str]]
+
+
+def parse_cache_key(stem: str, rel_path: Path) -> str:
+    folder = next((part.lower() for part in rel_path.parts if part.lower() in ELEMENTS), "")
+    return f"{stem}\0{folder}"
+
+
+class ParseCache:
+    """LRU memo of parse_traits results for one vocab fingerprint, optionally backed by a JSON file.
+
+    Hits return the cached lists themselves: treat them as read-only.
+    """
+
+    def __init__(self, fingerprint: str, path: Optional[Path] = None, maxsize: int = PARSE_CACHE_SIZE) -> None:
+        self.fingerprint = fingerprint
+        self.path = path
+        self.maxsize = maxsize
+        # key -> (attributes, unknown tokens), or as loaded from disk and not yet used:
+        # "trait_type\x1fvalue\x1f...\x1eunknown\x1f..." (one string per entry keeps the store fast to load)
+        self.entries: "OrderedDict[str, object]" = OrderedDict()
+        self.hits = self.misses = 0
+        self.dirty = False
+
+    def load(self) -> "ParseCache":
+        if self.path is None:
+            return self
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return self
+        if data.get("version") == PARSE_CACHE_VERSION and data.get("vocab_fingerprint") == self.fingerprint:
+            self.entries.update((key, v) for key, v in data["entries"].items() if isinstance(v, str))
+        return self
+
+    def save(self) -> None:
+        """Write the cache if it changed, and drop stores left behind by other vocab fingerprints."""
+        if self.path is None or not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps({
+            "version": PARSE_CACHE_VERSION,
+            "vocab_fingerprint": self.fingerprint,
+            "entries": {key: v if isinstance(v, str) else self._pack(*v) for key, v in self.entries.items()},
+        }), encoding="utf-8")
+        os.replace(tmp, self.path)
+        for old in self.path.parent.glob("*.json"):
+            if old != self.path:
+                old.unlink(missing_ok=True)
+        self.dirty = False
+
+    def get(self, key: str) -> Optional[ParseResult]:
+        hit = self.entries.get(key)
+        if hit is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        if isinstance(hit, str):
+            hit = self.entries[key] = self._unpack(hit)
+        return hit
+
+    @staticmethod
+    def _pack(attrs: List[Dict[str, str]], unknown_tokens: List[str]) -> str:
+        return "\x1f".join(x for a in attrs for x in (a["trait_type"], a["value"])) + "\x1e" + "\x1f".join(unknown_tokens)
+
+    @staticmethod
+    def _unpack(packed: str) -> ParseResult:
+        packed_attrs, _, packed_unknown = packed.partition("\x1e")
+        it = iter(packed_attrs.split("\x1f") if packed_attrs else [])
+        return [{"trait_type": tt, "value": v} for tt, v in zip(it, it)], packed_unknown.split("\x1f") if packed_unknown else []
+
+    def put(self, key: str, attrs: List[Dict[str, str]], unknown_tokens: List[str]) -> None:
+        self.entries[key] = (attrs, unknown_tokens)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        self.dirty = True
+
+    def parse(self, stem: str, rel_path: Path) -> ParseResult:
+        key = parse_cache_key(stem, rel_path)
+        hit = self.get(key)
+        if hit is not None:
+            return hit
+        attrs, unknown_tokens = parse_traits(stem, rel_path)
+        self.put(key, attrs, unknown_tokens)
+        return attrs, unknown_tokens
+
+
+_PARSE_CACHE: Optional[ParseCache] = None
+
+
+def get_parse_cache(fingerprint: Optional[str] = None) -> ParseCache:
+    """The process-wide parse cache for the current vocabulary, loaded from the build cache on first use."""
+    global _PARSE_CACHE
+    fingerprint = fingerprint or (_PARSE_CACHE.fingerprint if _PARSE_CACHE else vocab_fingerprint())
+    if _PARSE_CACHE is None or _PARSE_CACHE.fingerprint != fingerprint:
+        path = build_cache_dir() / "parse" / f"{fingerprint}.json" if PARSE_CACHE else None
+        _PARSE_CACHE = ParseCache(fingerprint, path).load()
+    return _PARSE_CACHE
+
+
+def parse_traits_cached(stem: str, rel_path: Path) -> ParseResult:
+    """parse_traits through the parse cache (for tools that re-derive traits from file names)."""
+    return get_parse_cache().parse(stem, rel_path)
+
+
+def make_item_json(idx: int, source_path: Path, rel_path: Path, attrs: Optional[List[Dict[str, str]]] = None,
+                   thumbnails: bool = False) -> Dict:
     num = f"{idx:0{NAME_NUMBER_WIDTH}d}" if NAME_NUMBER_WIDTH > 0 else str(idx)
-    attrs, _unknown = parse_traits(source_path.stem, rel_path)
+    if attrs is None:
+        attrs, _unknown = parse_traits(source_path.stem, rel_path)
 
     base: Dict = {
         "name": f"{COLLECTION_NAME} #{num}",
@@ -578,7 +560,7 @@ def make_item_json(idx: int, source_path: Path, rel_path: Path) -> Dict:
         "image": f"{idx}.png",
         "attributes": attrs,
         "properties": {
-            "files": [{"uri": f"{idx}.png", "type": "image/png"}],
+            "files": [{"uri": f"{idx}.png", "type": "image/png"}] + thumbnail_files(idx, thumbnails),
             "category": "image",
             "creators": CREATORS,
         },
@@ -588,6 +570,22 @@ def make_item_json(idx: int, source_path: Path, rel_path: Path) -> Dict:
     return base
 
 
+def thumbnail_name(idx: int, size: int, fmt: str) -> str:
+    # Not <n>_<size>: the output dir usually sits inside SRC_IMAGES_DIR, and IDX_RE would take that for a source
+    return f"{idx}-{size}.{fmt}"
+
+
+def thumbnail_files(idx: int, thumbnails: bool) -> List[Dict[str, str]]:
+    """properties.files entries for an item's thumbnail tiers (empty unless they're written and THUMBNAILS_IN_METADATA)."""
+    if not (thumbnails and THUMBNAILS_IN_METADATA):
+        return []
+    mime = {"png": "image/png", "webp": "image/webp"}
+    return [
+        {"uri": f"{THUMBNAIL_DIR}/{thumbnail_name(idx, size, fmt)}", "type": mime[fmt]}
+        for size in THUMBNAIL_SIZES for fmt in THUMBNAIL_FORMATS
+    ]
+
+
 def make_collection_json() -> Dict:
     base: Dict = {
         "name": COLLECTION_NAME,
@@ -606,25 +604,32 @@ def make_collection_json() -> Dict:
     return base
 
 
-def discover_images() -> List[Tuple[int, Path]]:
-    pngs: List[Tuple[int, Path]] = []
-    for p in SRC_IMAGES_DIR.rglob("*.png"):
-        if p.name.lower() == "collection.png":
-            continue
+def source_index_of(name: str) -> Optional[int]:
+    """Source index of a PNG file name, or None if it isn't a (non-excluded) collection item."""
+    if name.lower() == "collection.png":
+        return None
 
-        m = IDX_RE.match(p.name)
-        if not m:
-            continue
+    m = IDX_RE.match(name)
+    if not m:
+        return None
 
-        src_idx = int(m.group(1))
-        if src_idx in EXCLUDE_SOURCE_INDICES:
-            continue
+    src_idx = int(m.group(1))
+    if src_idx in EXCLUDE_SOURCE_INDICES:
+        return None
 
-        name_lower = p.name.lower()
-        if any(s.lower() in name_lower for s in EXCLUDE_NAME_CONTAINS):
-            continue
+    name_lower = name.lower()
+    if any(s.lower() in name_lower for s in EXCLUDE_NAME_CONTAINS):
+        return None
+
+    return src_idx
 
-        pngs.append((src_idx, p))
+
+def discover_images() -> List[Tuple[int, Path]]:
+    pngs: List[Tuple[int, Path]] = []
+    for p in SRC_IMAGES_DIR.rglob("*.png"):
+        src_idx = source_index_of(p.name)
+        if src_idx is not None:
+            pngs.append((src_idx, p))
 
     pngs.sort(key=lambda t: (t[0], str(t[1]).lower()))
     return pngs
@@ -642,17 +647,582 @@ def ensure_preserve_indices_contiguous(src_indices: List[int]) -> None:
         raise SystemExit(f'INDEX_MODE="preserve" requires no gaps. Missing: {missing[:20]} Extra: {extra[:20]}')
 
 
-def main() -> None:
-    validate_config()
+# Incremental build support. The manifest maps each source (relative path) to its size/mtime/content hash, the output slot it was written to, the stat of the output files, and the parsed traits. Fingerprints of the trait vocabulary and the metadata config decide whether cached traits and JSONs can be reused.
+def file_digest(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _fingerprint(payload: Dict) -> str:
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=True)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def vocab_tables() -> Dict:
+    """The module's vocabulary tables in trait_vocab.json's layout."""
+    return trait_vocab.canonical({
+        "elements": ELEMENTS,
+        "type_aliases": TYPE_ALIASES,
+        "accessory_aliases": ACCESSORY_ALIASES,
+        "motif_aliases": MOTIF_ALIASES,
+        "phrase_traits": PHRASE_TRAITS,
+        "strain_tokens": STRAIN_TOKENS,
+        "mushroom_strains": MUSHROOM_STRAINS,
+        "cannabis_strains": CANNABIS_STRAINS,
+        "plant_strains": PLANT_STRAINS,
+        "color_aliases": COLOR_ALIASES,
+        "extra_color_tokens": EXTRA_COLOR_TOKENS,
+        "variant_ignore": VARIANT_IGNORE,
+    })
+
+
+def vocab_fingerprint() -> str:
+    return _fingerprint({**vocab_tables(), "default_background": DEFAULT_BACKGROUND})
+
+
+def metadata_fingerprint(settings: BuildSettings) -> str:
+    payload = {
+        "collection_name": COLLECTION_NAME,
+        "symbol": SYMBOL,
+        "description": DESCRIPTION,
+        "external_url": EXTERNAL_URL,
+        "seller_fee_bps": SELLER_FEE_BPS,
+        "creators": CREATORS,
+        "name_number_width": NAME_NUMBER_WIDTH,
+        "include_variants": INCLUDE_VARIANTS_IN_METADATA,
+    }
+    # Only when listed, so enabling thumbnails alone doesn't rewrite every JSON
+    if thumbnail_files(0, settings.write_thumbnails):
+        payload["thumbnail_files"] = [THUMBNAIL_DIR, list(THUMBNAIL_SIZES), list(THUMBNAIL_FORMATS)]
+    return _fingerprint(payload)
+
+
+# (path, stat, manifest) of the last manifest this process wrote; watch mode rebuilds reuse it instead of re-parsing the file
+_MANIFEST_MEMO: Optional[Tuple[Path, List[int], Dict]] = None
+
+
+def load_build_manifest() -> Dict:
+    path = OUT_ASSETS_DIR / BUILD_MANIFEST_NAME
+    if _MANIFEST_MEMO and _MANIFEST_MEMO[0] == path and _MANIFEST_MEMO[1] == _stat_key(path):
+        return _MANIFEST_MEMO[2]
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("version") != BUILD_MANIFEST_VERSION:
+        return {}
+    return manifest
+
+
+def save_build_manifest(manifest: Dict) -> None:
+    global _MANIFEST_MEMO
+    path = OUT_ASSETS_DIR / BUILD_MANIFEST_NAME
+    # Unindented: json only uses its C encoder without indent, and nobody reads this file by hand
+    path.write_text(json.dumps(manifest), encoding="utf-8")
+    _MANIFEST_MEMO = (path, _stat_key(path), manifest)
+
+
+def _stat_key(path: Path) -> Optional[List[int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def write_text_if_changed(path: Path, text: str) -> bool:
+    try:
+        if path.read_text(encoding="utf-8") == text:
+            return False
+    except (OSError, UnicodeDecodeError):
+        pass
+    path.write_text(text, encoding="utf-8")
+    return True
+
+
+# Output materialization. Errors that mean "this filesystem can't do that" switch the method off for the rest of the run; anything else (missing source, full disk) is raised as usual.
+FICLONE = 0x40049409  # Linux ioctl: clone src_fd's extents into the target fd
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EACCES, errno.EINVAL, errno.ENOSYS, errno.ENOTTY, errno.EOPNOTSUPP, errno.ENOTSUP}
+_MATERIALIZE_UNSUPPORTED: set = set()
+
+
+def _unsupported(method: str, exc: OSError) -> None:
+    if exc.errno not in _UNSUPPORTED_ERRNOS:
+        raise exc
+    _MATERIALIZE_UNSUPPORTED.add(method)
+
+
+def _clone_file(src: Path, dst: Path) -> str:
+    """Copy src to dst by FICLONE or os.copy_file_range if possible; returns the method used."""
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        if "reflink" not in _MATERIALIZE_UNSUPPORTED:
+            try:
+                import fcntl
+
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                return "reflink"
+            except ImportError:
+                _MATERIALIZE_UNSUPPORTED.add("reflink")
+            except OSError as e:
+                _unsupported("reflink", e)
+
+        if hasattr(os, "copy_file_range") and "copy_file_range" not in _MATERIALIZE_UNSUPPORTED:
+            try:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if n == 0:
+                        break
+                    remaining -= n
+                if remaining == 0:
+                    return "copy_file_range"
+            except OSError as e:
+                _unsupported("copy_file_range", e)
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+
+        shutil.copyfileobj(fsrc, fdst)
+        return "copy"
+
+
+def materialize(src: Path, dst: Path, mode: Optional[str] = None) -> str:
+    """Create `dst` from `src` with `mode` (default MATERIALIZE); returns the method actually used.
+
+    The new file is built next to `dst` and renamed over it, so when `dst` is currently a
+    hardlink or symlink to some source, that source is never modified.
+    """
+    mode = mode or MATERIALIZE
+    tmp = dst.with_name(f".{dst.name}.tmp")
+    tmp.unlink(missing_ok=True)
+    method = None
+    try:
+        if mode == "hardlink" and mode not in _MATERIALIZE_UNSUPPORTED:
+            try:
+                os.link(src, tmp)
+                method = "hardlink"
+            except OSError as e:
+                _unsupported(mode, e)
+        elif mode == "symlink" and mode not in _MATERIALIZE_UNSUPPORTED:
+            try:
+                os.symlink(src.resolve(), tmp)
+                method = "symlink"
+            except OSError as e:
+                _unsupported(mode, e)
+        elif mode == "reflink":
+            method = _clone_file(src, tmp)
+            shutil.copystat(src, tmp)
+
+        if method is None:
+            shutil.copy2(src, tmp)
+            method = "copy"
+        os.replace(tmp, dst)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return method
+
+
+def emit_item(final_idx: int, src_path: Path, prev: Optional[Dict], reuse_traits: bool, reuse_json: bool, reuse_png: bool = True,
+              parsed: Optional[ParseResult] = None, settings: Optional[BuildSettings] = None) -> Dict:
+    """Copy/parse/write one item, skipping work the manifest entry `prev` (or a parse cache hit, `parsed`) proves is already done."""
+    t_start = time.perf_counter()
+    settings = settings or resolve_settings()
+    rel_path = src_path.relative_to(SRC_IMAGES_DIR)
+    out_png = OUT_ASSETS_DIR / f"{final_idx}.png"
+    out_json = OUT_ASSETS_DIR / f"{final_idx}.json"
+
+    src_stat = src_path.stat()
+    if prev and prev.get("size") == src_stat.st_size and prev.get("mtime_ns") == src_stat.st_mtime_ns:
+        digest = prev["digest"]
+    else:
+        digest = file_digest(src_path)
+    t_hash = time.perf_counter()
+
+    prev_outputs = (prev or {}).get("outputs", {})
+    same_source = bool(prev) and prev.get("digest") == digest
+    same_slot = bool(prev) and prev.get("final_idx") == final_idx
+
+    method = None
+    png_stat = prev_outputs.get(out_png.name) if same_source and same_slot and reuse_png else None
+    if png_stat is None or _stat_key(out_png) != png_stat:
+        method = materialize(src_path, out_png, settings.materialize)
+    t_copy = time.perf_counter()
+
+    if prev and reuse_traits and "attributes" in prev:
+        attrs_all = prev["attributes"]
+        unknown_tokens = prev.get("unknown_tokens", [])
+    elif parsed is not None:
+        attrs_all, unknown_tokens = parsed
+    else:
+        attrs_all, unknown_tokens = parse_traits(src_path.stem, rel_path)
+    t_parse = time.perf_counter()
+
+    written = False
+    json_stat = prev_outputs.get(out_json.name) if same_slot and reuse_json else None
+    if json_stat is None or attrs_all != prev.get("attributes") or _stat_key(out_json) != json_stat:
+        # Strip Variant from the metadata JSONs (0..N-1.json)
+        attrs_meta = attrs_all if INCLUDE_VARIANTS_IN_METADATA else [
+            a for a in attrs_all if a.get("trait_type") != "Variant"
+        ]
+        meta = make_item_json(final_idx, src_path, rel_path, attrs_meta, settings.write_thumbnails)
+        # A vocabulary change re-renders every item; only the ones whose JSON differs are rewritten
+        written = write_text_if_changed(out_json, json.dumps(meta, indent=2))
+    t_end = time.perf_counter()
+
+    return {
+        "src_file": str(rel_path).replace("\\", "/"),
+        "size": src_stat.st_size,
+        "mtime_ns": src_stat.st_mtime_ns,
+        "digest": digest,
+        "final_idx": final_idx,
+        "outputs": {out_png.name: _stat_key(out_png), out_json.name: _stat_key(out_json)},
+        "attributes": attrs_all,
+        "unknown_tokens": unknown_tokens,
+        "copied": method is not None,
+        "method": method,
+        "written": written,
+        # Seconds per step; popped by main() into _build_stats.json, never stored in the manifest
+        "timings": {
+            "hash": t_hash - t_start,
+            "copy": t_copy - t_hash,
+            "parse": t_parse - t_copy,
+            "json_write": t_end - t_parse,
+            "total": t_end - t_start,
+        },
+    }
+
+
+def build_cache_dir() -> Path:
+    return BUILD_CACHE_DIR or OUT_ASSETS_DIR.parent / ".build_cache"
+
+
+def optimize_settings() -> Dict:
+    return {
+        "resize": list(OPTIMIZE_RESIZE) if OPTIMIZE_RESIZE else None,
+        "resample": OPTIMIZE_RESAMPLE,
+        "quantize": OPTIMIZE_QUANTIZE_COLORS,
+        "keep_chunks": list(OPTIMIZE_KEEP_CHUNKS),
+    }
+
+
+def optimize_fingerprint(settings: BuildSettings) -> Optional[str]:
+    return _fingerprint({"settings": optimize_settings(), "encoder": 2}) if settings.optimize_pngs else None
+
+
+def _optimize_task(task: Tuple[str, str, Dict]) -> Tuple[int, int]:
+    import png_optimize
+
+    return png_optimize.optimize_file(*task)
+
+
+def optimize_outputs(items: List[Tuple[Dict, Path]], settings: BuildSettings, jobs: int = 1) -> Dict:
+    """Replace each freshly materialized output PNG with its optimized version.
+
+    `items` are (manifest entry, output PNG) pairs. Encodes go into the build cache as
+    <source digest>-<settings fingerprint>.png (so identical sources share one encode) and are
+    reflinked or copied from there, never linked, so the outputs don't depend on the cache; each
+    entry's recorded output stat is updated to match.
+    """
+    import png_optimize  # needs Pillow + NumPy, so only imported when enabled
+
+    options = optimize_settings()
+    cache = build_cache_dir() / "png"
+    fp = optimize_fingerprint(settings)
+    tasks: Dict[str, Tuple[str, str, Dict]] = {}
+    for entry, out_png in items:
+        cached = cache / f"{entry['digest']}-{fp}.png"
+        if not cached.exists() and str(cached) not in tasks:
+            tasks[str(cached)] = (str(SRC_IMAGES_DIR / entry["src_file"]), str(cached), options)
+
+    todo = list(tasks.values())
+    if jobs > 1 and len(todo) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=jobs) as ex:
+            sizes = list(ex.map(_optimize_task, todo, chunksize=max(1, len(todo) // (jobs * 4))))
+    else:
+        sizes = [png_optimize.optimize_file(*task) for task in todo]
+
+    bytes_in = bytes_out = 0
+    for entry, out_png in items:
+        cached = cache / f"{entry['digest']}-{fp}.png"
+        materialize(cached, out_png, "reflink")
+        entry["outputs"][out_png.name] = _stat_key(out_png)
+        bytes_in += entry["size"]
+        bytes_out += cached.stat().st_size
+    return {
+        "optimized": len(items),
+        "encoded": len(todo),
+        "cache_hits": len(items) - len(todo),
+        "encoded_bytes": [sum(a for a, _ in sizes), sum(b for _, b in sizes)],
+        "bytes_in": bytes_in,
+        "bytes_out": bytes_out,
+    }
+
+
+def thumbnail_settings(settings: BuildSettings) -> Dict:
+    return {
+        "sizes": [int(size) for size in THUMBNAIL_SIZES],
+        "formats": list(THUMBNAIL_FORMATS),
+        "resample": THUMBNAIL_RESAMPLE,
+        "webp_quality": THUMBNAIL_WEBP_QUALITY,
+        "optimize_png": settings.optimize_pngs,
+    }
+
+
+def thumbnail_fingerprint(settings: BuildSettings) -> Optional[str]:
+    return _fingerprint({"settings": thumbnail_settings(settings), "renderer": 1}) if settings.write_thumbnails else None
+
+
+def _thumbnail_task(task: Tuple[str, str, Dict]) -> Dict[str, int]:
+    import thumbnails
+
+    src, out_dir, settings = task
+    return thumbnails.render_tiers(src, out_dir, **settings)
+
+
+def write_thumbnails(entries: List[Dict], prev_items: Dict[str, Dict], reuse: bool, settings: BuildSettings, jobs: int = 1) -> Dict:
+    """Bring OUT_ASSETS_DIR/THUMBNAIL_DIR up to date for the manifest `entries`.
+
+    Tiers are rendered once per source digest into <build cache>/thumbs/<digest>-<fingerprint>/
+    and reflinked or copied (never linked) from there. Each entry's "thumbnails" records the output stats, so items
+    whose source, slot and outputs are unchanged (and `reuse`, i.e. same settings) are skipped.
+    Thumbnails of items no longer in the collection are removed.
+    """
+    import thumbnails  # needs Pillow, so only imported when enabled
+
+    options = thumbnail_settings(settings)
+    cache = build_cache_dir() / "thumbs"
+    fp = thumbnail_fingerprint(settings)
+    out_dir = OUT_ASSETS_DIR / THUMBNAIL_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+    tiers = [(size, fmt) for size in options["sizes"] for fmt in options["formats"]]
+
+    pending: List[Dict] = []
+    tasks: Dict[str, Tuple[str, str, Dict]] = {}
+    expected = set()
+    for entry in entries:
+        names = [thumbnail_name(entry["final_idx"], size, fmt) for size, fmt in tiers]
+        expected.update(names)
+        prev = prev_items.get(entry["src_file"]) or {}
+        prev_stats = prev.get("thumbnails") or {}
+        if (reuse and prev.get("digest") == entry["digest"] and prev.get("final_idx") == entry["final_idx"]
+                and all(prev_stats.get(n) is not None and _stat_key(out_dir / n) == prev_stats[n] for n in names)):
+            entry["thumbnails"] = {n: prev_stats[n] for n in names}
+            continue
+        pending.append(entry)
+        cached = cache / f"{entry['digest']}-{fp}"
+        if not cached.is_dir() and str(cached) not in tasks:
+            tasks[str(cached)] = (str(SRC_IMAGES_DIR / entry["src_file"]), str(cached), options)
+
+    todo = list(tasks.values())
+    if jobs > 1 and len(todo) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=jobs) as ex:
+            list(ex.map(_thumbnail_task, todo, chunksize=max(1, len(todo) // (jobs * 4))))
+    else:
+        for src, cached, task_settings in todo:
+            thumbnails.render_tiers(src, cached, **task_settings)
+
+    bytes_out = 0
+    for entry in pending:
+        cached = cache / f"{entry['digest']}-{fp}"
+        entry["thumbnails"] = {}
+        for size, fmt in tiers:
+            name = thumbnail_name(entry["final_idx"], size, fmt)
+            materialize(cached / f"{size}.{fmt}", out_dir / name, "reflink")
+            entry["thumbnails"][name] = _stat_key(out_dir / name)
+            bytes_out += entry["thumbnails"][name][0]
+
+    removed = 0
+    for p in out_dir.iterdir():
+        if p.is_file() and THUMBNAIL_RE.match(p.name) and p.name not in expected:
+            p.unlink(missing_ok=True)
+            removed += 1
+    return {
+        "items_updated": len(pending),
+        "rendered": len(todo),
+        "cache_hits": len(pending) - len(todo),
+        "files_written": len(pending) * len(tiers),
+        "bytes_written": bytes_out,
+        "removed": removed,
+    }
+
+
+# Parallel emission. Workers only do the per-item copy/parse/write; all counters are merged afterwards in source order, so the output is identical to the serial path. Process workers get a snapshot of the module config because the parent may have changed it after import.
+WORKER_CONFIG_NAMES = (
+    "SRC_IMAGES_DIR", "OUT_ASSETS_DIR", "COLLECTION_NAME", "SYMBOL", "DESCRIPTION", "EXTERNAL_URL",
+    "SELLER_FEE_BPS", "CREATORS", "NAME_NUMBER_WIDTH", "INCLUDE_VARIANTS_IN_METADATA", "DEFAULT_BACKGROUND",
+    "THUMBNAILS_IN_METADATA", "THUMBNAIL_DIR", "THUMBNAIL_SIZES", "THUMBNAIL_FORMATS",
+    "ELEMENTS", "TYPE_ALIASES", "ACCESSORY_ALIASES", "MOTIF_ALIASES", "PHRASE_TRAITS", "STRAIN_TOKENS",
+    "MUSHROOM_STRAINS", "CANNABIS_STRAINS", "PLANT_STRAINS", "COLOR_ALIASES", "EXTRA_COLOR_TOKENS", "VARIANT_IGNORE",
+)
+
+
+def _init_worker(config: Dict) -> None:
+    globals().update(config)
+    compile_trait_matcher()
+
+
+def _emit_item_task(task: Tuple) -> Dict:
+    return emit_item(*task)
+
+
+def emit_items(tasks: List[Tuple], jobs: int = 1, pool: str = "thread") -> List[Dict]:
+    """Run emit_item over `tasks`, returning results in task order."""
+    if jobs <= 1 or len(tasks) <= 1:
+        return [emit_item(*task) for task in tasks]
+
+    # Imported here so importing build_assets for its config (source_index, the check CLIs) stays cheap
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    if pool == "process":
+        config = {name: globals()[name] for name in WORKER_CONFIG_NAMES}
+        chunksize = max(1, len(tasks) // (jobs * 4))
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(config,)) as ex:
+            return list(ex.map(_emit_item_task, tasks, chunksize=chunksize))
+
+    with ThreadPoolExecutor(max_workers=jobs) as ex:
+        return list(ex.map(_emit_item_task, tasks))
+
+
+def cache_names(entries: Iterable[Dict], fingerprint: Optional[str], suffix: str = "") -> Set[str]:
+    """Build cache entry names (<source digest>-<fingerprint><suffix>) for manifest `entries`; none without a fingerprint."""
+    return {f"{entry['digest']}-{fingerprint}{suffix}" for entry in entries} if fingerprint else set()
+
+
+def prune_build_cache(sub: str, keep: Set[str], candidates: Optional[Set[str]] = None) -> int:
+    """Delete the entries of <build cache>/<sub> not in `keep` (only those among `candidates` when given)."""
+    root = build_cache_dir() / sub
+    if candidates is None:
+        try:
+            with os.scandir(root) as it:
+                candidates = {e.name for e in it}
+        except FileNotFoundError:
+            return 0
+    removed = 0
+    for name in candidates - keep:
+        path = root / name
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        elif path.exists():
+            path.unlink(missing_ok=True)
+        else:
+            continue
+        removed += 1
+    return removed
+
+
+def prune_stale_outputs(keep: set) -> int:
+    removed = 0
+    for p in OUT_ASSETS_DIR.iterdir():
+        if p.is_file() and NUMERIC_ASSET_RE.match(p.name) and p.name not in keep:
+            p.unlink(missing_ok=True)
+            removed += 1
+    return removed
+
+
+# Build instrumentation. Stage times are wall clock in the parent; per-item step times come back from the workers with each result, so with --jobs > 1 their sums can exceed the emit stage's wall time.
+class StageTimer:
+    def __init__(self) -> None:
+        self.stages: Dict[str, float] = {}
+        self.start = self._last = time.perf_counter()
+
+    def lap(self, name: str) -> None:
+        """Charge the time since the previous lap to stage `name`."""
+        now = time.perf_counter()
+        self.stages[name] = self.stages.get(name, 0.0) + now - self._last
+        self._last = now
+
+
+def latency_summary(seconds: List[float]) -> Dict:
+    ms = sorted(v * 1000.0 for v in seconds)
+    if not ms:
+        return {"count": 0}
+    buckets: Dict[str, int] = {f"<={edge}": 0 for edge in LATENCY_BUCKETS_MS}
+    buckets[f">{LATENCY_BUCKETS_MS[-1]}"] = 0
+    for v in ms:
+        for edge in LATENCY_BUCKETS_MS:
+            if v <= edge:
+                buckets[f"<={edge}"] += 1
+                break
+        else:
+            buckets[f">{LATENCY_BUCKETS_MS[-1]}"] += 1
+
+    def pct(q: float) -> float:
+        return round(ms[min(len(ms) - 1, int(q * len(ms)))], 4)
+
+    return {
+        "count": len(ms),
+        "mean_ms": round(sum(ms) / len(ms), 4),
+        "p50_ms": pct(0.50),
+        "p90_ms": pct(0.90),
+        "p99_ms": pct(0.99),
+        "max_ms": round(ms[-1], 4),
+        "histogram_ms": buckets,
+    }
+
+
+def profile_summary(profiler, limit: int = 30) -> List[Dict]:
+    import pstats
+
+    st = pstats.Stats(profiler)
+    rows = []
+    for (filename, line, func), (_cc, ncalls, tottime, cumtime, _callers) in st.stats.items():
+        rows.append({
+            "function": f"{Path(filename).name}:{line}({func})",
+            "calls": ncalls,
+            "tottime_s": round(tottime, 6),
+            "cumtime_s": round(cumtime, 6),
+        })
+    rows.sort(key=lambda r: r["cumtime_s"], reverse=True)
+    return rows[:limit]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build Candy Machine v2 assets from the source PNGs.")
+    parser.add_argument("--full", action="store_true", help="ignore the build manifest and rebuild every item from scratch")
+    parser.add_argument("--jobs", "-j", type=int, default=1, metavar="N", help="emit items with N parallel workers (default: 1, serial)")
+    parser.add_argument("--pool", choices=("thread", "process"), default="thread", help="worker pool used when --jobs > 1 (threads suit copy/JSON I/O, processes suit trait parsing)")
+    parser.add_argument("--materialize", choices=MATERIALIZE_MODES, help="how output PNGs are created from the sources (default: MATERIALIZE)")
+    parser.add_argument("--optimize", action="store_true", help="re-encode output PNGs smaller (OPTIMIZE_PNGS; needs Pillow + NumPy)")
+    parser.add_argument("--thumbnails", action="store_true", help=f"write preview tiers into {THUMBNAIL_DIR}/ (WRITE_THUMBNAILS; needs Pillow)")
+    parser.add_argument("--watch", action="store_true", help="after building, keep running and rebuild whenever source PNGs are added, changed, renamed or removed")
+    parser.add_argument("--poll", type=float, nargs="?", const=0.5, metavar="SECONDS", help="with --watch: poll the source tree every SECONDS (default 0.5) instead of using inotify")
+    parser.add_argument("--debounce", type=float, default=0.25, metavar="SECONDS", help="with --watch: wait until changes pause this long before rebuilding (default: %(default)s)")
+    parser.add_argument("--profile", action="store_true", help=f"run under cProfile: writes _build_profile.prof and the top functions into {BUILD_STATS_NAME}")
+    parser.add_argument("--tracemalloc", action="store_true", help=f"trace allocations: peak memory and top allocation sites go into {BUILD_STATS_NAME}")
+    return parser.parse_args(argv)
+
+
+def build(args: argparse.Namespace, sources: Optional[List[Tuple[int, Path]]] = None, changed: Optional[Set[Path]] = None) -> Dict:
+    """Run the build; returns the stats written to _build_stats.json.
+
+    Watch mode passes the source list it maintains (`sources`, in discover_images order) and
+    the source paths its events named (`changed`): every other item whose output slot and
+    build settings are unchanged is carried over from the manifest without touching the disk.
+    """
+    timer = StageTimer()
+    # CLI flags apply to this call only; the module config stays as the caller left it
+    settings = resolve_settings(args)
+    validate_config(settings)
 
     if not SRC_IMAGES_DIR.exists():
         raise SystemExit(f"Missing source dir: {SRC_IMAGES_DIR}")
 
     OUT_ASSETS_DIR.mkdir(parents=True, exist_ok=True)
-    if CLEAN_OUTPUT_NUMERIC_ASSETS:
+    incremental = INCREMENTAL_BUILD and not args.full
+    manifest = load_build_manifest() if incremental else {}
+    if not manifest and CLEAN_OUTPUT_NUMERIC_ASSETS:
         clean_output_dir()
+    timer.lap("setup")
 
-    pngs = discover_images()
+    pngs = discover_images() if sources is None else sources
     if not pngs:
         raise SystemExit(f"No matching PNGs like '000_*.png' found under: {SRC_IMAGES_DIR}")
 
@@ -670,38 +1240,82 @@ def main() -> None:
     src_indices = [i for i, _ in pngs]
     if INDEX_MODE == "preserve":
         ensure_preserve_indices_contiguous(src_indices)
+    timer.lap("discover")
+
+    vocab_fp = vocab_fingerprint()
+    meta_fp = metadata_fingerprint(settings)
+    prev_items: Dict[str, Dict] = manifest.get("items", {})
+    reuse_traits = manifest.get("vocab_fingerprint") == vocab_fp
+    reuse_json = reuse_traits and manifest.get("metadata_fingerprint") == meta_fp
+    # Switching materialization method or PNG optimization settings re-creates every PNG
+    optimize_fp = optimize_fingerprint(settings)
+    reuse_png = manifest.get("materialize", "copy") == settings.materialize and manifest.get("optimize") == optimize_fp
 
     index_map = []
     unknown_counter = Counter()
     trait_counts = Counter()
-    values_by_trait = defaultdict(set)
+    value_refs: Dict[str, Counter] = defaultdict(Counter)
+    audit_files: Dict[str, Dict] = {}
     variants_by_index = {}
-
+    manifest_items: Dict[str, Dict] = {}
+    meta_items: List[Tuple[int, List[Dict[str, str]]]] = []
+    copied = written = bytes_copied = 0
+    methods = Counter()
+    to_optimize: List[Tuple[Dict, Path]] = []
+    item_timings: Dict[str, List[float]] = defaultdict(list)
+
+    trust_unchanged = changed is not None and reuse_json and reuse_png
+    parse_cache = get_parse_cache(vocab_fp) if PARSE_CACHE else None
+    parse_hits = parse_misses = 0
+    results: List[Optional[Dict]] = [None] * len(pngs)
+    tasks = []
+    task_rows = []
+    task_parse_keys = []
     for out_idx, (src_idx, src_path) in enumerate(pngs):
         final_idx = src_idx if INDEX_MODE == "preserve" else out_idx
-
-        out_png = OUT_ASSETS_DIR / f"{final_idx}.png"
-        out_json = OUT_ASSETS_DIR / f"{final_idx}.json"
-
-        shutil.copy2(src_path, out_png)
-
-        # rel_path = src_path.relative_to(SRC_IMAGES_DIR)
-        # attrs, unknown_tokens = parse_traits(src_path.stem, rel_path)
-
-        # meta = make_item_json(final_idx, src_path, rel_path)
-        # meta["attributes"] = attrs
-        # out_json.write_text(json.dumps(meta, indent=2), encoding="utf-8")
-
-        # for a in attrs:
-        #     tt = a.get("trait_type", "")
-        #     vv = a.get("value", "")
-        #     trait_counts[tt] += 1
-        #     if vv:
-        #         values_by_trait[tt].add(vv)
-
         rel_path = src_path.relative_to(SRC_IMAGES_DIR)
-
-        attrs_all, unknown_tokens = parse_traits(src_path.stem, rel_path)
+        rel_key = str(rel_path).replace("\\", "/")
+        prev = prev_items.get(rel_key)
+        if trust_unchanged and prev and prev.get("final_idx") == final_idx and src_path not in changed:
+            results[out_idx] = {**prev, "copied": False, "method": None, "written": False, "timings": {}}
+            continue
+        # Traits the manifest can't vouch for come from the parse cache; workers only parse the misses
+        parsed = parse_key = None
+        if parse_cache is not None and not (prev and reuse_traits and "attributes" in prev):
+            parse_key = parse_cache_key(src_path.stem, rel_path)
+            parsed = parse_cache.get(parse_key)
+            if parsed is None:
+                parse_misses += 1
+            else:
+                parse_hits += 1
+                parse_key = None
+        tasks.append((final_idx, src_path, prev, reuse_traits, reuse_json, reuse_png, parsed, settings))
+        task_rows.append(out_idx)
+        task_parse_keys.append(parse_key)
+
+    timer.lap("plan")
+    for out_idx, parse_key, entry in zip(task_rows, task_parse_keys, emit_items(tasks, jobs=args.jobs, pool=args.pool)):
+        results[out_idx] = entry
+        if parse_key is not None:
+            parse_cache.put(parse_key, entry["attributes"], entry["unknown_tokens"])
+    timer.lap("emit")
+
+    for (src_idx, _src_path), entry in zip(pngs, results):
+        final_idx = entry["final_idx"]
+        rel_key = entry["src_file"]
+        for step, seconds in entry.pop("timings").items():
+            item_timings[step].append(seconds)
+        method = entry.pop("method")
+        if method:
+            methods[method] += 1
+            if settings.optimize_pngs:
+                to_optimize.append((entry, OUT_ASSETS_DIR / f"{final_idx}.png"))
+            if method in ("copy", "copy_file_range"):
+                bytes_copied += entry["size"]
+        copied += entry.pop("copied")
+        written += entry.pop("written")
+        manifest_items[rel_key] = entry
+        attrs_all = entry["attributes"]
 
         # Keep per-item variants for the audit log only
         variant_vals = [
@@ -712,34 +1326,68 @@ def main() -> None:
         if variant_vals:
             variants_by_index[str(final_idx)] = variant_vals
 
-        # Strip Variant from the metadata JSONs (0..N-1.json)
-        attrs_meta = attrs_all if INCLUDE_VARIANTS_IN_METADATA else [
-            a for a in attrs_all if a.get("trait_type") != "Variant"
-        ]
-
-        meta = make_item_json(final_idx, src_path, rel_path)
-        meta["attributes"] = attrs_meta
-        out_json.write_text(json.dumps(meta, indent=2), encoding="utf-8")
-
         # Audit counts should still include Variant
         for a in attrs_all:
             tt = a.get("trait_type", "")
             vv = a.get("value", "")
             trait_counts[tt] += 1
             if vv:
-                values_by_trait[tt].add(vv)
+                value_refs[tt][vv] += 1
+
+        attrs_meta = attrs_all if INCLUDE_VARIANTS_IN_METADATA else [
+            a for a in attrs_all if a.get("trait_type") != "Variant"
+        ]
+        # Per-file state lets update_audit.py re-read only the JSONs edited after the build.
+        # It holds what was counted above (Variant included), so removing the item uncounts it all.
+        json_name = f"{final_idx}.json"
+        json_stat = entry["outputs"][json_name]
+        audit_files[json_name] = {"size": json_stat[0], "mtime_ns": json_stat[1], "attributes": attrs_all}
 
-        for t in unknown_tokens:
+        for t in entry["unknown_tokens"]:
             unknown_counter[t] += 1
 
+        meta_items.append((final_idx, attrs_meta))
+
         index_map.append(
-            {"final_idx": final_idx, "src_idx": src_idx, "variants_by_index": variants_by_index, "src_file": str(rel_path).replace("\\", "/")}
+            {"final_idx": final_idx, "src_idx": src_idx, "variants": variant_vals, "src_file": rel_key}
         )
 
-    (OUT_ASSETS_DIR / "collection.json").write_text(
-        json.dumps(make_collection_json(), indent=2),
-        encoding="utf-8",
-    )
+    timer.lap("merge")
+
+    optimize_stats = None
+    if settings.optimize_pngs:
+        optimize_stats = optimize_outputs(to_optimize, settings, jobs=args.jobs)
+        timer.lap("optimize")
+
+    thumbnail_stats = None
+    thumbnail_fp = thumbnail_fingerprint(settings)
+    if settings.write_thumbnails:
+        reuse_thumbnails = manifest.get("thumbnails") == thumbnail_fp
+        thumbnail_stats = write_thumbnails(list(manifest_items.values()), prev_items, reuse_thumbnails, settings, jobs=args.jobs)
+        timer.lap("thumbnails")
+
+    if manifest and CLEAN_OUTPUT_NUMERIC_ASSETS:
+        keep = {name for entry in manifest_items.values() for name in entry["outputs"]}
+        if changed is None:
+            prune_stale_outputs(keep)
+        else:
+            # Watch mode: the manifest already lists every output, no need to list the dir
+            for name in {name for entry in prev_items.values() for name in entry["outputs"]} - keep:
+                (OUT_ASSETS_DIR / name).unlink(missing_ok=True)
+        timer.lap("prune")
+
+    # Cached encodes and tiers for sources or settings the manifest no longer references. Watch
+    # mode only checks the ones the previous manifest referenced instead of listing the cache.
+    cache_pruned = 0
+    for sub, fp, prev_fp, suffix in (("png", optimize_fp, manifest.get("optimize"), ".png"),
+                                     ("thumbs", thumbnail_fp, manifest.get("thumbnails"), "")):
+        cache_pruned += prune_build_cache(
+            sub, cache_names(manifest_items.values(), fp, suffix),
+            None if changed is None else cache_names(prev_items.values(), prev_fp, suffix),
+        )
+    timer.lap("cache_prune")
+
+    write_text_if_changed(OUT_ASSETS_DIR / "collection.json", json.dumps(make_collection_json(), indent=2))
 
     collection_src = COLLECTION_PNG_SRC
     if collection_src is None:
@@ -748,33 +1396,186 @@ def main() -> None:
             collection_src = candidate
 
     if collection_src and collection_src.exists():
-        shutil.copy2(collection_src, OUT_ASSETS_DIR / "collection.png")
+        out_collection_png = OUT_ASSETS_DIR / "collection.png"
+        if _stat_key(out_collection_png) != _stat_key(collection_src):
+            shutil.copy2(collection_src, out_collection_png)
+    timer.lap("collection")
 
     if WRITE_INDEX_MAP:
-        (OUT_ASSETS_DIR / "index_map.json").write_text(
-            json.dumps(index_map, indent=2),
-            encoding="utf-8",
-        )
+        write_text_if_changed(OUT_ASSETS_DIR / "index_map.json", json.dumps(index_map, indent=2))
+    if WRITE_VARIANTS_SIDECAR:
+        write_text_if_changed(OUT_ASSETS_DIR / "_variants_by_index.json", json.dumps(variants_by_index, indent=2))
+    timer.lap("index_map")
 
     if WRITE_TRAIT_AUDIT:
         audit = {
             "items_written": len(pngs),
             "index_mode": INDEX_MODE,
             "trait_types_seen": dict(trait_counts),
-            "unique_values_by_trait": {k: sorted(list(v)) for k, v in values_by_trait.items()},
+            "unique_values_by_trait": {k: sorted(v) for k, v in value_refs.items()},
             "unknown_token_counts": dict(unknown_counter.most_common(200)),
             "notes": [
                 "If important tokens show up under unknown_token_counts, add them to TYPE_ALIASES / ACCESSORY_ALIASES / MOTIF_ALIASES / COLOR_ALIASES.",
                 "Background is parsed from bg-* patterns only (bg-cream, bg-white, bg-red, etc.).",
             ],
+            "value_ref_counts": {k: dict(sorted(v.items())) for k, v in sorted(value_refs.items())},
+        }
+        audit_text = json.dumps(audit, indent=2)
+        write_text_if_changed(OUT_ASSETS_DIR / "_trait_audit.json", audit_text)
+        # File stats change from build to build, so they live in a hidden sidecar, not the artifact
+        write_text_if_changed(OUT_ASSETS_DIR / AUDIT_STATE_NAME, audit_state_text(audit_text, audit_files))
+        timer.lap("audit_write")
+
+    if WRITE_RARITY:
+        import rarity  # needs NumPy, so only imported when enabled
+
+        write_text_if_changed(OUT_ASSETS_DIR / "rarity.json", json.dumps(rarity.compute_rarity(meta_items), indent=2))
+        timer.lap("rarity")
+
+    if WRITE_SNAPSHOT:
+        import snapshot
+
+        snapshot.write_snapshot(meta_items, OUT_ASSETS_DIR / snapshot.SNAPSHOT_NAME)
+        timer.lap("snapshot")
+
+    if INCREMENTAL_BUILD:
+        save_build_manifest({
+            "version": BUILD_MANIFEST_VERSION,
+            "vocab_fingerprint": vocab_fp,
+            "metadata_fingerprint": meta_fp,
+            "materialize": settings.materialize,
+            "optimize": optimize_fp,
+            "thumbnails": thumbnail_fp,
+            "items": manifest_items,
+        })
+        timer.lap("manifest")
+
+    if parse_cache is not None:
+        parse_cache.save()
+        timer.lap("parse_cache")
+
+    print(f"Done. Wrote {len(pngs)} items to {OUT_ASSETS_DIR} ({copied} PNGs {'copied' if settings.materialize == 'copy' else 'materialized'}, {written} JSONs written)")
+    if optimize_stats:
+        print(f"Optimized {optimize_stats['optimized']} PNGs ({optimize_stats['cache_hits']} from cache): "
+              f"{optimize_stats['bytes_in']} -> {optimize_stats['bytes_out']} bytes")
+    if thumbnail_stats:
+        print(f"Thumbnails: {thumbnail_stats['items_updated']} items updated ({thumbnail_stats['rendered']} rendered) "
+              f"in {OUT_ASSETS_DIR / THUMBNAIL_DIR}")
+
+    total = time.perf_counter() - timer.start
+    emit_s = timer.stages["emit"]
+    return {
+        "items": len(pngs),
+        "pngs_copied": copied,
+        "jsons_written": written,
+        "bytes_copied": bytes_copied,
+        "materialize": {"mode": settings.materialize, "methods": dict(methods)},
+        "optimize": optimize_stats,
+        "thumbnails": thumbnail_stats,
+        "cache_pruned": cache_pruned,
+        "parse_cache": {"hits": parse_hits, "misses": parse_misses, "entries": len(parse_cache.entries)} if parse_cache else None,
+        "incremental": bool(manifest),
+        "jobs": args.jobs,
+        "pool": args.pool,
+        "total_s": round(total, 6),
+        "items_per_s": round(len(pngs) / emit_s, 2) if emit_s > 0 else None,
+        "stages_s": {name: round(v, 6) for name, v in timer.stages.items()},
+        "item_steps_s": {step: round(sum(v), 6) for step, v in item_timings.items()},
+        "item_latency": {step: latency_summary(v) for step, v in item_timings.items()},
+    }
+
+
+def main(args: Optional[argparse.Namespace] = None) -> None:
+    args = args or parse_args([])
+    profiler = None
+    if args.profile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+    if args.tracemalloc:
+        import tracemalloc
+
+        tracemalloc.start()
+
+    if profiler:
+        profiler.enable()
+    try:
+        stats = build(args)
+    finally:
+        if profiler:
+            profiler.disable()
+
+    if profiler:
+        # Only the parent process is profiled; with --pool process the workers' time shows up as waits.
+        profiler.dump_stats(str(OUT_ASSETS_DIR / "_build_profile.prof"))
+        stats["profile_top"] = profile_summary(profiler)
+    if args.tracemalloc:
+        _current, peak = tracemalloc.get_traced_memory()
+        top = tracemalloc.take_snapshot().statistics("lineno")[:15]
+        tracemalloc.stop()
+        stats["tracemalloc"] = {
+            "peak_bytes": peak,
+            "retained_top_sites": [{"site": str(stat.traceback), "bytes": stat.size, "blocks": stat.count} for stat in top],
         }
-        (OUT_ASSETS_DIR / "_trait_audit.json").write_text(
-            json.dumps(audit, indent=2),
-            encoding="utf-8",
-        )
 
-    print(f"Done. Wrote {len(pngs)} items to {OUT_ASSETS_DIR}")
+    if WRITE_BUILD_STATS:
+        (OUT_ASSETS_DIR / BUILD_STATS_NAME).write_text(json.dumps(stats, indent=2), encoding="utf-8")
+    if args.watch:
+        watch(args)
+
+
+def watch(args: argparse.Namespace) -> None:
+    """Rebuild on every debounced burst of source changes until interrupted.
+
+    Only the sources named by the events are re-checked and re-emitted (plus items whose output
+    slot moved, in "renumber" mode); index_map.json, _trait_audit.json, the snapshot and the
+    manifest are rewritten from the merged state as in a normal build. Folder moves and event
+    queue overflows fall back to a full incremental build. A failing rebuild (e.g. a duplicate
+    index while files are being renamed) is reported and the watch goes on.
+    """
+    import fswatch
+
+    args.full = False
+    sources = {p: src_idx for src_idx, p in discover_images()}
+    ignore = [OUT_ASSETS_DIR, build_cache_dir()]
+    with fswatch.open_watcher(SRC_IMAGES_DIR, ignore, polling=args.poll is not None, interval=args.poll or 0.5) as watcher:
+        print(f"Watching {SRC_IMAGES_DIR} ({watcher.kind}); Ctrl+C to stop")
+        # Changes stay pending until a rebuild succeeds, so a failed one can't hide them
+        pending: Set[Path] = set()
+        rescan = False
+        try:
+            for batch in fswatch.debounced(watcher, quiet=args.debounce):
+                t0 = time.perf_counter()
+                pending |= batch.paths
+                rescan = rescan or batch.rescan
+                if batch.rescan:
+                    sources = {p: src_idx for src_idx, p in discover_images()}
+                else:
+                    for p in batch.paths:
+                        src_idx = source_index_of(p.name) if p.is_file() else None
+                        if src_idx is None:
+                            sources.pop(p, None)
+                        else:
+                            sources[p] = src_idx
+                pngs = sorted(((i, p) for p, i in sources.items()), key=lambda t: (t[0], str(t[1]).lower()))
+                try:
+                    stats = build(args, sources=pngs, changed=None if rescan else pending)
+                except (SystemExit, OSError) as e:
+                    # e.g. a duplicate index mid-rename, or a file deleted while it was being copied
+                    print(f"Rebuild failed: {e}")
+                    if isinstance(e, OSError):
+                        rescan = True
+                        sources = {p: src_idx for src_idx, p in discover_images()}
+                    continue
+                pending = set()
+                rescan = False
+                if WRITE_BUILD_STATS:
+                    (OUT_ASSETS_DIR / BUILD_STATS_NAME).write_text(json.dumps(stats, indent=2), encoding="utf-8")
+                what = "rescan" if batch.rescan else f"{len(batch.paths)} changed source(s)"
+                print(f"Rebuilt after {what} in {time.perf_counter() - t0:.2f}s")
+        except KeyboardInterrupt:
+            print("Stopped watching")
 
 
 if __name__ == "__main__":
-    main()
+    main(parse_args())
@@ -1,90 +1,101 @@
-"""Deep type-mismatch check: find all items where Strain suggests a different Type."""
-import json, os
-
-base = r'd:\00_2026_Files\sol-sprites\solsprites_backup\source_files\assets\images\candy_machine\assets'
-src = r'd:\00_2026_Files\sol-sprites\solsprites_backup\source_files\assets\images'
-
-CANNABIS_STRAINS = {
-    "Pink Kush", "Kush", "Indica", "Sativa", "Gorilla Glue",
-    "Girl Scout Cookies", "Death Star", "Green Md", "White Md"
-}
-MUSHROOM_STRAINS = {
-    "Golden Teacher", "Psilocyben Cubensis", "Sacred Mexica", "Wavy Caps",
-    "Shaggy Mane", "Liberty Cap", "Teonanacatl", "Agaric", "Bohemica",
-    "Cyanscens", "Cubensis", "Psilocyben", "Psilocybin", "Reshi",
-    "Flying Saucer", "Z Strain", "Knobby Tops", "Philosophers Stone",
-    "Shaggy Mane", "Inky Cap", "Ink"
-}
-PLANT_STRAINS = {
-    "Khat Plant", "Cocoa Plant", "Poppy Plant", "Willow Tree",
-    "San Pedro", "Kratom", "Borneo", "Dmt", "Ayahuasca Plant"
-}
-
-type_issues = []
-for idx in range(333):
-    p = os.path.join(base, f'{idx}.json')
-    if not os.path.exists(p):
-        continue
-    d = json.load(open(p))
-    attrs = d.get('attributes', [])
-    
-    type_val = None
-    strains = []
-    for a in attrs:
-        if a['trait_type'] == 'Type':
-            type_val = a['value']
-        if a['trait_type'] == 'Strain':
-            strains.append(a['value'])
-    
-    for strain in strains:
-        expected_type = None
-        if strain in CANNABIS_STRAINS:
-            expected_type = "Cannabis"
-        elif strain in MUSHROOM_STRAINS:
-            expected_type = "Mushroom"
-        elif strain in PLANT_STRAINS:
-            expected_type = "Plant"
-        
-        if expected_type and type_val != expected_type:
-            # Find source filename
-            src_name = "?"
-            for f in os.listdir(src):
-                if f.startswith(f"{idx}_") and f.endswith(".png"):
-                    src_name = f
-                    break
-            type_issues.append((idx, type_val, expected_type, strain, src_name))
-
-if type_issues:
-    print(f"Found {len(type_issues)} potential Type mismatches:")
-    for idx, actual, expected, strain, src_name in type_issues:
-        print(f"  {idx}.json / {idx}.png: Type='{actual}' but Strain='{strain}' suggests Type='{expected}'")
-        print(f"    source: {src_name}")
-else:
-    print("No Type/Strain mismatches found.")
-
-# Also check for duplicate strains
-print("\nDuplicate Strain check:")
-for idx in range(333):
-    p = os.path.join(base, f'{idx}.json')
-    if not os.path.exists(p):
-        continue
-    d = json.load(open(p))
-    strains = [a['value'] for a in d.get('attributes', []) if a['trait_type'] == 'Strain']
-    if len(strains) > 1:
-        # Check if any strain is a substring/component of another
-        compound = None
-        parts = []
-        for s in strains:
-            if ' ' in s:
-                compound = s
-            else:
-                parts.append(s)
-        if compound and parts:
-            compound_words = set(compound.lower().split())
-            part_words = set(p.lower() for p in parts)
-            if part_words.issubset(compound_words):
-                print(f"  {idx}.json: REDUNDANT strains {strains} — '{compound}' already contains {parts}")
-            else:
-                print(f"  {idx}.json: Multiple strains {strains}")
+"""Deep type-mismatch check: find all items where Strain suggests a different Type.
+
+Usage: python check_deep.py [assets_dir] [--source DIR]   (also: python cli.py check-deep ...)
+Exits 1 when a Type/Strain mismatch is found.
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+from trait_vocab import load_vocab
+
+ASSETS_DIR = Path(r'd:\00_2026_Files\sol-sprites\solsprites_backup\source_files\assets\images\candy_machine\assets')
+SOURCE_IMAGES_DIR = Path(r'd:\00_2026_Files\sol-sprites\solsprites_backup\source_files\assets\images')
+
+
+def item_attributes(assets_dir):
+    """Yield (idx, attributes) for every N.json in assets_dir, in index order."""
+    indices = sorted(int(name[:-5]) for name in os.listdir(assets_dir) if name.endswith('.json') and name[:-5].isdigit())
+    for idx in indices:
+        with open(os.path.join(assets_dir, f'{idx}.json'), encoding='utf-8') as f:
+            yield idx, json.load(f).get('attributes', [])
+
+
+def find_type_mismatches(assets_dir, strain_types=None):
+    """[(idx, actual Type, expected Type, strain)] for Strains that imply a different Type."""
+    # Strain -> implied Type: the builder's forced strains plus the check-only strain_type_hints
+    strain_types = strain_types or load_vocab().strain_types(hints=True)
+    type_issues = []
+    for idx, attrs in item_attributes(assets_dir):
+        type_val = None
+        strains = []
+        for a in attrs:
+            if a['trait_type'] == 'Type':
+                type_val = a['value']
+            if a['trait_type'] == 'Strain':
+                strains.append(a['value'])
+
+        for strain in strains:
+            expected_type = strain_types.get(strain)
+            if expected_type and type_val != expected_type:
+                type_issues.append((idx, type_val, expected_type, strain))
+    return type_issues
+
+
+def find_multiple_strains(assets_dir):
+    """[(idx, strains, redundant compound or None, parts)] for items with more than one Strain."""
+    found = []
+    for idx, attrs in item_attributes(assets_dir):
+        strains = [a['value'] for a in attrs if a['trait_type'] == 'Strain']
+        if len(strains) > 1:
+            # Check if any strain is a substring/component of another
+            compound = None
+            parts = []
+            for s in strains:
+                if ' ' in s:
+                    compound = s
+                else:
+                    parts.append(s)
+            redundant = None
+            if compound and parts:
+                compound_words = set(compound.lower().split())
+                part_words = set(p.lower() for p in parts)
+                if part_words.issubset(compound_words):
+                    redundant = compound
+            found.append((idx, strains, redundant, parts))
+    return found
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Find items whose Strain implies a different Type, and items with several Strains.")
+    parser.add_argument("assets_dir", nargs="?", type=Path, default=ASSETS_DIR, help="collection to check (default: ASSETS_DIR)")
+    parser.add_argument("--source", type=Path, default=SOURCE_IMAGES_DIR, metavar="DIR", help="source images, to name the source of each mismatch (default: SOURCE_IMAGES_DIR)")
+    args = parser.parse_args(argv)
+
+    type_issues = find_type_mismatches(args.assets_dir)
+    if type_issues:
+        # Only needed to name sources, and it pulls in build_assets
+        from source_index import load_source_index
+
+        source_index = load_source_index(args.source)
+        print(f"Found {len(type_issues)} potential Type mismatches:")
+        for idx, actual, expected, strain in type_issues:
+            print(f"  {idx}.json / {idx}.png: Type='{actual}' but Strain='{strain}' suggests Type='{expected}'")
+            print(f"    source: {source_index.rel_path(idx) or '?'}")
+    else:
+        print("No Type/Strain mismatches found.")
+
+    # Also check for duplicate strains
+    print("\nDuplicate Strain check:")
+    for idx, strains, redundant, parts in find_multiple_strains(args.assets_dir):
+        if redundant:
+            print(f"  {idx}.json: REDUNDANT strains {strains} — '{redundant}' already contains {parts}")
         else:
             print(f"  {idx}.json: Multiple strains {strains}")
+    return 1 if type_issues else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,22 +1,51 @@
-import json, os
-base = r'd:\00_2026_Files\sol-sprites\solsprites_backup\source_files\assets\images\candy_machine\assets'
-src = r'd:\00_2026_Files\sol-sprites\solsprites_backup\source_files\assets\images'
-
-for idx in [127, 133, 134, 167, 289, 296, 322]:
-    p = os.path.join(base, f'{idx}.json')
-    d = json.load(open(p))
-    attrs = [(a['trait_type'], a['value']) for a in d['attributes']]
-    print(f"{idx}.json => {attrs}")
-
-    # Find source PNG name
-    for f in os.listdir(src):
-        if f.startswith(f"{idx}_") and f.endswith(".png"):
-            print(f"  source: {f}")
-            break
-    else:
-        # Check subdirs
-        for root, dirs, files in os.walk(src):
-            for f in files:
-                if f.startswith(f"{idx}_") and f.endswith(".png"):
-                    print(f"  source: {os.path.relpath(os.path.join(root, f), src)}")
-                    break
+"""Print the attributes and source file of selected items.
+
+Usage: python check_types.py [assets_dir] [--index N ...] [--source DIR]   (also: python cli.py check-types ...)
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+ASSETS_DIR = Path(r'd:\00_2026_Files\sol-sprites\solsprites_backup\source_files\assets\images\candy_machine\assets')
+SOURCE_IMAGES_DIR = Path(r'd:\00_2026_Files\sol-sprites\solsprites_backup\source_files\assets\images')
+DEFAULT_INDICES = [127, 133, 134, 167, 289, 296, 322]
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Print the attributes and source file of selected items.")
+    parser.add_argument("assets_dir", nargs="?", type=Path, default=ASSETS_DIR, help="collection to read (default: ASSETS_DIR)")
+    parser.add_argument("--index", "-i", type=int, action="append", dest="indices", metavar="N", help=f"item to print; repeatable (default: {DEFAULT_INDICES})")
+    parser.add_argument("--source", type=Path, default=SOURCE_IMAGES_DIR, metavar="DIR", help="source images (default: SOURCE_IMAGES_DIR)")
+    parser.add_argument("--no-source", action="store_true", help="skip the source lookup (it loads build_assets)")
+    args = parser.parse_args(argv)
+
+    source_index = None
+    if not args.no_source:
+        from source_index import load_source_index
+
+        source_index = load_source_index(args.source)
+
+    status = 0
+    for idx in args.indices or DEFAULT_INDICES:
+        p = os.path.join(args.assets_dir, f'{idx}.json')
+        try:
+            with open(p, encoding='utf-8') as f:
+                d = json.load(f)
+        except OSError as e:
+            print(f"{idx}.json => unreadable ({e.strerror})")
+            status = 1
+            continue
+        attrs = [(a['trait_type'], a['value']) for a in d['attributes']]
+        print(f"{idx}.json => {attrs}")
+
+        # Find source PNG name
+        src_name = source_index.rel_path(idx) if source_index else None
+        if src_name:
+            print(f"  source: {src_name}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""
+One entry point for the collection checks and the upload stage:
+
+    python cli.py audit candy_machine/assets -j 8 --source ../images
+    python cli.py check-deep candy_machine/assets
+    python cli.py check-types candy_machine/assets -i 127 -i 133 --no-source
+    python cli.py update-audit candy_machine/assets
+    python cli.py upload candy_machine/assets --url http://127.0.0.1:8765/assets
+
+Each command is the main() of its own script (which still runs on its own) and is imported
+only when it runs, so a quick check never loads the audit's image passes (Pillow/NumPy) or
+build_assets. `python cli.py <command> --help` lists a command's options. The exit status is
+the command's: non-zero when the audit logged ERRORs, check-deep found a mismatch or
+some files failed to upload.
+"""
+
+import importlib
+import sys
+
+# command -> (module with main(argv, prog), summary)
+COMMANDS = {
+    "audit": ("audit_nfts", "multi-pass audit of a built collection (pairing, JSON, attributes, PNGs, backup, near-duplicates)"),
+    "check-deep": ("check_deep", "items whose Strain implies a different Type, and items with several Strains"),
+    "check-types": ("check_types", "print the attributes and source file of selected items"),
+    "update-audit": ("update_audit", "bring _trait_audit.json up to date with the N.json files"),
+    "upload": ("upload_assets", "upload the built collection to a storage backend (resumable, only changed files)"),
+    "upload-standin": ("upload_standin", "serve a local stand-in for the upload backends"),
+}
+PROG = "cli.py"
+
+
+def usage() -> str:
+    width = max(map(len, COMMANDS))
+    lines = [f"usage: {PROG} <command> [args]", "", "commands:"]
+    lines += [f"  {name:<{width}}  {summary}" for name, (_module, summary) in COMMANDS.items()]
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage(), file=sys.stdout if argv else sys.stderr)
+        return 0 if argv else 2
+    name, rest = argv[0], argv[1:]
+    if name not in COMMANDS:
+        print(f"{PROG}: unknown command {name!r}\n\n{usage()}", file=sys.stderr)
+        return 2
+    module = importlib.import_module(COMMANDS[name][0])
+    return module.main(rest, prog=f"{PROG} {name}") or 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
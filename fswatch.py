@@ -0,0 +1,246 @@
+"""
+Filesystem change notification for build_assets.py --watch.
+
+InotifyWatcher talks to Linux inotify through ctypes (no extra dependency); PollingWatcher
+re-stats the tree on an interval and works everywhere. open_watcher() picks inotify when it is
+available. Both report the PNG paths that were created, written, touched, moved or deleted
+under the root (skipping `ignore` folders such as the output dir, which usually sits inside the
+source dir), or `rescan=True` when they can't say exactly what changed: a folder was moved or
+removed, or the kernel's event queue overflowed. debounced() merges bursts into one batch.
+
+    with open_watcher(Path("../images"), ignore=[Path("candy_machine")]) as watcher:
+        for batch in debounced(watcher, quiet=0.25):
+            print(batch.paths, batch.rescan)
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+WATCH_SUFFIX = ".png"
+
+
+class Batch(NamedTuple):
+    paths: Set[Path]
+    rescan: bool = False
+
+    def merge(self, other: "Batch") -> "Batch":
+        return Batch(self.paths | other.paths, self.rescan or other.rescan)
+
+
+def _ignored(path: str, ignore: Tuple[str, ...]) -> bool:
+    return any(path == p or path.startswith(p + os.sep) for p in ignore)
+
+
+# ---- inotify ----
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+EVENT = struct.Struct("iIII")  # wd, mask, cookie, len; followed by a NUL-padded name
+
+
+def _libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class InotifyWatcher:
+    kind = "inotify"
+
+    def __init__(self, root: Path, ignore: Iterable[Path] = ()) -> None:
+        self.libc = _libc()
+        if self.libc is None:
+            raise OSError("inotify is not available")
+        self.root = str(root)
+        self.ignore = tuple(os.path.abspath(p) for p in ignore)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            e = ctypes.get_errno()
+            raise OSError(e, os.strerror(e))
+        self.dirs: Dict[int, str] = {}
+        self._watch_tree(self.root)
+
+    def _add_watch(self, path: str) -> None:
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            e = ctypes.get_errno()
+            raise OSError(e, f"inotify_add_watch {path}: {os.strerror(e)} (raise fs.inotify.max_user_watches or use --poll)")
+        self.dirs[wd] = path
+
+    def _watch_tree(self, top: str) -> List[str]:
+        """Watch `top` and every folder below it; returns the PNGs already inside."""
+        pngs = []
+        for dirpath, dirnames, filenames in os.walk(top):
+            dirnames[:] = [d for d in dirnames if not _ignored(os.path.abspath(os.path.join(dirpath, d)), self.ignore)]
+            self._add_watch(dirpath)
+            pngs.extend(os.path.join(dirpath, f) for f in filenames if f.endswith(WATCH_SUFFIX))
+        return pngs
+
+    def fileno(self) -> int:
+        return self.fd
+
+    def poll(self, timeout: Optional[float] = None) -> Optional[Batch]:
+        """Wait up to `timeout` seconds (None: forever) for changes; None if there were none."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return None
+        try:
+            data = os.read(self.fd, 1 << 16)
+        except BlockingIOError:
+            return None
+
+        paths: Set[Path] = set()
+        rescan = False
+        pos = 0
+        while pos + EVENT.size <= len(data):
+            wd, mask, _cookie, length = EVENT.unpack_from(data, pos)
+            name = os.fsdecode(data[pos + EVENT.size:pos + EVENT.size + length].rstrip(b"\0"))
+            pos += EVENT.size + length
+            if mask & IN_Q_OVERFLOW:
+                rescan = True
+                continue
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            parent = self.dirs.get(wd)
+            if parent is None:
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                # Reported for the folder itself; the parent's MOVED_FROM/DELETE already asks for a rescan
+                continue
+            path = os.path.join(parent, name)
+            if mask & IN_ISDIR:
+                if _ignored(os.path.abspath(path), self.ignore):
+                    continue
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # Files moved in with the folder raise no events of their own
+                    paths.update(Path(p) for p in self._watch_tree(path))
+                # Every source below a moved/removed folder changed path; let the caller rediscover
+                rescan = rescan or bool(mask & (IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE))
+            elif name.endswith(WATCH_SUFFIX):
+                paths.add(Path(path))
+        return Batch(paths, rescan) if paths or rescan else None
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+    def __enter__(self) -> "InotifyWatcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# ---- polling ----
+class PollingWatcher:
+    kind = "polling"
+
+    def __init__(self, root: Path, ignore: Iterable[Path] = (), interval: float = 0.5) -> None:
+        self.root = str(root)
+        self.ignore = tuple(os.path.abspath(p) for p in ignore)
+        self.interval = interval
+        self.files, self.dirs = self._scan()
+
+    def _scan(self) -> Tuple[Dict[str, Tuple[int, int]], Set[str]]:
+        files: Dict[str, Tuple[int, int]] = {}
+        dirs: Set[str] = set()
+        stack = [self.root]
+        while stack:
+            top = stack.pop()
+            dirs.add(top)
+            try:
+                it = os.scandir(top)
+            except OSError:
+                continue
+            with it:
+                for e in it:
+                    try:
+                        if e.is_dir(follow_symlinks=False):
+                            if not _ignored(os.path.abspath(e.path), self.ignore):
+                                stack.append(e.path)
+                        elif e.name.endswith(WATCH_SUFFIX):
+                            st = e.stat()
+                            files[e.path] = (st.st_size, st.st_mtime_ns)
+                    except OSError:
+                        continue
+        return files, dirs
+
+    def poll(self, timeout: Optional[float] = None) -> Optional[Batch]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            files, dirs = self._scan()
+            paths = {Path(p) for p in files.keys() ^ self.files.keys()}
+            paths.update(Path(p) for p, key in files.items() if p in self.files and self.files[p] != key)
+            # A moved folder shows up as its files disappearing and reappearing elsewhere
+            rescan = bool(self.dirs - dirs)
+            self.files, self.dirs = files, dirs
+            if paths or rescan:
+                return Batch(paths, rescan)
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            wait = self.interval if deadline is None else min(self.interval, max(0.0, deadline - time.monotonic()))
+            time.sleep(wait)
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "PollingWatcher":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def open_watcher(root: Path, ignore: Iterable[Path] = (), polling: bool = False, interval: float = 0.5):
+    """inotify on Linux unless `polling`; falls back to polling when inotify can't be set up."""
+    ignore = list(ignore)
+    if not polling:
+        try:
+            return InotifyWatcher(root, ignore)
+        except OSError as e:
+            print(f"inotify unavailable ({e}); polling every {interval}s")
+    return PollingWatcher(root, ignore, interval)
+
+
+def debounced(watcher, quiet: float = 0.25, max_wait: float = 2.0) -> Iterator[Batch]:
+    """Yield one Batch per burst: after the first change, keep collecting until nothing has
+    changed for `quiet` seconds (or `max_wait` seconds have passed since the burst started)."""
+    while True:
+        batch = watcher.poll(None)
+        if batch is None:
+            continue
+        start = time.monotonic()
+        while True:
+            remaining = max_wait - (time.monotonic() - start)
+            if remaining <= 0:
+                break
+            more = watcher.poll(min(quiet, remaining))
+            if more is None:
+                break
+            batch = batch.merge(more)
+        yield batch
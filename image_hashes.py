@@ -0,0 +1,168 @@
+"""
+Perceptual image hashes and a multi-index Hamming table for near-duplicate lookup.
+Used by pass 6 of audit_nfts.py. Needs Pillow + NumPy (pip install pillow numpy).
+
+pHash and dHash only see luminance, so a recolored sprite hashes like the original; the
+colour grid (mean RGB per cell) is what tells recolors apart.
+"""
+
+import hashlib
+
+import numpy as np
+from PIL import Image
+
+HASH_SIZE = 8  # 8x8 => 64-bit hashes
+COLOR_GRID = 4  # 4x4 cells of mean RGB => 48-byte colour signature
+
+
+def _flatten(img):
+    """An RGBA image composited onto black (sprites have transparent edges)."""
+    flat = Image.new("RGBA", img.size, (0, 0, 0, 255))
+    flat.alpha_composite(img)
+    return flat
+
+
+def _grayscale(path, size):
+    """Load an image flattened onto black, grayscale, resized."""
+    with Image.open(path) as img:
+        return _small_gray(_flatten(img.convert("RGBA")), size)
+
+
+def _small_gray(flat, size):
+    return np.asarray(flat.convert("L").resize(size, Image.Resampling.LANCZOS), dtype=np.float32)
+
+
+def _bits_to_int(bits):
+    value = 0
+    for b in bits.ravel():
+        value = (value << 1) | int(b)
+    return value
+
+
+def dhash(path, hash_size=HASH_SIZE):
+    """Difference hash: is each pixel brighter than its right-hand neighbour."""
+    return _dhash_bits(_grayscale(path, (hash_size + 1, hash_size)))
+
+
+def _dhash_bits(pixels):
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+_DCT_CACHE = {}
+
+
+def _dct_matrix(n):
+    if n not in _DCT_CACHE:
+        k = np.arange(n)[:, None]
+        x = np.arange(n)[None, :]
+        m = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+        m[0] /= np.sqrt(2.0)
+        _DCT_CACHE[n] = m
+    return _DCT_CACHE[n]
+
+
+def phash(path, hash_size=HASH_SIZE, highfreq_factor=4):
+    """DCT hash: low-frequency coefficients compared to their median."""
+    n = hash_size * highfreq_factor
+    return _phash_bits(_grayscale(path, (n, n)), hash_size)
+
+
+def _phash_bits(pixels, hash_size):
+    m = _dct_matrix(pixels.shape[0])
+    low = (m @ pixels @ m.T)[:hash_size, :hash_size]
+    return _bits_to_int(low > np.median(low.ravel()[1:]))
+
+
+def image_signature(path, hash_size=HASH_SIZE, highfreq_factor=4, grid=COLOR_GRID):
+    """(pHash << 64 | dHash, colour grid, RGBA pixel digest) of one image, decoding it once.
+
+    The colour grid is the mean RGB of each cell of a grid x grid split of the flattened
+    image, as bytes; the digest is over the exact RGBA pixels and size.
+    """
+    with Image.open(path) as img:
+        rgba = img.convert("RGBA")
+    flat = _flatten(rgba)
+    n = hash_size * highfreq_factor
+    shape_hash = (_phash_bits(_small_gray(flat, (n, n)), hash_size) << (hash_size * hash_size)) | _dhash_bits(
+        _small_gray(flat, (hash_size + 1, hash_size)))
+    colors = flat.convert("RGB").resize((grid, grid), Image.Resampling.BOX).tobytes()
+    digest = hashlib.blake2b(b"%dx%d:" % rgba.size, digest_size=16)
+    digest.update(rgba.tobytes())
+    return shape_hash, colors, digest.hexdigest()
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def color_distance(a, b):
+    """Largest per-cell, per-channel difference between two colour grids (0-255)."""
+    return max((abs(x - y) for x, y in zip(a, b)), default=0)
+
+
+class MultiIndexHash:
+    """Multi-index Hamming lookup over fixed-width integer hashes.
+
+    Each hash is cut into radius + 1 disjoint bit slices, each with its own exact-match
+    table. By pigeonhole, any stored hash within `radius` of a query agrees with it on at
+    least one whole slice, so only the bucket-mates of the query's slices need a real
+    distance check instead of every stored hash.
+    """
+
+    def __init__(self, bits, radius):
+        self.radius = radius
+        count = min(radius + 1, bits)
+        edges = [bits * i // count for i in range(count + 1)]
+        self.slices = [(lo, (1 << (hi - lo)) - 1) for lo, hi in zip(edges, edges[1:])]
+        self.tables = [{} for _ in self.slices]
+        self.values = {}
+
+    def add(self, value, key):
+        self.values[key] = value
+        for (shift, mask), table in zip(self.slices, self.tables):
+            table.setdefault((value >> shift) & mask, []).append(key)
+
+    def query(self, value):
+        """Return [(distance, key)] for every stored hash within `radius` of `value`."""
+        seen = set()
+        found = []
+        for (shift, mask), table in zip(self.slices, self.tables):
+            for key in table.get((value >> shift) & mask, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                d = hamming(value, self.values[key])
+                if d <= self.radius:
+                    found.append((d, key))
+        return found
+
+
+def identical_groups(digests):
+    """Keys sharing an exact pixel digest: [keys] per group of two or more, in first-seen order.
+
+    `digests` is an ordered {key: digest}. Every pair within a group is at distance 0.
+    """
+    groups = {}
+    for key, digest in digests.items():
+        groups.setdefault(digest, []).append(key)
+    return [keys for keys in groups.values() if len(keys) > 1]
+
+
+def near_duplicate_pairs(signatures, radius, color_tolerance, bits=2 * HASH_SIZE * HASH_SIZE):
+    """Pairs of keys within `radius` hash bits and `color_tolerance` of each other's colours.
+
+    `signatures` is an ordered {key: (hash, colour grid)}. Returns (key_a, key_b, distance,
+    colour_distance) for each pair, with key_a seen first; every pair is checked on its own,
+    so two items are never linked through a third.
+    """
+    index = MultiIndexHash(bits, radius)
+    order = {key: i for i, key in enumerate(signatures)}
+    pairs = []
+    for key, (value, colors) in signatures.items():
+        for d, other in index.query(value):
+            cd = color_distance(signatures[other][1], colors)
+            if cd <= color_tolerance:
+                pairs.append((other, key, d, cd))
+        index.add(value, key)
+    pairs.sort(key=lambda p: (order[p[0]], order[p[1]]))
+    return pairs
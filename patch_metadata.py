@@ -0,0 +1,246 @@
+"""
+Declarative batch patcher for SolSprites NFT metadata JSON files.
+Supersedes fix_metadata.py: the fixes live in a rules file (see metadata_fixes.json) and are
+applied in one pass over the collection. Changed files are staged as temp files and only
+renamed into place once every one of them has been written, unchanged files are never
+rewritten, and _trait_audit.json is updated from the per-item deltas. An existing
+_collection_snapshot.bin is rewritten from the patched attributes (after the JSONs, so its
+fingerprint of them is current) so it stays in step.
+
+Rules file:
+  {"rules": [
+    {"match": {"index": [102, 121]}, "keep": {"Strain": ["Psilocyben Cubensis"]}},
+    {"match": {"attributes": {"Strain": "Pink Kush"}}, "remove": {"Strain": ["Kush"]}},
+    {"match": {"source": "mushrooms/*", "missing": ["Type"]}, "set": {"Type": "Mushroom"}},
+    {"match": {"attributes": {"Type": "Sprite"}}, "set": {"Type": "Plant"}, "replace_all": true}
+  ]}
+
+  match (every key given must hold; an empty match selects every item):
+    index       int or list of ints
+    attributes  {trait_type: value | [values] | "*"}   item has one of the values
+    missing     [trait_type]                           item has no such trait
+    source      fnmatch pattern on the item's src_file from index_map.json
+  actions (applied in this order):
+    keep    {trait_type: [values]}   drop that trait's other values
+    remove  {trait_type: [values] | "*"}
+    set     {trait_type: value}      replace the trait's first value, adding it if absent
+    add     {trait_type: value}      append unless the item already has that value
+  options:
+    replace_all  true                set also drops the trait's other values (default: only the
+                                     first is replaced, as fix_metadata.py always did)
+
+Usage:
+  python patch_metadata.py rules.json [assets_dir] [--dry-run]
+"""
+
+import argparse
+import json
+import os
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import snapshot
+from trait_audit import TraitAudit
+
+ASSETS_DIR = Path("candy_machine/assets")
+
+MATCH_KEYS = ("index", "attributes", "missing", "source")
+ACTION_KEYS = ("keep", "remove", "set", "add")
+
+TMP_SUFFIX = ".patch-tmp"
+
+
+def _as_list(value) -> List:
+    return value if isinstance(value, list) else [value]
+
+
+def load_rules(path: Path) -> List[Dict]:
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    rules = data.get("rules") if isinstance(data, dict) else data
+    if not isinstance(rules, list):
+        raise SystemExit(f"{path}: expected {{\"rules\": [...]}}")
+
+    for n, rule in enumerate(rules):
+        match = rule.get("match", {})
+        unknown = (set(match) - set(MATCH_KEYS)) | (set(rule) - set(ACTION_KEYS) - {"match", "note", "replace_all"})
+        if unknown:
+            raise SystemExit(f"{path}: rule {n} has unknown keys: {', '.join(sorted(unknown))}")
+        if not any(k in rule for k in ACTION_KEYS):
+            raise SystemExit(f"{path}: rule {n} has no action ({', '.join(ACTION_KEYS)})")
+        if "index" in match:
+            match["index"] = {int(i) for i in _as_list(match["index"])}
+    return rules
+
+
+def rule_matches(match: Dict, idx: int, attrs: List[Dict[str, str]], src_file: str) -> bool:
+    if "index" in match and idx not in match["index"]:
+        return False
+    if "source" in match and not fnmatch(src_file.lower(), match["source"].lower()):
+        return False
+    have = {}
+    for a in attrs:
+        have.setdefault(a["trait_type"], set()).add(a["value"])
+    for tt in match.get("missing", []):
+        if tt in have:
+            return False
+    for tt, wanted in match.get("attributes", {}).items():
+        values = have.get(tt)
+        if not values:
+            return False
+        if wanted != "*" and not values.intersection(_as_list(wanted)):
+            return False
+    return True
+
+
+def apply_actions(rule: Dict, idx: int, attrs: List[Dict[str, str]]) -> Tuple[List[Dict[str, str]], List[str]]:
+    """Return (new attributes, change messages). `attrs` itself is left untouched."""
+    attrs = [dict(a) for a in attrs]
+    messages = []
+
+    for tt, keep in rule.get("keep", {}).items():
+        keep = _as_list(keep)
+        kept = []
+        for a in attrs:
+            if a["trait_type"] == tt and a["value"] not in keep:
+                messages.append(f"  {idx}.json: Removing redundant {tt}='{a['value']}'")
+            else:
+                kept.append(a)
+        attrs = kept
+
+    for tt, values in rule.get("remove", {}).items():
+        kept = []
+        for a in attrs:
+            if a["trait_type"] == tt and (values == "*" or a["value"] in _as_list(values)):
+                messages.append(f"  {idx}.json: Removing {tt}='{a['value']}'")
+            else:
+                kept.append(a)
+        attrs = kept
+
+    for tt, value in rule.get("set", {}).items():
+        first = next((a for a in attrs if a["trait_type"] == tt), None)
+        if first is None:
+            messages.append(f"  {idx}.json: Adding {tt}='{value}'")
+            attrs.append({"trait_type": tt, "value": value})
+            continue
+        if first["value"] != value:
+            messages.append(f"  {idx}.json: {tt} '{first['value']}' -> '{value}'")
+            first["value"] = value
+        if not rule.get("replace_all"):
+            continue
+        extra = [a for a in attrs if a["trait_type"] == tt and a is not first]
+        for a in extra:
+            messages.append(f"  {idx}.json: Removing {tt}='{a['value']}'")
+        attrs = [a for a in attrs if a["trait_type"] != tt or a is first]
+
+    for tt, value in rule.get("add", {}).items():
+        if not any(a["trait_type"] == tt and a["value"] == value for a in attrs):
+            messages.append(f"  {idx}.json: Adding {tt}='{value}'")
+            attrs.append({"trait_type": tt, "value": value})
+
+    return attrs, messages
+
+
+def _source_files(assets_dir: Path) -> Dict[int, str]:
+    from audit_nfts import load_index_map
+
+    rows, _layout = load_index_map(assets_dir)
+    return {row["final_idx"]: row["src_file"] for row in rows or []}
+
+
+def _commit(pending: List[Tuple[Path, str]]) -> None:
+    """Write every file to a temp sibling, then rename them all into place.
+
+    A failure while staging removes the temp files and leaves the collection untouched;
+    each rename is atomic, so no reader ever sees a half-written JSON.
+    """
+    staged: List[Tuple[Path, Path]] = []
+    try:
+        for path, text in pending:
+            tmp = path.with_name(path.name + TMP_SUFFIX)
+            staged.append((tmp, path))  # before writing, so a half-written temp is cleaned up too
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+    except BaseException:
+        for tmp, _path in staged:
+            tmp.unlink(missing_ok=True)
+        raise
+    for tmp, path in staged:
+        os.replace(tmp, path)
+
+
+def patch_collection(rules: List[Dict], assets_dir: Path = ASSETS_DIR, dry_run: bool = False,
+                     update_audit: bool = True) -> List[int]:
+    """Apply `rules` to every N.json in `assets_dir`; returns the indices that changed."""
+    assets_dir = Path(assets_dir)
+    src_files = _source_files(assets_dir) if any("source" in r.get("match", {}) for r in rules) else {}
+
+    audit = TraitAudit.load(assets_dir) if update_audit else None
+    seed: Optional[List[List[Dict[str, str]]]] = [] if audit is not None and audit.value_refs is None else None
+
+    pending: List[Tuple[Path, str]] = []
+    deltas: List[Tuple[Path, List[Dict[str, str]], List[Dict[str, str]], str]] = []
+    changed: List[int] = []
+    items: List[Tuple[int, List[Dict[str, str]]]] = []
+
+    paths = sorted((p for p in assets_dir.glob("*.json") if p.stem.isdigit()), key=lambda p: int(p.stem))
+    for path in paths:
+        idx = int(path.stem)
+        text = path.read_text(encoding="utf-8")
+        data = json.loads(text)
+        old_attrs = data.get("attributes", [])
+        if seed is not None:
+            seed.append(old_attrs)
+
+        attrs = old_attrs
+        for rule in rules:
+            if rule_matches(rule.get("match", {}), idx, attrs, src_files.get(idx, "")):
+                attrs, messages = apply_actions(rule, idx, attrs)
+                for m in messages:
+                    print(m)
+
+        items.append((idx, attrs))
+        if attrs == old_attrs:
+            continue
+        data["attributes"] = attrs
+        new_text = json.dumps(data, indent=2)
+        if new_text == text:
+            continue
+        pending.append((path, new_text))
+        deltas.append((path, old_attrs, attrs, new_text))
+        changed.append(idx)
+
+    if dry_run or not pending:
+        return changed
+
+    _commit(pending)
+    if audit is not None and audit.data:
+        if seed is not None:
+            audit.seed_value_refs(seed)
+        for path, old_attrs, new_attrs, new_text in deltas:
+            audit.update_file(path, old_attrs, new_attrs, new_text.encode("utf-8"))
+        audit.save()
+
+    snapshot_path = assets_dir / snapshot.SNAPSHOT_NAME
+    if snapshot_path.exists():
+        snapshot.write_snapshot(items, snapshot_path)
+    return changed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Apply a metadata rules file to the collection")
+    parser.add_argument("rules", type=Path, help="JSON rules file")
+    parser.add_argument("assets_dir", type=Path, nargs="?", default=ASSETS_DIR)
+    parser.add_argument("--dry-run", action="store_true", help="report changes without writing")
+    parser.add_argument("--no-audit", action="store_true", help="leave _trait_audit.json alone")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    changed = patch_collection(load_rules(args.rules), args.assets_dir, dry_run=args.dry_run,
+                               update_audit=not args.no_audit)
+    verb = "Would fix" if args.dry_run else "Fixed"
+    print(f"\n{verb} {len(changed)} files.")
@@ -0,0 +1,204 @@
+"""
+PNG re-encoder for the build's optional optimize stage (build_assets.OPTIMIZE_PNGS).
+Needs Pillow + NumPy (pip install pillow numpy).
+
+Decodes with Pillow, optionally resizes and/or quantizes, then writes a fresh PNG with only
+IHDR/PLTE/tRNS/IDAT/IEND (plus any ancillary chunks asked for in keep_chunks):
+  - lossless reductions first: opaque RGBA -> RGB, gray RGB -> L, <= 256 colors -> palette
+    with the smallest bit depth that fits (flat-color sprites usually land on 4 or 8 bits)
+  - every filter choice (None/Sub/Up/Average/Paeth for the whole image, plus per-row
+    adaptive min-sum) x zlib strategy (default/filtered) at level 9; the smallest wins
+
+Decoding goes through 8-bit RGBA, so without a resize or quantize step, 16-bit images and
+colour-managed ones (iCCP/gAMA/sRGB/cHRM not listed in keep_chunks) are passed through
+unchanged: re-encoding them would drop precision or change how they render.
+"""
+
+import io
+import os
+import struct
+import zlib
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+COLOR_CHUNKS = ("iCCP", "gAMA", "sRGB", "cHRM")
+ZLIB_STRATEGIES = (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED)
+RESAMPLE = {"lanczos": Image.Resampling.LANCZOS, "nearest": Image.Resampling.NEAREST, "bicubic": Image.Resampling.BICUBIC}
+
+
+def _chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+
+def read_chunks(data):
+    """Yield (type, payload) for each chunk of a PNG byte string."""
+    pos = len(PNG_SIGNATURE)
+    while pos + 8 <= len(data):
+        length, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        yield kind, data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+
+
+def strip_ancillary(data, keep_chunks=()):
+    """The PNG with only critical chunks, tRNS and `keep_chunks` left."""
+    out = [PNG_SIGNATURE]
+    for kind, payload in read_chunks(data):
+        name = kind.decode("latin-1")
+        if name[0].isupper() or name == "tRNS" or name in keep_chunks:
+            out.append(_chunk(kind, payload))
+    return b"".join(out)
+
+
+def must_pass_through(data, keep_chunks=()):
+    """True for PNGs an 8-bit RGBA round trip can't reproduce: 16-bit channels or dropped colour management."""
+    for kind, payload in read_chunks(data):
+        name = kind.decode("latin-1")
+        if name == "IHDR" and len(payload) >= 9 and payload[8] == 16:
+            return True
+        if name in COLOR_CHUNKS and name not in keep_chunks:
+            return True
+    return False
+
+
+def _pack_rows(indices, bit_depth):
+    """Pack an (h, w) uint8 array of small values into PNG rows of `bit_depth` bits per pixel."""
+    if bit_depth == 8:
+        return indices
+    per_byte = 8 // bit_depth
+    h, w = indices.shape
+    padded = np.zeros((h, -(-w // per_byte) * per_byte), dtype=np.uint8)
+    padded[:, :w] = indices
+    groups = padded.reshape(h, -1, per_byte)
+    shifts = np.arange(per_byte - 1, -1, -1, dtype=np.uint8) * bit_depth
+    return np.bitwise_or.reduce(groups << shifts, axis=2).astype(np.uint8)
+
+
+def _filter_candidates(raw, bpp):
+    """Return {name: (h, 1 + stride) uint8 rows with filter-type bytes} for each strategy."""
+    h, stride = raw.shape
+    x = raw.astype(np.int16)
+    left = np.zeros_like(x)
+    left[:, bpp:] = x[:, :-bpp]
+    up = np.zeros_like(x)
+    up[1:] = x[:-1]
+    upleft = np.zeros_like(x)
+    upleft[1:, bpp:] = x[:-1, :-bpp]
+
+    pa = np.abs(up - upleft)
+    pb = np.abs(left - upleft)
+    pc = np.abs(left + up - 2 * upleft)
+    paeth = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, up, upleft))
+
+    filtered = [
+        raw,
+        (x - left).astype(np.uint8),
+        (x - up).astype(np.uint8),
+        (x - ((left + up) >> 1)).astype(np.uint8),
+        (x - paeth).astype(np.uint8),
+    ]
+    candidates = {}
+    for ftype, rows in enumerate(filtered):
+        candidates[ftype] = np.hstack([np.full((h, 1), ftype, dtype=np.uint8), rows])
+
+    # Adaptive: per row, the filter with the smallest sum of absolute signed bytes
+    costs = np.stack([np.abs(f.view(np.int8).astype(np.int32)).sum(axis=1) for f in filtered])
+    best = costs.argmin(axis=0)
+    candidates["adaptive"] = np.stack([candidates[int(f)][r] for r, f in enumerate(best)]) if h else candidates[0]
+    return candidates
+
+
+def _smallest_idat(raw, bpp):
+    best = None
+    for rows in _filter_candidates(raw, bpp).values():
+        stream = rows.tobytes()
+        for strategy in ZLIB_STRATEGIES:
+            co = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+            data = co.compress(stream) + co.flush()
+            if best is None or len(data) < len(best):
+                best = data
+    return best
+
+
+def _reduce(img):
+    """Pick the smallest PNG representation of 8-bit RGBA `img`: (color_type, bit_depth, raw rows, bpp, PLTE, tRNS)."""
+    rgba = np.asarray(img.convert("RGBA"))
+    h, w, _ = rgba.shape
+    opaque = bool((rgba[:, :, 3] == 255).all())
+
+    flat = rgba.reshape(-1, 4)
+    packed = flat.view(np.uint32).ravel()
+    colors, inverse = np.unique(packed, return_inverse=True)
+    if len(colors) <= 256:
+        palette = colors.view(np.uint8).reshape(-1, 4)
+        # Opaque entries last, so tRNS can stop at the last translucent one
+        order = np.argsort(palette[:, 3] == 255, kind="stable")
+        remap = np.empty_like(order)
+        remap[order] = np.arange(len(order))
+        palette = palette[order]
+        indices = remap[inverse].reshape(h, w).astype(np.uint8)
+        bit_depth = next(d for d in (1, 2, 4, 8) if len(palette) <= 1 << d)
+        alphas = palette[:, 3]
+        translucent = int((alphas < 255).sum())
+        trns = alphas[:translucent].tobytes() if translucent else None
+        return 3, bit_depth, _pack_rows(indices, bit_depth), 1, palette[:, :3].tobytes(), trns
+
+    rgb = rgba[:, :, :3]
+    gray = bool((rgb[:, :, 0] == rgb[:, :, 1]).all() and (rgb[:, :, 1] == rgb[:, :, 2]).all())
+    if gray:
+        channels = rgba[:, :, [0]] if opaque else rgba[:, :, [0, 3]]
+        color_type = 0 if opaque else 4
+    else:
+        channels = rgb if opaque else rgba
+        color_type = 2 if opaque else 6
+    bpp = channels.shape[2]
+    return color_type, 8, np.ascontiguousarray(channels).reshape(h, w * bpp), bpp, None, None
+
+
+def optimize_png(data, resize=None, resample="lanczos", quantize=None, keep_chunks=()):
+    """Re-encode PNG bytes; returns the new PNG bytes (`data` itself when it must pass through)."""
+    if not resize and not quantize and must_pass_through(data, keep_chunks):
+        return data
+    kept = [(kind, payload) for kind, payload in read_chunks(data) if kind.decode("latin-1") in keep_chunks]
+
+    with Image.open(io.BytesIO(data)) as img:
+        img.load()
+        img = img.convert("RGBA")
+    if resize and tuple(resize) != img.size:
+        img = img.resize(tuple(resize), RESAMPLE[resample])
+    if quantize:
+        img = img.quantize(colors=quantize, method=Image.Quantize.FASTOCTREE).convert("RGBA")
+
+    color_type, bit_depth, raw, bpp, plte, trns = _reduce(img)
+    out = [PNG_SIGNATURE, _chunk(b"IHDR", struct.pack(">IIBBBBB", img.width, img.height, bit_depth, color_type, 0, 0, 0))]
+    out += [_chunk(kind, payload) for kind, payload in kept]
+    if plte is not None:
+        out.append(_chunk(b"PLTE", plte))
+    if trns is not None:
+        out.append(_chunk(b"tRNS", trns))
+    out.append(_chunk(b"IDAT", _smallest_idat(raw, bpp)))
+    out.append(_chunk(b"IEND", b""))
+    return b"".join(out)
+
+
+def optimize_file(src, dst, settings):
+    """Optimize `src` into `dst` (written atomically); returns (bytes in, bytes out).
+
+    Without a resize or quantize step, the original's own IDAT (minus ancillary chunks) is
+    kept whenever it is already smaller than the re-encode, and images that must pass
+    through are copied as they are.
+    """
+    data = Path(src).read_bytes()
+    out = optimize_png(data, **settings)
+    if out is not data and not settings.get("resize") and not settings.get("quantize"):
+        stripped = strip_ancillary(data, settings.get("keep_chunks", ()))
+        if len(stripped) <= len(out):
+            out = stripped
+    dst = Path(dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(out)
+    os.replace(tmp, dst)
+    return len(data), len(out)
@@ -0,0 +1,121 @@
+"""
+Trait rarity for the SolSprites collection.
+Builds a token x trait-value incidence matrix with NumPy and scores every item three ways:
+  - information_content: -sum(log2 p) over the item's trait values, normalised by the
+    collection's trait entropy (OpenRarity-style; higher = rarer). Used for rank.
+  - statistical_rarity: product of the item's trait value frequencies (lower = rarer).
+  - rarity_score: sum of 1 / frequency over the item's trait values (higher = rarer).
+Trait types an item doesn't have count as the value "None", so missing traits are rare too.
+
+Called by build_assets.py when WRITE_RARITY is on; can also be run on an existing assets dir:
+  python rarity.py candy_machine/assets
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+NONE_VALUE = "None"
+
+
+def incidence_matrix(items: List[Tuple[int, List[Dict[str, str]]]]) -> Tuple[np.ndarray, List[Tuple[str, str]]]:
+    """Return (N x V uint8 matrix, column labels) for [(index, attributes)] items."""
+    trait_types = sorted({a["trait_type"] for _, attrs in items for a in attrs})
+    columns: Dict[Tuple[str, str], int] = {}
+    rows: List[int] = []
+    cols: List[int] = []
+    for row, (_idx, attrs) in enumerate(items):
+        present = set()
+        for a in attrs:
+            key = (a["trait_type"], a["value"])
+            present.add(a["trait_type"])
+            rows.append(row)
+            cols.append(columns.setdefault(key, len(columns)))
+        for tt in trait_types:
+            if tt not in present:
+                rows.append(row)
+                cols.append(columns.setdefault((tt, NONE_VALUE), len(columns)))
+
+    matrix = np.zeros((len(items), len(columns)), dtype=np.uint8)
+    matrix[np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)] = 1
+    labels = [None] * len(columns)
+    for key, col in columns.items():
+        labels[col] = key
+    return matrix, labels
+
+
+def competition_rank(scores: np.ndarray) -> np.ndarray:
+    """1-based "1224" ranking, highest score first; equal scores share a rank."""
+    neg = -np.round(scores, 9)
+    return np.searchsorted(np.sort(neg), neg, side="left") + 1
+
+
+def compute_rarity(items: List[Tuple[int, List[Dict[str, str]]]]) -> Dict:
+    if not items:
+        return {"items": 0, "trait_frequencies": {}, "tokens": []}
+
+    matrix, labels = incidence_matrix(items)
+    n = matrix.shape[0]
+    counts = matrix.sum(axis=0, dtype=np.int64)
+    freq = counts / n
+    log2_freq = np.log2(freq)
+
+    # Per-trait-type entropy, summed: the expected information content of a random item.
+    entropy = float(-(freq * log2_freq).sum())
+
+    matrix_f = matrix.astype(np.float64)
+    information = -(matrix_f @ log2_freq)
+    information_content = information / entropy if entropy > 0 else np.zeros(n)
+    statistical_rarity = np.exp2(-information)
+    rarity_score = matrix_f @ (1.0 / freq)
+    ranks = competition_rank(information_content)
+
+    trait_frequencies: Dict[str, Dict[str, Dict]] = {}
+    for (tt, value), count, f in zip(labels, counts.tolist(), freq.tolist()):
+        trait_frequencies.setdefault(tt, {})[value] = {"count": count, "frequency": round(f, 6)}
+    trait_frequencies = {tt: dict(sorted(vals.items())) for tt, vals in sorted(trait_frequencies.items())}
+
+    tokens = []
+    for row, (idx, _attrs) in enumerate(items):
+        tokens.append({
+            "index": idx,
+            "rank": int(ranks[row]),
+            "information_content": round(float(information_content[row]), 6),
+            "statistical_rarity": float(f"{statistical_rarity[row]:.6g}"),
+            "rarity_score": round(float(rarity_score[row]), 4),
+        })
+
+    return {
+        "items": n,
+        "ranking": "information_content (normalised by collection entropy); ties share a rank",
+        "trait_frequencies": trait_frequencies,
+        "tokens": tokens,
+    }
+
+
+def write_rarity(items: List[Tuple[int, List[Dict[str, str]]]], out_path: Path) -> Dict:
+    report = compute_rarity(items)
+    out_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return report
+
+
+def load_items(assets_dir: Path) -> List[Tuple[int, List[Dict[str, str]]]]:
+    items = []
+    for p in assets_dir.glob("*.json"):
+        if p.stem.isdigit():
+            data = json.loads(p.read_text(encoding="utf-8"))
+            items.append((int(p.stem), data.get("attributes", [])))
+    items.sort()
+    return items
+
+
+if __name__ == "__main__":
+    assets = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("candy_machine/assets")
+    report = write_rarity(load_items(assets), assets / "rarity.json")
+    top = sorted(report["tokens"], key=lambda t: (t["rank"], t["index"]))[:10]
+    print(f"Wrote rarity for {report['items']} items to {assets / 'rarity.json'}")
+    for t in top:
+        print(f"  #{t['rank']:>4}  {t['index']}.json  IC={t['information_content']:.4f}")
@@ -0,0 +1,274 @@
+"""
+Columnar snapshot of the collection's traits: one memory-mappable file instead of N JSONs.
+
+build_assets.py writes _collection_snapshot.bin next to the metadata. Layout:
+
+    "SSNP" | u32 version | u32 header length | JSON header | padding | int32 columns
+
+Every column is little-endian int32 and starts on an 8-byte boundary; the header gives each
+column's byte offset and length. Trait values are dictionary-encoded per trait type:
+    "index"            final_idx of every row
+    traits[tt]         {"values": [...], "counts": [...], "layout": "dense" | "csr", ...}
+      dense: "codes" has one entry per row, -1 where the item lacks the trait
+      csr:   (traits that repeat within an item, e.g. two Strains) row r's codes are
+             codes[offsets[r]:offsets[r + 1]]
+
+Readers only need the stdlib (mmap + memoryview).
+
+The snapshot is only as fresh as the N.json files it was built from, and those can be edited
+by hand. Next to it the hidden .collection_snapshot_state.json records the snapshot's digest
+and a fingerprint (count + digest of name, size and mtime) of the N.json files it was written
+from; snapshot_is_current() re-stats the collection and TraitIndex.load() falls back to the
+JSONs when they disagree. Stats live in the sidecar so identical builds still give identical
+snapshot bytes.
+
+    with Snapshot("candy_machine/assets/_collection_snapshot.bin") as snap:
+        rows = snap.rows_with("Strain", "Pink Kush")
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from trait_audit import ITEM_JSON_RE, text_digest
+
+SNAPSHOT_NAME = "_collection_snapshot.bin"
+SNAPSHOT_STATE_NAME = ".collection_snapshot_state.json"
+MAGIC = b"SSNP"
+VERSION = 1
+ALIGN = 8
+PREAMBLE = struct.Struct("<4sII")
+
+Items = List[Tuple[int, List[Dict[str, str]]]]
+
+
+def _int32(values) -> array:
+    col = array("i", values)
+    if col.itemsize != 4:
+        raise SystemExit("snapshot needs a 4-byte C int")
+    return col
+
+
+def encode_columns(items: Items) -> Tuple[Dict, List[Tuple[str, array]]]:
+    """Dictionary-encode [(final_idx, attributes)] into (header without offsets, named columns)."""
+    per_trait: Dict[str, List[List[int]]] = {}
+    dictionaries: Dict[str, Dict[str, int]] = {}
+    for row, (_idx, attrs) in enumerate(items):
+        for a in attrs:
+            tt = a.get("trait_type", "")
+            codes = dictionaries.setdefault(tt, {})
+            code = codes.setdefault(a.get("value", ""), len(codes))
+            rows = per_trait.get(tt)
+            if rows is None:
+                rows = per_trait[tt] = [[] for _ in items]
+            rows[row].append(code)
+
+    header: Dict = {"items": len(items), "traits": {}}
+    columns: List[Tuple[str, array]] = [("index", _int32(idx for idx, _ in items))]
+    for tt, rows in per_trait.items():
+        values = list(dictionaries[tt])
+        counts = [0] * len(values)
+        for codes in rows:
+            for c in codes:
+                counts[c] += 1
+        spec = {"values": values, "counts": counts}
+        if all(len(codes) <= 1 for codes in rows):
+            spec["layout"] = "dense"
+            columns.append((f"{tt}/codes", _int32(codes[0] if codes else -1 for codes in rows)))
+        else:
+            spec["layout"] = "csr"
+            offsets = [0]
+            for codes in rows:
+                offsets.append(offsets[-1] + len(codes))
+            columns.append((f"{tt}/offsets", _int32(offsets)))
+            columns.append((f"{tt}/codes", _int32(c for codes in rows for c in codes)))
+        header["traits"][tt] = spec
+    return header, columns
+
+
+def _pad(n: int) -> int:
+    return -n % ALIGN
+
+
+def snapshot_bytes(items: Items) -> bytes:
+    header, columns = encode_columns(items)
+
+    # Offsets depend on the header's own length, so lay the columns out relative to the end
+    # of the header and grow the reserved header size until it fits.
+    reserved = 0
+    while True:
+        offset = PREAMBLE.size + reserved
+        offset += _pad(offset)
+        layout = {}
+        for name, col in columns:
+            nbytes = len(col) * 4
+            layout[name] = {"offset": offset, "length": len(col)}
+            offset += nbytes + _pad(nbytes)
+        header["columns"] = layout
+        raw = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if len(raw) <= reserved:
+            break
+        reserved = len(raw) + 64
+
+    out = bytearray(PREAMBLE.pack(MAGIC, VERSION, reserved))
+    out += raw.ljust(reserved, b" ")
+    for name, col in columns:
+        out += b"\0" * (layout[name]["offset"] - len(out))
+        if sys.byteorder != "little":
+            col = array("i", col)
+            col.byteswap()
+        out += col.tobytes()
+    out += b"\0" * _pad(len(out))
+    return bytes(out)
+
+
+def source_fingerprint(assets_dir: Path) -> Dict:
+    """Count and stat digest of the N.json files in `assets_dir`, in collection order."""
+    with os.scandir(assets_dir) as it:
+        entries = sorted((e for e in it if ITEM_JSON_RE.match(e.name)), key=lambda e: int(e.name[:-5]))
+    h = hashlib.blake2b(digest_size=20)
+    for e in entries:
+        st = e.stat()
+        h.update(f"{e.name}:{st.st_size}:{st.st_mtime_ns}\n".encode("utf-8"))
+    return {"items_written": len(entries), "digest": h.hexdigest()}
+
+
+def _state_path(path: Path) -> Path:
+    return path.with_name(SNAPSHOT_STATE_NAME)
+
+
+def write_snapshot(items: Items, path: Path) -> bool:
+    """Write the snapshot for `items` to `path`; returns False if it was already identical.
+
+    Replaced via temp file + rename so readers holding the old file mapped keep a valid view.
+    Call it after the N.json files are written: the sidecar fingerprints them as they are now.
+    """
+    path = Path(path)
+    data = snapshot_bytes(items)
+    try:
+        written = path.read_bytes() != data
+    except OSError:
+        written = True
+    if written:
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    state = {"snapshot_digest": text_digest(data), "source": source_fingerprint(path.parent)}
+    _state_path(path).write_text(json.dumps(state, indent=2), encoding="utf-8")
+    return written
+
+
+def snapshot_is_current(path: Path) -> bool:
+    """True if the snapshot at `path` was written from the N.json files next to it as they are now."""
+    path = Path(path)
+    try:
+        state = json.loads(_state_path(path).read_text(encoding="utf-8"))
+        data = path.read_bytes()
+    except (OSError, ValueError):
+        return False
+    return (state.get("snapshot_digest") == text_digest(data)
+            and state.get("source") == source_fingerprint(path.parent))
+
+
+class Snapshot:
+    """Read-only, memory-mapped view of a snapshot file."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_len = PREAMBLE.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{self.path}: not a version {VERSION} collection snapshot")
+        header = json.loads(self._mm[PREAMBLE.size:PREAMBLE.size + header_len].decode("utf-8"))
+        self.items: int = header["items"]
+        self.traits: Dict[str, Dict] = header["traits"]
+        self._columns: Dict[str, Dict] = header["columns"]
+        self._cache: Dict[str, memoryview] = {}
+        self._codes: Dict[Tuple[str, str], int] = {}
+        self.index = self.column("index")
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for view in self._cache.values():
+            view.release()
+        self._cache.clear()
+        self.index = None
+        self._mm.close()
+
+    def column(self, name: str):
+        """int32 column as a zero-copy memoryview (a byte-swapped copy on big-endian hosts)."""
+        view = self._cache.get(name)
+        if view is None:
+            spec = self._columns[name]
+            start = spec["offset"]
+            raw = memoryview(self._mm)[start:start + 4 * spec["length"]]
+            if sys.byteorder == "little":
+                view = raw.cast("i")
+            else:
+                col = array("i", raw.tobytes())
+                col.byteswap()
+                raw.release()
+                view = memoryview(col)
+            self._cache[name] = view
+        return view
+
+    def values(self, trait_type: str) -> List[str]:
+        return self.traits[trait_type]["values"]
+
+    def code(self, trait_type: str, value: str) -> Optional[int]:
+        key = (trait_type, value)
+        if key not in self._codes:
+            spec = self.traits.get(trait_type)
+            self._codes[key] = spec["values"].index(value) if spec and value in spec["values"] else None
+        return self._codes[key]
+
+    def item_codes(self, trait_type: str, row: int) -> List[int]:
+        spec = self.traits.get(trait_type)
+        if spec is None:
+            return []
+        codes = self.column(f"{trait_type}/codes")
+        if spec["layout"] == "dense":
+            c = codes[row]
+            return [c] if c >= 0 else []
+        offsets = self.column(f"{trait_type}/offsets")
+        return list(codes[offsets[row]:offsets[row + 1]])
+
+    def rows_with(self, trait_type: str, value: str) -> List[int]:
+        """Rows (not final indices; see .index) whose `trait_type` includes `value`."""
+        code = self.code(trait_type, value)
+        if code is None:
+            return []
+        codes = self.column(f"{trait_type}/codes")
+        if self.traits[trait_type]["layout"] == "dense":
+            return [row for row, c in enumerate(codes) if c == code]
+        offsets = self.column(f"{trait_type}/offsets")
+        rows = []
+        row = 0
+        for pos, c in enumerate(codes):
+            if c == code:
+                while offsets[row + 1] <= pos:
+                    row += 1
+                if not rows or rows[-1] != row:
+                    rows.append(row)
+        return rows
+
+    def attributes(self, row: int) -> List[Dict[str, str]]:
+        """Rebuild a row's attributes (grouped by trait type, in first-seen trait order)."""
+        attrs = []
+        for tt, spec in self.traits.items():
+            for c in self.item_codes(tt, row):
+                attrs.append({"trait_type": tt, "value": spec["values"][c]})
+        return attrs
@@ -0,0 +1,139 @@
+"""
+Persistent source-image index: src_idx -> image path relative to the source dir.
+
+Built with one directory walk using the same filename rule as build_assets.discover_images
+(build_assets.source_index_of / IDX_RE), saved in the build cache as
+source_index/<digest of the source dir path>.json (the source tree itself is treated as
+read-only), and refreshed incrementally: a directory whose mtime hasn't changed reuses its cached listing, so
+a refresh costs one stat() per directory. Lookups are then O(1) instead of a listdir/walk per
+index.
+
+    index = load_source_index(Path("../images"))
+    index.rel_path(127)   # "mushrooms/127_golden_teacher.png"
+"""
+
+import hashlib
+import json
+import os
+import posixpath
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import build_assets
+
+INDEX_CACHE_SUBDIR = "source_index"
+INDEX_VERSION = 1
+
+
+def index_path_for(src_dir: Path, cache_dir: Optional[Path] = None) -> Path:
+    """Where the index of `src_dir` is kept: one file per source dir under the build cache."""
+    key = hashlib.blake2b(str(Path(src_dir).resolve()).encode("utf-8"), digest_size=10).hexdigest()
+    return Path(cache_dir or build_assets.build_cache_dir()) / INDEX_CACHE_SUBDIR / f"{key}.json"
+
+
+def _rules_fingerprint() -> str:
+    return build_assets._fingerprint({
+        "idx_re": build_assets.IDX_RE.pattern,
+        "exclude_indices": sorted(build_assets.EXCLUDE_SOURCE_INDICES),
+        "exclude_names": list(build_assets.EXCLUDE_NAME_CONTAINS),
+    })
+
+
+class SourceIndex:
+    def __init__(self, src_dir: Path, index_path: Optional[Path] = None) -> None:
+        self.src_dir = Path(src_dir)
+        self.index_path = index_path or index_path_for(self.src_dir)
+        # rel_dir ("" for the root) -> {"mtime_ns", "files": {name: src_idx}, "subdirs": [names]}
+        self.dirs: Dict[str, Dict] = {}
+        self.by_index: Dict[int, str] = {}
+        self.rescanned = 0
+        self.changed = False
+
+    def load(self) -> "SourceIndex":
+        try:
+            data = json.loads(self.index_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return self
+        if (data.get("version") == INDEX_VERSION and data.get("rules") == _rules_fingerprint()
+                and data.get("src_dir") == str(self.src_dir.resolve())):
+            self.dirs = data.get("dirs", {})
+        return self
+
+    def refresh(self) -> "SourceIndex":
+        """Re-list only directories whose mtime changed (or that are new) since the last refresh."""
+        new_dirs: Dict[str, Dict] = {}
+        self.rescanned = 0
+        stack = [""]
+        while stack:
+            rel = stack.pop()
+            full = self.src_dir / rel if rel else self.src_dir
+            try:
+                mtime = os.stat(full).st_mtime_ns
+            except OSError:
+                continue
+
+            entry = self.dirs.get(rel)
+            if entry is None or entry.get("mtime_ns") != mtime:
+                files: Dict[str, int] = {}
+                subdirs: List[str] = []
+                with os.scandir(full) as it:
+                    for e in it:
+                        if e.is_dir(follow_symlinks=False):
+                            subdirs.append(e.name)
+                        elif e.name.endswith(".png"):
+                            src_idx = build_assets.source_index_of(e.name)
+                            if src_idx is not None:
+                                files[e.name] = src_idx
+                entry = {"mtime_ns": mtime, "files": files, "subdirs": sorted(subdirs)}
+                self.rescanned += 1
+
+            new_dirs[rel] = entry
+            stack.extend(posixpath.join(rel, d) if rel else d for d in entry["subdirs"])
+
+        self.changed = new_dirs != self.dirs
+        self.dirs = new_dirs
+
+        # First path per index in discover_images order wins.
+        self.by_index = {}
+        for src_idx, rel_path in self.items():
+            self.by_index.setdefault(src_idx, rel_path)
+        return self
+
+    def save(self) -> None:
+        data = {"version": INDEX_VERSION, "rules": _rules_fingerprint(), "src_dir": str(self.src_dir.resolve()), "dirs": self.dirs}
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.index_path.with_name(self.index_path.name + ".tmp")
+        tmp.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp, self.index_path)
+        self.changed = False
+
+    def items(self) -> List[Tuple[int, str]]:
+        """All (src_idx, relative path) pairs, sorted like build_assets.discover_images."""
+        out = [
+            (src_idx, posixpath.join(rel, name) if rel else name)
+            for rel, entry in self.dirs.items()
+            for name, src_idx in entry["files"].items()
+        ]
+        out.sort(key=lambda t: (t[0], t[1].lower()))
+        return out
+
+    def rel_path(self, src_idx: int) -> Optional[str]:
+        return self.by_index.get(src_idx)
+
+    def lookup(self, src_idx: int) -> Optional[Path]:
+        rel = self.by_index.get(src_idx)
+        return self.src_dir / rel if rel else None
+
+
+def load_source_index(src_dir: Path, persist: bool = True, cache_dir: Optional[Path] = None) -> SourceIndex:
+    """Load the saved index for `src_dir`, refresh it, and save it back if anything changed.
+
+    `cache_dir` defaults to build_assets.build_cache_dir().
+    """
+    index = SourceIndex(src_dir, index_path_for(src_dir, cache_dir)).load().refresh()
+    if persist and index.changed:
+        try:
+            index.save()
+        except OSError:
+            pass  # unwritable build cache: the in-memory index is still valid
+    return index
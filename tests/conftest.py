@@ -0,0 +1,23 @@
+# The scripts live flat in the repo root; make them importable from tests/.
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def run_build(monkeypatch):
+    """Call as run_build(src, out, *cli_args): runs build_assets.build() and returns its stats."""
+    import build_assets as ba
+
+    monkeypatch.setattr(ba, "_PARSE_CACHE", None)
+    monkeypatch.setattr(ba, "_MANIFEST_MEMO", None)
+
+    def run(src, out, *argv):
+        monkeypatch.setattr(ba, "SRC_IMAGES_DIR", Path(src))
+        monkeypatch.setattr(ba, "OUT_ASSETS_DIR", Path(out))
+        return ba.build(ba.parse_args(list(argv)))
+
+    return run
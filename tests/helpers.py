@@ -0,0 +1,28 @@
+"""Fixture builders shared by the test modules (pytest puts tests/ on sys.path)."""
+
+import json
+from pathlib import Path
+
+
+def attrs(*pairs):
+    return [{"trait_type": tt, "value": vv} for tt, vv in pairs]
+
+
+def write_item_json(assets_dir: Path, idx: int, item_attrs) -> Path:
+    path = Path(assets_dir) / f"{idx}.json"
+    path.write_text(json.dumps({"name": f"#{idx}", "attributes": item_attrs}, indent=2), encoding="utf-8")
+    return path
+
+
+def make_sources(root: Path, count: int, seed: int = 0) -> Path:
+    """A synthetic source tree of `count` PNGs named from the trait vocabulary (see bench.py)."""
+    import bench
+
+    src = bench.generate_collection(Path(root), count, seed)
+    (src / ".complete").unlink()
+    return src
+
+
+def outputs(assets_dir: Path, skip=()) -> dict:
+    """name -> bytes for every file the build wrote, minus `skip` (per-run stats, stat-keyed manifests)."""
+    return {p.name: p.read_bytes() for p in sorted(Path(assets_dir).iterdir()) if p.is_file() and p.name not in skip}
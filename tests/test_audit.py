@@ -0,0 +1,149 @@
+import json
+import os
+import shutil
+
+import pytest
+
+import audit_nfts
+from audit_nfts import AUDIT_PASSES, AssetCollection, run_pass
+from helpers import make_sources
+
+PASSES = {p.number: p for p in AUDIT_PASSES}
+
+
+@pytest.fixture
+def built(tmp_path, run_build):
+    src = make_sources(tmp_path / "gen", 12)
+    out = tmp_path / "main" / "assets"
+    run_build(src, out)
+    backup = tmp_path / "backup" / "assets"
+    shutil.copytree(out, backup)
+    return src, out, backup
+
+
+def not_variant(issues):
+    # The build counts Variant in the audit but leaves it out of N.json, which pass 5 reports
+    return [i for i in issues if "'Variant'" not in i["description"]]
+
+
+def audit(number, out, **options):
+    """Run pass 1 then pass `number` on `out`; returns (printed output, issues) of the latter."""
+    ctx = {"collection": AssetCollection(out), **options}
+    ctx.update(run_pass(PASSES[1], ctx)[0])
+    _provided, text, issues = run_pass(PASSES[number], ctx)
+    return text, issues
+
+
+def test_pass_5_reads_every_path_from_its_context(built):
+    src, out, backup = built
+    # The module defaults point at the maintainer's machine; nothing may fall back to them
+    assert not audit_nfts.ASSETS_DIR.exists() and not audit_nfts.SOURCE_IMAGES_DIR.exists()
+    text, issues = audit(5, out, source_dir=src, backup_dir=backup)
+    assert not_variant(issues) == []
+    assert "Index map loaded: 12 entries" in text
+    assert "All 12 shared PNGs match" in text
+    assert "Trait audit items_written (12) matches" in text
+
+    rows = json.loads((out / "index_map.json").read_text(encoding="utf-8"))
+    (src / rows[4]["src_file"]).unlink()
+    _text, issues = audit(5, out, source_dir=src, backup_dir=backup)
+    assert [(i["severity"], i["file"]) for i in not_variant(issues)] == [("WARN", "4.png")]
+
+
+def test_pass_5_without_backup(built):
+    src, out, _backup = built
+    text, issues = audit(5, out, source_dir=src, backup_dir=out.parent / "missing")
+    assert "[SKIP] No backup directory found" in text
+    assert not_variant(issues) == []
+
+
+def run_passes(out, jobs, monkeypatch):
+    monkeypatch.setattr(audit_nfts, "issues", [])
+    audit_nfts.run_audit([PASSES[n] for n in (1, 2, 3, 4)], jobs=jobs, collection=AssetCollection(out))
+    return audit_nfts.issues
+
+
+def damage(out):
+    png = out / "5.png"
+    png.write_bytes(png.read_bytes()[:-20])
+    meta = json.loads((out / "7.json").read_text(encoding="utf-8"))
+    meta["attributes"].append({"trait_type": "Element", "value": "Plasma"})
+    meta["image"] = "8.png"
+    (out / "7.json").write_text(json.dumps(meta), encoding="utf-8")
+
+
+def test_small_audit_checks_items_in_process(built, monkeypatch):
+    _src, out, _backup = built
+    damage(out)
+    serial = run_passes(out, 1, monkeypatch)
+    monkeypatch.setattr(audit_nfts, "_get_item_pool", lambda: pytest.fail("started worker processes for 12 items"))
+    assert run_passes(out, 4, monkeypatch) == serial
+
+
+def test_sharded_audit_matches_serial(built, monkeypatch):
+    _src, out, _backup = built
+    damage(out)
+    serial = run_passes(out, 1, monkeypatch)
+    assert {i["file"] for i in serial} >= {"5.png", "7.json"}
+    monkeypatch.setattr(audit_nfts, "ITEM_SHARD_SIZE", 2)  # 6 shards over 2 workers
+    pools = []
+    get_pool = audit_nfts._get_item_pool
+    monkeypatch.setattr(audit_nfts, "_get_item_pool", lambda: pools.append(get_pool()) or pools[-1])
+    assert run_passes(out, 2, monkeypatch) == serial
+    assert pools and all(pool is pools[0] for pool in pools)
+    assert audit_nfts._item_pool is None  # shut down with the audit
+
+
+@pytest.mark.parametrize("quick_hash", [False, True])
+def test_pass_5_detects_same_size_backup_changes(built, quick_hash):
+    src, out, backup = built
+    png = bytearray((backup / "3.png").read_bytes())
+    png[len(png) // 2] ^= 0xFF  # same size, so only the digest can tell
+    (backup / "3.png").write_bytes(bytes(png))
+    meta = json.loads((backup / "6.json").read_text(encoding="utf-8"))
+    meta["attributes"][0]["value"] = "Zzz"
+    (backup / "6.json").write_text(json.dumps(meta), encoding="utf-8")
+
+    _text, issues = audit(5, out, source_dir=src, backup_dir=backup, quick_hash=quick_hash)
+    found = {(i["severity"], i["file"]): i["description"] for i in not_variant(issues)}
+    assert set(found) == {("WARN", "3.png"), ("INFO", "6.json")}
+    assert found[("WARN", "3.png")].startswith("PNG content differs from backup (same size")
+    assert "'Zzz'" in found[("INFO", "6.json")]
+
+
+def test_hash_cache_rehashes_only_changed_files(tmp_path):
+    a, b = tmp_path / "a.bin", tmp_path / "b.bin"
+    a.write_bytes(b"x" * 1000)
+    b.write_bytes(b"x" * 1000)
+    cache = audit_nfts.HashCache(tmp_path / "cache.json")
+    assert cache.same_content(a, b)
+    cache.save()
+
+    cache = audit_nfts.HashCache(tmp_path / "cache.json")
+    assert not cache.dirty and cache.same_content(a, b) and not cache.dirty  # answered from the cache
+    mtime = b.stat().st_mtime_ns
+    b.write_bytes(b"x" * 999 + b"y")
+    os.utime(b, ns=(mtime + 10**9, mtime + 10**9))
+    assert not cache.same_content(a, b)
+    assert not cache.same_content(a, b, quick=True)
+
+
+def test_pass_6_groups_copies_and_keeps_recolors_apart(built):
+    pytest.importorskip("numpy")
+    Image = pytest.importorskip("PIL.Image")
+    _src, out, _backup = built
+    shutil.copyfile(out / "2.png", out / "9.png")
+    with Image.open(out / "2.png") as img:
+        r, g, b, a = img.convert("RGBA").split()
+        Image.merge("RGBA", (b, r, g, a)).save(out / "10.png")  # same disc, channels rotated
+        Image.merge("RGBA", (r.point(lambda v: min(v + 3, 255)), g, b, a)).save(out / "11.png")  # faint tint
+
+    _text, issues = audit(6, out)
+    found = [i["description"] for i in issues]
+    copies = next(d for d in found if d.startswith("Identical images: ") and " 9.png" in d)
+    assert "2.png" in copies.split(": ")[1].split(", ")
+    near = [d for d in found if d.startswith("Near-duplicate images: ")]
+    # Pairs name the first of each set of copies, which may be an earlier copy of 2.png
+    first = copies.split(": ")[1].split(", ")[0]
+    assert any(f" {first}, 11.png" in d for d in near)
+    assert not any("10.png" in d for d in near)
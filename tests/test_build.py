@@ -0,0 +1,108 @@
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+import bench
+import build_assets as ba
+from helpers import make_sources, outputs
+from snapshot import SNAPSHOT_STATE_NAME
+from trait_audit import AUDIT_STATE_NAME
+
+ITEMS = 40
+# Hold source/output stats, so they differ between two builds of the same tree
+VOLATILE = {ba.BUILD_MANIFEST_NAME, ba.BUILD_STATS_NAME, AUDIT_STATE_NAME, SNAPSHOT_STATE_NAME}
+
+
+@pytest.fixture
+def src(tmp_path):
+    return make_sources(tmp_path / "gen", ITEMS)
+
+
+def edit_source(src):
+    path = sorted(src.rglob("*.png"))[7]
+    path.write_bytes(bench.tiny_png(random.Random(99)))
+
+
+def rename_source(src):
+    path = next(src.rglob("003_*.png"))
+    path.rename(src / "003_fire_mushroom_pink_bg-cream.png")
+
+
+def remove_source(src):
+    next(src.rglob("005_*.png")).unlink()
+
+
+@pytest.mark.parametrize("index_mode, change", [
+    ("preserve", edit_source),
+    ("preserve", rename_source),
+    ("renumber", edit_source),
+    ("renumber", remove_source),  # every later item moves down a slot
+])
+def test_incremental_build_equals_full_build(tmp_path, src, run_build, monkeypatch, index_mode, change):
+    monkeypatch.setattr(ba, "INDEX_MODE", index_mode)
+    inc = tmp_path / "inc" / "assets"
+    run_build(src, inc)
+    before = outputs(inc, VOLATILE)
+    change(src)
+    stats = run_build(src, inc)
+    assert stats["incremental"]
+
+    full = tmp_path / "full" / "assets"
+    run_build(src, full, "--full")
+    after = outputs(inc, VOLATILE)
+    assert after == outputs(full, VOLATILE)
+    assert after != before
+
+
+def test_renamed_source_gets_its_new_traits(tmp_path, src, run_build):
+    out = tmp_path / "assets"
+    run_build(src, out)
+    rename_source(src)
+    stats = run_build(src, out)
+    assert stats["jsons_written"] == 1
+    assert "Mushroom" in (out / "3.json").read_text(encoding="utf-8")
+
+
+def test_vocabulary_change_rewrites_only_changed_jsons(tmp_path, src, run_build):
+    out = tmp_path / "assets"
+    run_build(src, out)
+    mtimes = {p.name: p.stat().st_mtime_ns for p in out.glob("[0-9]*.json")}
+    try:
+        with pytest.MonkeyPatch.context() as mp:
+            mp.setitem(ba.MOTIF_ALIASES, "zzzunused", "Unused")  # matches no source name
+            ba.compile_trait_matcher()
+            stats = run_build(src, out)
+    finally:
+        ba.compile_trait_matcher()
+    assert stats["jsons_written"] == 0
+    assert {p.name: p.stat().st_mtime_ns for p in out.glob("[0-9]*.json") if p.name in mtimes} == mtimes
+
+
+@pytest.mark.parametrize("pool", ["thread", "process"])
+def test_parallel_build_equals_serial_build(tmp_path, src, run_build, pool):
+    serial = tmp_path / "serial" / "assets"
+    run_build(src, serial)
+    parallel = tmp_path / pool / "assets"
+    stats = run_build(src, parallel, "-j", "4", "--pool", pool)
+    assert stats["jobs"] == 4
+    # The trait audit and index map included: only the stat-keyed files may differ
+    assert outputs(parallel, VOLATILE) == outputs(serial, VOLATILE)
+    assert "_trait_audit.json" in outputs(serial)
+
+
+def test_index_map_rows_carry_their_own_variants(tmp_path, src, run_build, monkeypatch):
+    monkeypatch.setattr(ba, "WRITE_VARIANTS_SIDECAR", True)
+    out = tmp_path / "assets"
+    run_build(src, out)
+    rows = json.loads((out / "index_map.json").read_text(encoding="utf-8"))
+    sidecar = json.loads((out / "_variants_by_index.json").read_text(encoding="utf-8"))
+    assert [row["final_idx"] for row in rows] == list(range(ITEMS))
+    for row in rows:
+        assert set(row) == {"final_idx", "src_idx", "variants", "src_file"}
+        rel = Path(row["src_file"])
+        parsed, _unknown = ba.parse_traits(rel.stem, rel)
+        assert row["variants"] == [a["value"] for a in parsed if a["trait_type"] == "Variant"]
+        assert sidecar.get(str(row["final_idx"]), []) == row["variants"]
+    assert any(row["variants"] for row in rows)
@@ -0,0 +1,44 @@
+import json
+
+import build_assets as ba
+from helpers import make_sources
+
+ITEMS = 12
+
+
+def test_latency_summary_buckets_and_percentiles():
+    summary = ba.latency_summary([0.00005, 0.0003, 0.0003, 0.004, 2.0])
+    assert summary["count"] == 5
+    assert summary["max_ms"] == 2000.0
+    assert summary["p50_ms"] == 0.3
+    hist = summary["histogram_ms"]
+    assert (hist["<=0.1"], hist["<=0.5"], hist["<=5"], hist[">1000"]) == (1, 2, 1, 1)
+    assert sum(hist.values()) == 5
+    assert ba.latency_summary([]) == {"count": 0}
+
+
+def test_build_stats_file(tmp_path, monkeypatch):
+    src = make_sources(tmp_path / "gen", ITEMS)
+    out = tmp_path / "assets"
+    monkeypatch.setattr(ba, "SRC_IMAGES_DIR", src)
+    monkeypatch.setattr(ba, "OUT_ASSETS_DIR", out)
+    monkeypatch.setattr(ba, "_PARSE_CACHE", None)
+    monkeypatch.setattr(ba, "_MANIFEST_MEMO", None)
+    ba.main(ba.parse_args(["--profile", "--tracemalloc"]))
+
+    stats = json.loads((out / ba.BUILD_STATS_NAME).read_text(encoding="utf-8"))
+    assert (stats["items"], stats["pngs_copied"], stats["jsons_written"]) == (ITEMS, ITEMS, ITEMS)
+    assert stats["bytes_copied"] == sum(p.stat().st_size for p in src.rglob("*.png"))
+    assert {"discover", "emit", "audit_write"} <= set(stats["stages_s"])
+    assert sum(stats["stages_s"].values()) <= stats["total_s"] + 1e-6
+    assert set(stats["item_latency"]) == {"hash", "copy", "parse", "json_write", "total"}
+    assert stats["item_latency"]["total"]["count"] == ITEMS
+    assert stats["profile_top"] and (out / "_build_profile.prof").exists()
+    assert stats["tracemalloc"]["peak_bytes"] > 0
+
+    # A no-op rebuild: nothing copied or written, and the skipped items have no latency samples
+    ba.main(ba.parse_args([]))
+    stats = json.loads((out / ba.BUILD_STATS_NAME).read_text(encoding="utf-8"))
+    assert stats["incremental"]
+    assert (stats["pngs_copied"], stats["jsons_written"], stats["bytes_copied"]) == (0, 0, 0)
+    assert "profile_top" not in stats
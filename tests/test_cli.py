@@ -0,0 +1,62 @@
+import ast
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import cli
+from helpers import attrs, write_item_json
+from trait_vocab import load_vocab
+
+REPO = Path(__file__).resolve().parent.parent
+HEAVY = ("build_assets", "audit_nfts", "PIL", "numpy")
+
+
+@pytest.fixture
+def collection(tmp_path):
+    strain = sorted(load_vocab().mushroom_strains)[0]
+    write_item_json(tmp_path, 0, attrs(("Element", "Fire"), ("Type", "Mushroom"), ("Strain", strain)))
+    write_item_json(tmp_path, 1, attrs(("Element", "Water"), ("Type", "Plant")))
+    return tmp_path
+
+
+def run_cli(*argv):
+    """Run cli.py in a fresh interpreter; returns (status, stdout, heavy modules it imported)."""
+    code = ("import sys, cli; status = cli.main(sys.argv[1:]); "
+            f"print('LOADED', [m for m in {HEAVY!r} if m in sys.modules]); sys.exit(status)")
+    proc = subprocess.run([sys.executable, "-c", code, *map(str, argv)], cwd=REPO, capture_output=True, text=True, timeout=60)
+    out, _, loaded = proc.stdout.rpartition("LOADED ")
+    return proc.returncode, out, ast.literal_eval(loaded)
+
+
+def test_usage_and_unknown_command(capsys):
+    assert cli.main(["--help"]) == 0
+    assert "check-deep" in capsys.readouterr().out
+    assert cli.main([]) == 2
+    assert cli.main(["nope"]) == 2
+    assert "unknown command 'nope'" in capsys.readouterr().err
+
+
+def test_quick_checks_stay_light(collection):
+    status, out, loaded = run_cli("check-deep", collection)
+    assert status == 0 and "No Type/Strain mismatches found." in out
+    assert loaded == []
+
+    status, out, loaded = run_cli("check-types", collection, "-i", "1", "-i", "7", "--no-source")
+    assert status == 1  # 7.json is missing
+    assert "1.json => [('Element', 'Water'), ('Type', 'Plant')]" in out and "7.json => unreadable" in out
+    assert loaded == []
+
+
+def test_mismatch_sets_the_exit_status(collection):
+    write_item_json(collection, 2, attrs(("Type", "Plant"), ("Strain", sorted(load_vocab().mushroom_strains)[0])))
+    assert cli.main(["check-deep", str(collection), "--source", str(collection / "no-sources")]) == 1
+
+
+def test_update_audit_command(collection, capsys):
+    assert cli.main(["update-audit", str(collection)]) == 0
+    assert "2 of 2 files changed" in capsys.readouterr().out
+    assert (collection / "_trait_audit.json").exists()
+    assert cli.main(["update-audit", str(collection)]) == 0
+    assert "0 of 2 files changed" in capsys.readouterr().out
@@ -0,0 +1,66 @@
+import pytest
+
+pytest.importorskip("numpy")
+Image = pytest.importorskip("PIL.Image")
+ImageDraw = pytest.importorskip("PIL.ImageDraw")
+
+import image_hashes  # noqa: E402  (needs the optional deps above)
+from audit_nfts import NEAR_DUPLICATE_COLOR_TOLERANCE, NEAR_DUPLICATE_MAX_DISTANCE  # noqa: E402
+
+
+def sprite(path, color, shift=0):
+    """A 32 px sprite: a body in `color` (moved right by `shift`), a yellow block and a dark line."""
+    img = Image.new("RGBA", (32, 32), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+    draw.ellipse((4 + shift, 6, 22 + shift, 28), fill=color)
+    draw.rectangle((16, 2, 28, 12), fill=(240, 220, 60, 255))
+    draw.line((6, 24, 26, 30), fill=(20, 20, 20, 255), width=2)
+    img.save(path)
+    return image_hashes.image_signature(path)
+
+
+def pairs(signatures):
+    return image_hashes.near_duplicate_pairs({k: (h, c) for k, (h, c, _d) in signatures.items()},
+                                             NEAR_DUPLICATE_MAX_DISTANCE, NEAR_DUPLICATE_COLOR_TOLERANCE)
+
+
+def test_recolors_are_not_near_duplicates(tmp_path):
+    sigs = {
+        0: sprite(tmp_path / "red.png", (200, 40, 40, 255)),
+        1: sprite(tmp_path / "blue.png", (40, 100, 160, 255)),
+        2: sprite(tmp_path / "green.png", (30, 140, 30, 255)),
+    }
+    # Same shape: the luminance hashes alone would call every pair a duplicate
+    assert max(image_hashes.hamming(sigs[a][0], sigs[b][0]) for a, b in [(0, 1), (0, 2), (1, 2)]) <= NEAR_DUPLICATE_MAX_DISTANCE
+    assert pairs(sigs) == []
+    assert image_hashes.identical_groups({k: s[2] for k, s in sigs.items()}) == []
+
+
+def test_near_duplicates_report_their_own_distances(tmp_path):
+    sigs = {
+        0: sprite(tmp_path / "a.png", (200, 40, 40, 255)),
+        1: sprite(tmp_path / "b.png", (204, 44, 40, 255)),  # slight tint
+        2: sprite(tmp_path / "c.png", (200, 40, 40, 255), shift=1),
+    }
+    found = pairs(sigs)
+    assert [(a, b) for a, b, _d, _cd in found] == [(0, 1), (0, 2), (1, 2)]
+    for a, b, d, cd in found:
+        assert d == image_hashes.hamming(sigs[a][0], sigs[b][0])
+        assert cd == image_hashes.color_distance(sigs[a][1], sigs[b][1])
+    assert found[0][3] == 4
+
+
+def test_pairs_are_not_linked_transitively():
+    colors = bytes(48)
+    a, b, c = 0, (1 << 6) - 1, (1 << 12) - 1  # a-b and b-c 6 bits apart, a-c 12
+    found = image_hashes.near_duplicate_pairs({"a": (a, colors), "b": (b, colors), "c": (c, colors)}, 10, 0)
+    assert found == [("a", "b", 6, 0), ("b", "c", 6, 0)]
+
+
+def test_identical_groups_need_exact_pixels(tmp_path):
+    sigs = {
+        3: sprite(tmp_path / "a.png", (200, 40, 40, 255)),
+        5: sprite(tmp_path / "b.png", (200, 40, 40, 254)),
+        8: sprite(tmp_path / "c.png", (200, 40, 40, 255)),
+    }
+    assert image_hashes.identical_groups({k: s[2] for k, s in sigs.items()}) == [[3, 8]]
@@ -0,0 +1,90 @@
+import errno
+import os
+
+import pytest
+
+import build_assets as ba
+from helpers import make_sources
+
+
+@pytest.fixture(autouse=True)
+def fresh_support(monkeypatch):
+    monkeypatch.setattr(ba, "_MATERIALIZE_UNSUPPORTED", set())
+
+
+@pytest.fixture
+def src(tmp_path):
+    path = tmp_path / "src.png"
+    path.write_bytes(b"\x89PNG source" * 100)
+    return path
+
+
+def refuse(err, calls=None):
+    def fail(*args, **kwargs):
+        if calls is not None:
+            calls.append(args)
+        raise OSError(err, os.strerror(err))
+    return fail
+
+
+def test_hardlink_and_relink_leave_the_source_alone(tmp_path, src):
+    dst = tmp_path / "0.png"
+    assert ba.materialize(src, dst, "hardlink") == "hardlink"
+    assert os.path.samefile(src, dst)
+
+    other = tmp_path / "other.png"
+    other.write_bytes(b"other")
+    assert ba.materialize(other, dst, "copy") == "copy"
+    assert dst.read_bytes() == b"other"
+    assert src.read_bytes() == b"\x89PNG source" * 100  # replaced, not written through
+
+
+@pytest.mark.parametrize("err", [errno.EXDEV, errno.EOPNOTSUPP])
+def test_hardlink_falls_back_to_copy(tmp_path, src, monkeypatch, err):
+    calls = []
+    monkeypatch.setattr(os, "link", refuse(err, calls))
+    for n in range(3):
+        dst = tmp_path / f"{n}.png"
+        assert ba.materialize(src, dst, "hardlink") == "copy"
+        assert dst.read_bytes() == src.read_bytes()
+        assert not os.path.samefile(src, dst)
+    assert len(calls) == 1  # switched off after the first refusal
+    assert "hardlink" in ba._MATERIALIZE_UNSUPPORTED
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_symlink_falls_back_to_copy(tmp_path, src, monkeypatch):
+    monkeypatch.setattr(os, "symlink", refuse(errno.EOPNOTSUPP))
+    dst = tmp_path / "0.png"
+    assert ba.materialize(src, dst, "symlink") == "copy"
+    assert not dst.is_symlink() and dst.read_bytes() == src.read_bytes()
+    assert "symlink" in ba._MATERIALIZE_UNSUPPORTED
+
+
+def test_reflink_falls_back_to_copy_file_range_then_copy(tmp_path, src, monkeypatch):
+    fcntl = pytest.importorskip("fcntl")
+    monkeypatch.setattr(fcntl, "ioctl", refuse(errno.EOPNOTSUPP))
+    if hasattr(os, "copy_file_range"):
+        monkeypatch.setattr(os, "copy_file_range", refuse(errno.EXDEV))
+    dst = tmp_path / "0.png"
+    assert ba.materialize(src, dst, "reflink") == "copy"
+    assert dst.read_bytes() == src.read_bytes()
+    assert dst.stat().st_mtime_ns == src.stat().st_mtime_ns
+    assert "reflink" in ba._MATERIALIZE_UNSUPPORTED
+
+
+def test_other_errors_are_raised(tmp_path, src, monkeypatch):
+    monkeypatch.setattr(os, "link", refuse(errno.ENOSPC))
+    with pytest.raises(OSError) as info:
+        ba.materialize(src, tmp_path / "0.png", "hardlink")
+    assert info.value.errno == errno.ENOSPC
+    assert not ba._MATERIALIZE_UNSUPPORTED
+    assert not list(tmp_path.glob(".*.tmp")) and not (tmp_path / "0.png").exists()
+
+
+def test_build_counts_fallbacks(tmp_path, run_build, monkeypatch):
+    src = make_sources(tmp_path / "gen", 6)
+    monkeypatch.setattr(os, "link", refuse(errno.EXDEV))
+    stats = run_build(src, tmp_path / "assets", "--materialize", "hardlink")
+    assert stats["materialize"] == {"mode": "hardlink", "methods": {"copy": 6}}
+    assert stats["bytes_copied"] == sum(p.stat().st_size for p in src.rglob("*.png"))
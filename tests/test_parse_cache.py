@@ -0,0 +1,81 @@
+from pathlib import Path
+
+import pytest
+
+import build_assets as ba
+from build_assets import ParseCache, parse_cache_key
+from helpers import attrs, make_sources
+
+
+@pytest.fixture
+def sources(tmp_path):
+    src = make_sources(tmp_path / "gen", 30)
+    return [(p.stem, p.relative_to(src)) for p in sorted(src.rglob("*.png"))]
+
+
+def test_key_depends_only_on_stem_and_element_folder():
+    assert parse_cache_key("007_pink_kush", Path("art/Fire/new/007_pink_kush.png")) == "007_pink_kush\0fire"
+    assert parse_cache_key("007_pink_kush", Path("other/007_pink_kush.png")) == "007_pink_kush\0"
+    assert parse_cache_key("007_pink_kush", Path("a/007_pink_kush.png")) == parse_cache_key("007_pink_kush", Path("b/007_pink_kush.png"))
+
+
+def test_cached_parse_matches_parse_traits(sources):
+    cache = ParseCache("fp")
+    for stem, rel in sources + sources:
+        assert cache.parse(stem, rel) == ba.parse_traits(stem, rel)
+    assert (cache.misses, cache.hits) == (len(sources), len(sources))
+
+
+def test_lru_eviction():
+    cache = ParseCache("fp", maxsize=2)
+    cache.put("a", attrs(("Type", "Plant")), [])
+    cache.put("b", attrs(("Type", "Mushroom")), [])
+    assert cache.get("a") is not None  # a is now the most recent
+    cache.put("c", attrs(("Type", "Tree")), ["zz"])
+    assert list(cache.entries) == ["a", "c"]
+    assert cache.get("b") is None
+
+
+def test_persisted_round_trip(tmp_path, sources):
+    path = tmp_path / "parse" / "fp.json"
+    cache = ParseCache("fp", path)
+    cache.put("odd", attrs(("Strain", "Pink Kush"), ("Sprite Color", "Light Blue")), ["x y", "z"])
+    cache.put("bare", [], [])
+    for stem, rel in sources:
+        cache.parse(stem, rel)
+    path.parent.mkdir()
+    (path.parent / "old-fingerprint.json").write_text("{}", encoding="utf-8")
+    cache.save()
+    assert [p.name for p in path.parent.iterdir()] == ["fp.json"]
+
+    loaded = ParseCache("fp", path).load()
+    assert loaded.get("odd") == (attrs(("Strain", "Pink Kush"), ("Sprite Color", "Light Blue")), ["x y", "z"])
+    assert loaded.get("bare") == ([], [])
+    for stem, rel in sources:
+        assert loaded.get(parse_cache_key(stem, rel)) == ba.parse_traits(stem, rel)
+    assert ParseCache("other", path).load().entries == {}
+
+
+def test_vocabulary_change_gives_a_cold_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(ba, "BUILD_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(ba, "_PARSE_CACHE", None)
+    before = ba.get_parse_cache()
+    before.parse("001_fire_mushroom", Path("001_fire_mushroom.png"))
+    try:
+        monkeypatch.setitem(ba.MOTIF_ALIASES, "zzzunused", "Unused")
+        ba.compile_trait_matcher()
+        after = ba.get_parse_cache()
+        assert after.fingerprint != before.fingerprint
+        assert after.get(parse_cache_key("001_fire_mushroom", Path("001_fire_mushroom.png"))) is None
+    finally:
+        monkeypatch.undo()
+        ba.compile_trait_matcher()
+
+
+def test_full_rebuild_reads_traits_from_the_cache(tmp_path, run_build):
+    src = make_sources(tmp_path / "gen", 12)
+    out = tmp_path / "assets"
+    stats = run_build(src, out)
+    assert stats["parse_cache"]["misses"] == 12
+    stats = run_build(src, out, "--full")
+    assert (stats["parse_cache"]["hits"], stats["parse_cache"]["misses"]) == (12, 0)
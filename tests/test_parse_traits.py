@@ -0,0 +1,38 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import build_assets as ba
+from helpers import attrs
+
+# (rel_path, [[trait_type, value], ...], unknown_tokens) for random vocabulary-token file names
+# (the last 60 with multi-token phrases spliced in), as parsed by the token-by-token scanner
+# parse_traits used before the trie matcher.
+GOLDEN = json.loads((Path(__file__).parent / "data" / "parse_traits_golden.json").read_text(encoding="utf-8"))
+
+
+@pytest.fixture(params=["precompiled", "recompiled"])
+def matcher(request):
+    """The trie shipped in the vocab cache and one compiled from the module's tables."""
+    if request.param == "recompiled":
+        ba._TRAIT_MATCHER = ba.TraitMatcher(None)
+    yield
+    ba.compile_trait_matcher()
+
+
+def test_parse_traits_matches_the_scanner(matcher):
+    mismatches = []
+    for rel, expected, unknown in GOLDEN:
+        rel_path = Path(rel)
+        result = ba.parse_traits(rel_path.stem, rel_path)
+        if result != (attrs(*expected), unknown):
+            mismatches.append((rel, result))
+    assert mismatches == []
+
+
+def test_golden_covers_phrases_and_folders():
+    values = {(tt, v) for _rel, expected, _unknown in GOLDEN for tt, v in expected}
+    assert {tt for tt, _v in values} >= {"Element", "Type", "Strain", "Motif", "Accessory", "Background", "Sprite Color", "Variant"}
+    assert any(rel.startswith("Water/") for rel, _e, _u in GOLDEN)
+    assert any(unknown for _r, _e, unknown in GOLDEN)
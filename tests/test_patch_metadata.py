@@ -0,0 +1,115 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+import patch_metadata
+from helpers import attrs, write_item_json
+from patch_metadata import apply_actions, load_rules, patch_collection
+from snapshot import SNAPSHOT_NAME, Snapshot, write_snapshot
+from trait_audit import TraitAudit
+
+TWO_TYPES = attrs(("Element", "Fire"), ("Type", "Sprite"), ("Type", "Plant"))
+
+
+def rules_file(tmp_path, rules):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"rules": rules}), encoding="utf-8")
+    return load_rules(path)
+
+
+@pytest.fixture
+def collection(tmp_path):
+    assets = tmp_path / "assets"
+    assets.mkdir()
+    items = [
+        (0, TWO_TYPES),
+        (1, attrs(("Element", "Water"), ("Type", "Sprite"), ("Strain", "Pink Kush"), ("Strain", "Kush"))),
+        (2, attrs(("Element", "Earth"))),
+    ]
+    for idx, item_attrs in items:
+        write_item_json(assets, idx, item_attrs)
+    audit = TraitAudit.load(assets)
+    audit.refresh(assets)
+    audit.save()
+    write_snapshot(items, assets / SNAPSHOT_NAME)
+    return assets
+
+
+def read_attrs(assets, idx):
+    return json.loads((assets / f"{idx}.json").read_text(encoding="utf-8"))["attributes"]
+
+
+def test_set_replaces_the_first_value_only():
+    new, messages = apply_actions({"set": {"Type": "Mushroom"}}, 0, TWO_TYPES)
+    assert new == attrs(("Element", "Fire"), ("Type", "Mushroom"), ("Type", "Plant"))
+    assert messages == ["  0.json: Type 'Sprite' -> 'Mushroom'"]
+
+
+def test_set_with_replace_all_drops_the_other_values():
+    new, messages = apply_actions({"set": {"Type": "Mushroom"}, "replace_all": True}, 0, TWO_TYPES)
+    assert new == attrs(("Element", "Fire"), ("Type", "Mushroom"))
+    assert messages[-1] == "  0.json: Removing Type='Plant'"
+
+
+def test_set_adds_a_missing_trait():
+    new, _messages = apply_actions({"set": {"Type": "Plant"}}, 2, attrs(("Element", "Earth")))
+    assert new == attrs(("Element", "Earth"), ("Type", "Plant"))
+
+
+def test_load_rules_checks_keys(tmp_path):
+    [rule] = rules_file(tmp_path, [{"match": {"index": 3}, "set": {"Type": "Plant"}, "replace_all": True}])
+    assert rule["match"]["index"] == {3}
+    with pytest.raises(SystemExit, match="unknown keys: replace"):
+        rules_file(tmp_path, [{"set": {"Type": "Plant"}, "replace": True}])
+    with pytest.raises(SystemExit, match="no action"):
+        rules_file(tmp_path, [{"match": {"index": 3}}])
+
+
+def test_shipped_rules_load():
+    rules = load_rules(Path(patch_metadata.__file__).with_name("metadata_fixes.json"))
+    assert rules and not any(r.get("replace_all") for r in rules)
+
+
+def test_patch_updates_files_audit_and_snapshot(tmp_path, collection):
+    rules = rules_file(tmp_path, [
+        {"match": {"attributes": {"Type": "Sprite"}}, "set": {"Type": "Mushroom"}, "replace_all": True},
+        {"match": {"attributes": {"Strain": "Pink Kush"}}, "keep": {"Strain": ["Pink Kush"]}},
+    ])
+    untouched = (collection / "2.json").stat().st_mtime_ns
+    assert patch_collection(rules, collection) == [0, 1]
+    assert read_attrs(collection, 0) == attrs(("Element", "Fire"), ("Type", "Mushroom"))
+    assert read_attrs(collection, 1) == attrs(("Element", "Water"), ("Type", "Mushroom"), ("Strain", "Pink Kush"))
+    assert (collection / "2.json").stat().st_mtime_ns == untouched
+
+    audit = TraitAudit.load(collection)
+    assert dict(audit.trait_counts) == {"Element": 3, "Type": 2, "Strain": 1}
+    assert {tt: sorted(v) for tt, v in audit.value_refs.items()}["Type"] == ["Mushroom"]
+    assert audit.refresh(collection) == []  # the recorded file states are current
+    with Snapshot(collection / SNAPSHOT_NAME) as snap:
+        assert snap.rows_with("Type", "Mushroom") == [0, 1]
+
+
+def test_failed_commit_rolls_back(tmp_path, collection, monkeypatch):
+    before = {p.name: p.read_bytes() for p in collection.iterdir()}
+    rules = rules_file(tmp_path, [{"match": {"attributes": {"Type": "*"}}, "set": {"Type": "Mushroom"}}])
+    calls = []
+
+    def failing_fsync(fd):
+        calls.append(fd)
+        if len(calls) == 2:
+            raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(os, "fsync", failing_fsync)
+    with pytest.raises(OSError):
+        patch_collection(rules, collection)
+    # Neither the first, already staged file nor the audit or snapshot changed; no temp files remain
+    assert {p.name: p.read_bytes() for p in collection.iterdir()} == before
+
+
+def test_dry_run_writes_nothing(tmp_path, collection):
+    before = {p.name: p.read_bytes() for p in collection.iterdir()}
+    rules = rules_file(tmp_path, [{"set": {"Type": "Mushroom"}}])
+    assert patch_collection(rules, collection, dry_run=True) == [0, 1, 2]
+    assert {p.name: p.read_bytes() for p in collection.iterdir()} == before
@@ -0,0 +1,91 @@
+import io
+import struct
+
+import pytest
+
+pytest.importorskip("PIL")
+pytest.importorskip("numpy")
+
+from PIL import Image, PngImagePlugin  # noqa: E402
+
+import png_optimize  # noqa: E402
+from helpers import make_sources  # noqa: E402
+
+
+def sprite_png(size=(24, 16), **save_kwargs):
+    img = Image.new("RGBA", size, (0, 0, 0, 0))
+    for x in range(4, 20):
+        for y in range(3, 13):
+            img.putpixel((x, y), (200, 40, 90, 255) if x < 12 else (30, 160, 220, 128))
+    buf = io.BytesIO()
+    img.save(buf, "PNG", compress_level=0, **save_kwargs)
+    return buf.getvalue()
+
+
+def pixels(data):
+    with Image.open(io.BytesIO(data)) as img:
+        return img.convert("RGBA").tobytes()
+
+
+def chunk_names(data):
+    return [kind.decode("latin-1") for kind, _ in png_optimize.read_chunks(data)]
+
+
+def test_lossless_palette_reencode_strips_ancillary_chunks():
+    info = PngImagePlugin.PngInfo()
+    info.add_text("Software", "paint")
+    data = sprite_png(pnginfo=info)
+    out = png_optimize.optimize_png(data)
+    assert pixels(out) == pixels(data)
+    assert len(out) < len(data)
+    assert chunk_names(out) == ["IHDR", "PLTE", "tRNS", "IDAT", "IEND"]
+    assert out[25] == 3  # IHDR colour type: palette
+
+
+def test_keep_chunks():
+    info = PngImagePlugin.PngInfo()
+    info.add(b"gAMA", struct.pack(">I", 45455))
+    data = sprite_png(pnginfo=info)
+    assert png_optimize.optimize_png(data) is data  # colour-managed: passed through
+    out = png_optimize.optimize_png(data, keep_chunks=("gAMA",))
+    assert "gAMA" in chunk_names(out) and pixels(out) == pixels(data)
+
+
+def test_sixteen_bit_passes_through():
+    img = Image.new("I;16", (8, 8), 40000)
+    buf = io.BytesIO()
+    img.save(buf, "PNG")
+    data = buf.getvalue()
+    assert png_optimize.optimize_png(data) is data
+
+
+def test_resize_and_quantize():
+    out = png_optimize.optimize_png(sprite_png(), resize=(12, 8), resample="nearest", quantize=2)
+    with Image.open(io.BytesIO(out)) as img:
+        assert img.size == (12, 8)
+    rgba = pixels(out)
+    assert len({rgba[i:i + 4] for i in range(0, len(rgba), 4)}) <= 2
+
+
+def test_optimize_file_keeps_smaller_original(tmp_path):
+    src = tmp_path / "src.png"
+    src.write_bytes(sprite_png())
+    dst = tmp_path / "cache" / "out.png"
+    size_in, size_out = png_optimize.optimize_file(src, dst, {"keep_chunks": ()})
+    assert (size_in, size_out) == (src.stat().st_size, dst.stat().st_size)
+    assert size_out <= size_in and pixels(dst.read_bytes()) == pixels(src.read_bytes())
+
+
+def test_build_optimizes_outputs_once_per_source(tmp_path, run_build):
+    src = make_sources(tmp_path / "gen", 8)
+    out = tmp_path / "assets"
+    stats = run_build(src, out, "--optimize")
+    assert stats["optimize"]["optimized"] == stats["optimize"]["encoded"] == 8
+    for n in range(8):
+        source = next(src.rglob(f"{n:03d}_*.png"))
+        assert pixels((out / f"{n}.png").read_bytes()) == pixels(source.read_bytes())
+        assert not (out / f"{n}.png").samefile(next((tmp_path / ".build_cache" / "png").glob("*.png")))
+
+    # A full rebuild re-materializes every PNG but takes the encodes from the cache
+    stats = run_build(src, out, "--optimize", "--full")
+    assert (stats["optimize"]["optimized"], stats["optimize"]["cache_hits"]) == (8, 8)
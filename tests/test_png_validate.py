@@ -0,0 +1,64 @@
+import struct
+import zlib
+
+import pytest
+
+from audit_nfts import PNG_SIGNATURE, validate_png_stream
+from bench import _chunk
+
+SIZE = 8
+RAW = b"".join(b"\0" + bytes(range(i, i + 4 * SIZE)) for i in range(SIZE))  # filter byte + RGBA row
+IHDR = _chunk(b"IHDR", struct.pack(">IIBBBBB", SIZE, SIZE, 8, 6, 0, 0, 0))
+IEND = _chunk(b"IEND", b"")
+
+
+def png(*chunks):
+    return PNG_SIGNATURE + b"".join(chunks)
+
+
+def idat(raw=RAW):
+    return _chunk(b"IDAT", zlib.compress(raw, 9))
+
+
+def check(tmp_path, data, buffer_size=64 * 1024):
+    path = tmp_path / "t.png"
+    path.write_bytes(data)
+    return validate_png_stream(path, buffer_size)
+
+
+@pytest.mark.parametrize("buffer_size", [64 * 1024, 7])
+def test_valid_png_passes(tmp_path, buffer_size):
+    stream = zlib.compress(RAW, 9)
+    split = png(IHDR, _chunk(b"IDAT", stream[:10]), _chunk(b"IDAT", stream[10:]), IEND)
+    for data in (png(IHDR, idat(), IEND), split):
+        info, error = check(tmp_path, data, buffer_size)
+        assert error is None
+        assert (info["width"], info["height"]) == (SIZE, SIZE)
+
+
+def test_bad_crc_is_rejected(tmp_path):
+    chunk = bytearray(idat())
+    chunk[-1] ^= 0xFF
+    assert check(tmp_path, png(IHDR, bytes(chunk), IEND)) == (None, "CRC mismatch in IDAT chunk (chunk 2)")
+
+
+def test_corrupt_idat_with_valid_crc_is_rejected(tmp_path):
+    stream = bytearray(zlib.compress(RAW, 9))
+    stream[2] ^= 0xFF
+    _info, error = check(tmp_path, png(IHDR, _chunk(b"IDAT", bytes(stream)), IEND))
+    assert error.startswith("Corrupt IDAT data")
+
+
+@pytest.mark.parametrize("data, error", [
+    (png(IHDR, _chunk(b"IDAT", zlib.compress(RAW, 9)[:-12]), IEND), "IDAT stream is incomplete"),
+    (png(IHDR, idat(RAW[:-SIZE]), IEND), f"IDAT decodes to {len(RAW) - SIZE:,}B but IHDR implies {len(RAW):,}B"),
+    (png(IHDR, idat(RAW + b"\0" * SIZE), IEND), "IDAT decompresses to more than"),
+    (png(IHDR, idat())[:-30], "Truncated IDAT chunk"),
+    (png(IHDR, idat()), "Truncated: missing IEND chunk"),
+    (png(IHDR, IEND), "No IDAT chunk"),
+    (png(idat(), IHDR, IEND), "Missing IHDR chunk"),
+])
+def test_truncated_or_mis_sized_idat_is_rejected(tmp_path, data, error):
+    info, message = check(tmp_path, data)
+    assert info is None
+    assert message.startswith(error)
@@ -0,0 +1,51 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from helpers import attrs  # noqa: E402
+from rarity import competition_rank, compute_rarity  # noqa: E402
+
+# Element: Fire 3/4, Water 1/4. Hat: Yes 1/4, missing ("None") 3/4.
+ITEMS = [
+    (10, attrs(("Element", "Fire"), ("Hat", "Yes"))),
+    (11, attrs(("Element", "Fire"))),
+    (12, attrs(("Element", "Water"))),
+    (13, attrs(("Element", "Fire"))),
+]
+ENTROPY = 2 * (-0.75 * math.log2(0.75) - 0.25 * math.log2(0.25))
+
+
+def test_competition_rank_shares_ties():
+    assert competition_rank(np.array([3.0, 1.0, 3.0, 2.0])).tolist() == [1, 4, 1, 3]
+    assert competition_rank(np.array([0.1 + 0.2, 0.3])).tolist() == [1, 1]  # rounded before comparing
+
+
+def test_frequencies_count_missing_traits_as_none():
+    report = compute_rarity(ITEMS)
+    assert report["items"] == 4
+    assert report["trait_frequencies"] == {
+        "Element": {"Fire": {"count": 3, "frequency": 0.75}, "Water": {"count": 1, "frequency": 0.25}},
+        "Hat": {"None": {"count": 3, "frequency": 0.75}, "Yes": {"count": 1, "frequency": 0.25}},
+    }
+
+
+def test_scores_and_ranks():
+    tokens = {t["index"]: t for t in compute_rarity(ITEMS)["tokens"]}
+    rare = -math.log2(0.75) - math.log2(0.25)  # one common and one rare value
+    common = -2 * math.log2(0.75)
+    assert tokens[10]["information_content"] == pytest.approx(rare / ENTROPY, abs=1e-6)
+    assert tokens[11]["information_content"] == pytest.approx(common / ENTROPY, abs=1e-6)
+    assert tokens[10]["statistical_rarity"] == pytest.approx(0.1875)
+    assert tokens[11]["rarity_score"] == pytest.approx(8 / 3, abs=1e-4)
+    assert tokens[12]["rarity_score"] == pytest.approx(4 + 4 / 3, abs=1e-4)
+    assert [tokens[i]["rank"] for i in (10, 11, 12, 13)] == [1, 3, 1, 3]
+
+
+def test_uniform_collection_and_empty_input():
+    same = [(i, attrs(("Element", "Fire"))) for i in range(3)]
+    tokens = compute_rarity(same)["tokens"]
+    assert [t["rank"] for t in tokens] == [1, 1, 1]
+    assert [t["information_content"] for t in tokens] == [0.0, 0.0, 0.0]
+    assert compute_rarity([]) == {"items": 0, "trait_frequencies": {}, "tokens": []}
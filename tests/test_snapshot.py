@@ -0,0 +1,145 @@
+import json
+import os
+import struct
+
+import pytest
+
+import snapshot
+from helpers import attrs, write_item_json
+from snapshot import Snapshot, snapshot_bytes, snapshot_is_current, write_snapshot
+from trait_query import TraitIndex
+
+
+# Non-contiguous indices, a trait some items lack, a trait repeated within one item and a non-ASCII value
+ITEMS = [
+    (0, attrs(("Element", "Fire"), ("Type", "Mushroom"), ("Strain", "Pink Kush"))),
+    (2, attrs(("Element", "Water"), ("Type", "Plant"))),
+    (5, attrs(("Element", "Fire"), ("Strain", "Blue Dream"), ("Strain", "Pink Kush"), ("Accessory", "Crôwn"))),
+    (9, attrs(("Element", "Earth"), ("Type", "Mushroom"))),
+]
+
+
+@pytest.fixture
+def snap(tmp_path):
+    path = tmp_path / snapshot.SNAPSHOT_NAME
+    write_snapshot(ITEMS, path)
+    with Snapshot(path) as s:
+        yield s
+
+
+def test_preamble_and_column_alignment():
+    data = snapshot_bytes(ITEMS)
+    magic, version, header_len = snapshot.PREAMBLE.unpack_from(data)
+    assert (magic, version) == (snapshot.MAGIC, snapshot.VERSION)
+    header = json.loads(data[snapshot.PREAMBLE.size:snapshot.PREAMBLE.size + header_len].decode("utf-8"))
+    assert header["items"] == len(ITEMS)
+    for spec in header["columns"].values():
+        assert spec["offset"] % snapshot.ALIGN == 0
+        assert spec["offset"] >= snapshot.PREAMBLE.size + header_len
+    assert len(data) % snapshot.ALIGN == 0
+
+
+def test_encode_columns_layouts_and_codes():
+    header, columns = snapshot.encode_columns(ITEMS)
+    cols = {name: list(col) for name, col in columns}
+    assert header["items"] == 4
+    assert cols["index"] == [0, 2, 5, 9]
+
+    element = header["traits"]["Element"]
+    assert element["layout"] == "dense"
+    assert element["values"] == ["Fire", "Water", "Earth"]
+    assert element["counts"] == [2, 1, 1]
+    assert cols["Element/codes"] == [0, 1, 0, 2]
+
+    assert header["traits"]["Type"]["layout"] == "dense"
+    assert cols["Type/codes"] == [0, 1, -1, 0]
+
+    strain = header["traits"]["Strain"]
+    assert strain["layout"] == "csr"
+    assert strain["values"] == ["Pink Kush", "Blue Dream"]
+    assert strain["counts"] == [2, 1]
+    assert cols["Strain/offsets"] == [0, 1, 1, 3, 3]
+    assert cols["Strain/codes"] == [0, 1, 0]
+
+
+def test_round_trip_columns(snap):
+    assert snap.items == 4
+    assert list(snap.index) == [0, 2, 5, 9]
+    assert list(snap.column("Type/codes")) == [0, 1, -1, 0]
+    assert list(snap.column("Strain/offsets")) == [0, 1, 1, 3, 3]
+    assert list(snap.column("Strain/codes")) == [0, 1, 0]
+    assert snap.values("Accessory") == ["Crôwn"]
+
+
+def test_round_trip_codes_and_rows(snap):
+    assert snap.code("Type", "Plant") == 1
+    assert snap.code("Type", "Tree") is None
+    assert snap.code("Missing", "Anything") is None
+    assert snap.item_codes("Type", 2) == []
+    assert snap.item_codes("Strain", 2) == [1, 0]
+    assert snap.item_codes("Strain", 1) == []
+    assert snap.rows_with("Element", "Fire") == [0, 2]
+    assert snap.rows_with("Strain", "Pink Kush") == [0, 2]
+    assert snap.rows_with("Strain", "Blue Dream") == [2]
+    assert snap.rows_with("Type", "Tree") == []
+
+
+def test_round_trip_attributes(snap):
+    for row, (_idx, original) in enumerate(ITEMS):
+        rebuilt = snap.attributes(row)
+        # Grouped by trait type, so compare as multisets
+        assert sorted(map(tuple, (a.values() for a in rebuilt))) == sorted(map(tuple, (a.values() for a in original)))
+
+
+def test_empty_collection(tmp_path):
+    path = tmp_path / snapshot.SNAPSHOT_NAME
+    write_snapshot([], path)
+    with Snapshot(path) as s:
+        assert s.items == 0
+        assert list(s.index) == []
+        assert s.traits == {}
+
+
+def test_write_snapshot_skips_identical(tmp_path):
+    path = tmp_path / snapshot.SNAPSHOT_NAME
+    assert write_snapshot(ITEMS, path) is True
+    assert write_snapshot(ITEMS, path) is False
+    assert write_snapshot(ITEMS[:2], path) is True
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(struct.pack("<4sII", b"NOPE", 1, 0) + b"\0" * 8)
+    with pytest.raises(ValueError):
+        Snapshot(path)
+    path.write_bytes(struct.pack("<4sII", snapshot.MAGIC, snapshot.VERSION + 1, 0) + b"\0" * 8)
+    with pytest.raises(ValueError):
+        Snapshot(path)
+
+
+def test_edited_json_makes_the_snapshot_stale(tmp_path):
+    for idx, item_attrs in ITEMS:
+        write_item_json(tmp_path, idx, item_attrs)
+    path = tmp_path / snapshot.SNAPSHOT_NAME
+    write_snapshot(ITEMS, path)
+    assert snapshot_is_current(path)
+    assert TraitIndex.load(tmp_path).query("Type=Plant") == [2]
+
+    # A hand edit after the build: the snapshot still says Plant, the JSON doesn't
+    write_item_json(tmp_path, 2, attrs(("Element", "Water"), ("Type", "Tree")))
+    os.utime(tmp_path / "2.json", ns=(0, 0))
+    assert not snapshot_is_current(path)
+    index = TraitIndex.load(tmp_path)
+    assert index.query("Type=Plant") == []
+    assert index.query("Type=Tree") == [2]
+
+    # Rewriting the snapshot (as the build and patch_metadata.py do) makes it current again
+    write_snapshot([(2, attrs(("Type", "Tree"))) if idx == 2 else (idx, a) for idx, a in ITEMS], path)
+    assert snapshot_is_current(path)
+
+
+def test_snapshot_without_state_is_not_trusted(tmp_path):
+    path = tmp_path / snapshot.SNAPSHOT_NAME
+    write_snapshot(ITEMS, path)
+    (tmp_path / snapshot.SNAPSHOT_STATE_NAME).unlink()
+    assert not snapshot_is_current(path)
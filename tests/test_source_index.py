@@ -0,0 +1,52 @@
+import pytest
+
+import build_assets as ba
+from helpers import make_sources
+from source_index import SourceIndex, index_path_for, load_source_index
+
+
+@pytest.fixture
+def src(tmp_path, monkeypatch):
+    monkeypatch.setattr(ba, "BUILD_CACHE_DIR", tmp_path / "cache")
+    src = make_sources(tmp_path / "gen", 30)
+    monkeypatch.setattr(ba, "SRC_IMAGES_DIR", src)
+    return src
+
+
+def tree(root):
+    return sorted(p.relative_to(root) for p in root.rglob("*"))
+
+
+def test_index_lives_in_the_build_cache(tmp_path, src):
+    before = tree(src)
+    index = load_source_index(src)
+    assert tree(src) == before  # nothing written into the source tree
+    assert index.index_path == index_path_for(src)
+    assert index.index_path.parent == tmp_path / "cache" / "source_index"
+    assert index.index_path.exists()
+    assert index_path_for(tmp_path / "other") != index.index_path
+
+
+def test_index_matches_discover_images(src):
+    index = load_source_index(src)
+    assert [(i, src / rel) for i, rel in index.items()] == ba.discover_images()
+    idx, path = ba.discover_images()[5]
+    assert index.lookup(idx) == path
+
+
+def test_refresh_rescans_only_changed_dirs(src):
+    first = load_source_index(src)
+    assert first.rescanned == len(first.dirs) > 1
+    assert load_source_index(src).rescanned == 0
+
+    moved = next(p for p in src.rglob("*.png") if p.parent != src)
+    moved.rename(src / moved.name)
+    again = load_source_index(src)
+    assert again.rescanned == 2  # the root and the folder the file left
+    assert again.lookup(ba.source_index_of(moved.name)) == src / moved.name
+
+
+def test_index_of_another_dir_is_not_reused(tmp_path, src):
+    path = load_source_index(src).index_path
+    other = SourceIndex(tmp_path / "elsewhere", path).load()
+    assert other.dirs == {}
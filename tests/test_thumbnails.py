@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+pytest.importorskip("PIL")
+
+from PIL import Image  # noqa: E402
+
+import bench  # noqa: E402
+import build_assets as ba  # noqa: E402
+import thumbnails  # noqa: E402
+from helpers import make_sources  # noqa: E402
+
+ITEMS = 6
+
+
+@pytest.fixture
+def tiers(monkeypatch):
+    monkeypatch.setattr(ba, "THUMBNAIL_SIZES", (4, 8, 32))
+    monkeypatch.setattr(ba, "THUMBNAIL_FORMATS", ("png", "webp"))
+
+
+def test_render_tiers_keeps_aspect_and_never_enlarges(tmp_path):
+    src = tmp_path / "wide.png"
+    Image.new("RGBA", (20, 10), (10, 200, 30, 255)).save(src)
+    out = tmp_path / "tiers"
+    written = thumbnails.render_tiers(src, out, sizes=(4, 16, 64), formats=("png", "webp"))
+    assert set(written) == set(thumbnails.tier_names((4, 16, 64), ("png", "webp")))
+    expected = {4: (4, 2), 16: (16, 8), 64: (20, 10)}
+    for size, dims in expected.items():
+        for fmt in ("png", "webp"):
+            with Image.open(out / f"{size}.{fmt}") as img:
+                assert img.size == dims
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+def test_build_writes_lists_and_reuses_tiers(tmp_path, run_build, monkeypatch, tiers):
+    monkeypatch.setattr(ba, "THUMBNAILS_IN_METADATA", True)
+    src = make_sources(tmp_path / "gen", ITEMS)
+    out = tmp_path / "assets"
+    stats = run_build(src, out, "--thumbnails")
+    assert (stats["thumbnails"]["items_updated"], stats["thumbnails"]["files_written"]) == (ITEMS, ITEMS * 6)
+    thumbs = out / ba.THUMBNAIL_DIR
+    with Image.open(thumbs / "2-8.png") as img:
+        assert img.size == (8, 8)
+    with Image.open(thumbs / "2-32.webp") as img:
+        assert img.size == (bench.PNG_SIZE, bench.PNG_SIZE)  # never enlarged
+
+    files = json.loads((out / "2.json").read_text(encoding="utf-8"))["properties"]["files"]
+    assert files[0] == {"uri": "2.png", "type": "image/png"}
+    assert {"uri": f"{ba.THUMBNAIL_DIR}/2-4.webp", "type": "image/webp"} in files
+    assert len(files) == 7
+
+    stats = run_build(src, out, "--thumbnails")
+    assert (stats["thumbnails"]["items_updated"], stats["thumbnails"]["rendered"]) == (0, 0)
+
+    # A full rebuild re-copies every tier, but from the cache
+    stats = run_build(src, out, "--thumbnails", "--full")
+    assert (stats["thumbnails"]["items_updated"], stats["thumbnails"]["cache_hits"]) == (ITEMS, ITEMS)
+
+
+def test_removed_item_loses_its_tiers(tmp_path, run_build, tiers):
+    src = make_sources(tmp_path / "gen", ITEMS)
+    out = tmp_path / "assets"
+    run_build(src, out, "--thumbnails")
+    next(src.rglob("005_*.png")).unlink()
+    stats = run_build(src, out, "--thumbnails")
+    assert stats["thumbnails"]["removed"] == 6
+    assert not list((out / ba.THUMBNAIL_DIR).glob("5-*"))
+    assert len(list((out / ba.THUMBNAIL_DIR).iterdir())) == (ITEMS - 1) * 6
+    # Tiers are not listed unless THUMBNAILS_IN_METADATA is on
+    assert len(json.loads((out / "0.json").read_text(encoding="utf-8"))["properties"]["files"]) == 1
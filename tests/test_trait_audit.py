@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from helpers import attrs, write_item_json
+from trait_audit import AUDIT_NAME, AUDIT_STATE_NAME, TraitAudit
+
+FIRE = attrs(("Element", "Fire"), ("Type", "Mushroom"))
+WATER = attrs(("Element", "Water"), ("Type", "Plant"))
+VARIANT = attrs(("Variant", "2"))
+
+
+@pytest.fixture
+def audited(tmp_path):
+    write_item_json(tmp_path, 0, FIRE)
+    write_item_json(tmp_path, 1, WATER)
+    audit = TraitAudit.load(tmp_path)
+    audit.refresh(tmp_path)
+    audit.save()
+    return tmp_path
+
+
+def counts(assets_dir):
+    audit = TraitAudit.load(assets_dir)
+    return dict(audit.trait_counts), {tt: dict(refs) for tt, refs in audit.value_refs.items()}
+
+
+def test_audit_holds_counts_and_sidecar_holds_file_state(audited):
+    data = json.loads((audited / AUDIT_NAME).read_text(encoding="utf-8"))
+    assert "files" not in data
+    assert data["trait_types_seen"] == {"Element": 2, "Type": 2}
+    assert data["unique_values_by_trait"]["Type"] == ["Mushroom", "Plant"]
+    state = json.loads((audited / AUDIT_STATE_NAME).read_text(encoding="utf-8"))
+    assert list(state["files"]) == ["0.json", "1.json"]
+    assert TraitAudit.load(audited).files["1.json"]["attributes"] == WATER
+
+
+def test_sidecar_for_another_audit_is_ignored(audited):
+    path = audited / AUDIT_NAME
+    path.write_text(path.read_text(encoding="utf-8") + " ", encoding="utf-8")
+    assert TraitAudit.load(audited).files is None
+
+
+def test_refresh_counts_only_changed_files(audited):
+    write_item_json(audited, 1, FIRE)
+    (audited / "0.json").unlink()
+    write_item_json(audited, 2, WATER)
+    audit = TraitAudit.load(audited)
+    assert audit.refresh(audited) == ["1.json", "2.json", "0.json"]
+    audit.save()
+    assert counts(audited) == ({"Element": 2, "Type": 2},
+                               {"Element": {"Fire": 1, "Water": 1}, "Type": {"Mushroom": 1, "Plant": 1}})
+    assert TraitAudit.load(audited).refresh(audited) == []
+
+
+def test_update_file_uses_recorded_attributes(audited):
+    audit = TraitAudit.load(audited)
+    audit.files["0.json"]["attributes"] = FIRE + VARIANT  # as the build records it: Variant counted, not in N.json
+    audit.apply_delta([], VARIANT)
+    path = write_item_json(audited, 0, WATER)
+    audit.update_file(path, attrs(("Element", "Stale")), WATER)
+    assert audit.files["0.json"]["attributes"] == WATER + VARIANT
+    assert dict(audit.trait_counts) == {"Element": 2, "Type": 2, "Variant": 1}
+    assert dict(audit.value_refs["Element"]) == {"Water": 2}
+
+
+def test_update_file_without_recorded_state_uses_old_attrs(audited):
+    audit = TraitAudit.load(audited)
+    del audit.files["1.json"]  # e.g. written by a tool that doesn't keep file state
+    path = write_item_json(audited, 1, FIRE)
+    audit.update_file(path, WATER, FIRE)
+    assert dict(audit.trait_counts) == {"Element": 2, "Type": 2}
+    assert dict(audit.value_refs["Element"]) == {"Fire": 2}
+    assert audit.files["1.json"]["attributes"] == FIRE
+
+
+def test_unchanged_collection_saves_identical_bytes(audited):
+    before = (audited / AUDIT_NAME).read_bytes()
+    audit = TraitAudit.load(audited)
+    assert audit.refresh(audited) == []
+    audit.save()
+    assert (audited / AUDIT_NAME).read_bytes() == before
+    assert TraitAudit.load(audited).files is not None
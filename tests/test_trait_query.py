@@ -0,0 +1,102 @@
+import pytest
+
+from helpers import attrs, write_item_json
+from snapshot import SNAPSHOT_NAME, snapshot_is_current, write_snapshot
+from trait_query import QueryError, TraitIndex, compile_query, tokenize
+
+
+ITEMS = [
+    (0, attrs(("Element", "Fire"), ("Type", "Mushroom"), ("Strain", "Pink Kush"), ("Sprite Color", "Pink"))),
+    (1, attrs(("Element", "Water"), ("Type", "Plant"))),
+    (3, attrs(("Element", "Fire"), ("Type", "Mushroom"))),
+    (4, attrs(("Element", "Earth"), ("Strain", "Blue Dream"), ("Strain", "Pink Kush"), ("Accessory", "Hat"))),
+    (7, attrs(("Element", "Water"), ("Type", "Mushroom"), ("Sprite Color", "Pink"), ("Accessory", "Hat AND Feather"))),
+]
+
+
+@pytest.fixture(params=["snapshot", "json"])
+def index(request, tmp_path):
+    for idx, item_attrs in ITEMS:
+        write_item_json(tmp_path, idx, item_attrs)
+    if request.param == "snapshot":
+        write_snapshot(ITEMS, tmp_path / SNAPSHOT_NAME)
+        assert snapshot_is_current(tmp_path / SNAPSHOT_NAME)
+    return TraitIndex.load(tmp_path)
+
+
+def test_tokenize_joins_multi_word_names():
+    kinds = [(kind, text) for kind, text, _pos in tokenize("Sprite Color=Pink Kush AND NOT (Type = Plant)")]
+    assert kinds == [
+        ("NAME", "Sprite Color"), ("=", "="), ("NAME", "Pink Kush"), ("AND", "AND"), ("NOT", "NOT"),
+        ("(", "("), ("NAME", "Type"), ("=", "="), ("NAME", "Plant"), (")", ")"),
+    ]
+
+
+def test_tokenize_quotes_and_keywords():
+    kinds = [(kind, text) for kind, text, _pos in tokenize('Accessory="Hat AND Feather" or type=*')]
+    assert kinds == [("NAME", "Accessory"), ("=", "="), ("NAME", "Hat AND Feather"), ("OR", "or"),
+                     ("NAME", "type"), ("=", "="), ("NAME", "*")]
+
+
+def test_terms(index):
+    assert index.query("Element=Fire") == [0, 3]
+    assert index.query("Sprite Color=Pink") == [0, 7]
+    assert index.query("Strain=Pink Kush") == [0, 4]
+    assert index.query('Accessory="Hat AND Feather"') == [7]
+    assert index.query("Element=Lava") == []
+    assert index.query("Mood=Happy") == []
+
+
+def test_case_insensitive(index):
+    assert index.query("element=FIRE and type=mushroom") == [0, 3]
+
+
+def test_wildcard(index):
+    assert index.query("Strain=*") == [0, 4]
+    assert index.query("NOT Strain=*") == [1, 3, 7]
+    assert index.query("Type=Mushroom AND NOT Strain=*") == [3, 7]
+
+
+def test_and_binds_tighter_than_or(index):
+    # Element=Earth OR (Element=Fire AND Type=Plant) -> only the Earth item
+    assert index.query("Element=Earth OR Element=Fire AND Type=Plant") == [4]
+    assert index.query("(Element=Earth OR Element=Fire) AND Type=Mushroom") == [0, 3]
+    assert index.query("Type=Plant AND Element=Water OR Accessory=Hat") == [1, 4]
+
+
+def test_not_binds_tighter_than_and(index):
+    assert index.query("NOT Element=Fire AND Type=Mushroom") == [7]
+    assert index.query("NOT (Element=Fire AND Type=Mushroom)") == [1, 4, 7]
+    assert index.query("NOT NOT Element=Water") == [1, 7]
+
+
+def test_count_and_bitmap(index):
+    assert index.count("Type=Mushroom") == 3
+    assert index.count("NOT Element=*") == 0
+    assert index.bitmap("Element=Fire") == 0b101  # rows, not final indices
+
+
+@pytest.mark.parametrize("expr", [
+    "",
+    "Type",
+    "Type=",
+    "=Mushroom",
+    "Type=Mushroom AND",
+    "Type=Mushroom OR OR Type=Plant",
+    "(Type=Mushroom",
+    "Type=Mushroom)",
+    "NOT",
+    'Type="Mushroom',
+    "Type==Mushroom",
+])
+def test_malformed_queries(expr):
+    with pytest.raises(QueryError):
+        compile_query(expr)
+
+
+def test_error_names_the_position():
+    assert issubclass(QueryError, ValueError)
+    with pytest.raises(QueryError, match="expected NAME at end"):
+        compile_query("Type=Mushroom AND")
+    with pytest.raises(QueryError, match="expected END at 13"):
+        compile_query("Type=Mushroom)")
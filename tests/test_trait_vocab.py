@@ -0,0 +1,85 @@
+import json
+import shutil
+
+import pytest
+
+import build_assets as ba
+import check_deep
+import trait_vocab
+from helpers import make_sources
+from trait_vocab import cache_path, load_vocab
+
+
+@pytest.fixture
+def vocab_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(trait_vocab, "_LOADED", {})
+    path = tmp_path / "trait_vocab.json"
+    shutil.copy(trait_vocab.VOCAB_FILE, path)
+    return path
+
+
+def edit(path, **changes):
+    doc = json.loads(path.read_text(encoding="utf-8"))
+    doc.update(changes)
+    path.write_text(json.dumps(doc), encoding="utf-8")
+
+
+def test_compiles_once_then_loads_the_cache(vocab_file, monkeypatch):
+    vocab = load_vocab(vocab_file)
+    assert cache_path(vocab_file).exists()
+    assert vocab.type_aliases == ba.VOCAB.type_aliases
+    assert load_vocab(vocab_file) is vocab  # memoized per file
+
+    monkeypatch.setattr(trait_vocab, "_LOADED", {})
+    monkeypatch.setattr(trait_vocab, "compile_vocab", lambda *a: pytest.fail("cache not used"))
+    cached = load_vocab(vocab_file)
+    assert cached is not vocab
+    assert cached.tables() == vocab.tables() and cached.matcher == vocab.matcher
+
+
+def test_edited_json_is_recompiled(vocab_file):
+    vocab = load_vocab(vocab_file)
+    edit(vocab_file, type_aliases={**vocab.type_aliases, "fungus": "Mushroom"})
+    edited = load_vocab(vocab_file)
+    assert edited.type_aliases["fungus"] == "Mushroom"
+    assert edited.matcher["tokens"]["fungus"][1] == "Mushroom"
+
+
+def test_unreadable_cache_is_rebuilt(vocab_file):
+    vocab = load_vocab(vocab_file)
+    cache_path(vocab_file).write_bytes(b"not marshal")
+    trait_vocab._LOADED.clear()
+    assert load_vocab(vocab_file).tables() == vocab.tables()
+    assert cache_path(vocab_file).read_bytes() != b"not marshal"
+
+
+@pytest.mark.parametrize("changes, message", [
+    ({"version": 99}, "unsupported vocab version 99"),
+    ({"elements": "fire"}, "'elements' must be a list of strings"),
+    ({"type_aliases": {"shroom": 1}}, "'type_aliases' must map strings to strings"),
+    ({"phrase_traits": [[["pink"], ["Strain"]]]}, "bad phrase_traits entry"),
+    ({"strain_type_hints": {"Mushroom": "Cubensis"}}, "strain_type_hints.Mushroom"),
+])
+def test_invalid_vocab(vocab_file, changes, message):
+    edit(vocab_file, **changes)
+    with pytest.raises(ValueError, match=message):
+        load_vocab(vocab_file)
+    assert not cache_path(vocab_file).exists()
+
+
+def test_precompiled_matcher_parses_like_a_fresh_compile(tmp_path, monkeypatch):
+    src = make_sources(tmp_path / "gen", 60, seed=3)
+    names = [(p.stem, p.relative_to(src)) for p in src.rglob("*.png")]
+    precompiled = [ba.parse_traits(stem, rel) for stem, rel in names]
+    monkeypatch.setattr(ba, "_TRAIT_MATCHER", ba.TraitMatcher(None))
+    assert [ba.parse_traits(stem, rel) for stem, rel in names] == precompiled
+    assert trait_vocab.compile_matcher(ba.VOCAB.__dict__) == ba.VOCAB.matcher
+
+
+def test_tools_share_one_vocab():
+    import audit_nfts
+
+    assert audit_nfts.VOCAB is ba.VOCAB
+    strain_types = ba.VOCAB.strain_types()
+    assert check_deep.load_vocab().strain_types() == strain_types
+    assert all(strain_types[s] == "Mushroom" for s in ba.MUSHROOM_STRAINS)
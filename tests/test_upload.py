@@ -0,0 +1,221 @@
+import asyncio
+import json
+import random
+import signal
+import threading
+import urllib.request
+
+import pytest
+
+import upload_assets
+from upload_assets import UPLOAD_MANIFEST_NAME, HttpPutBackend, PinataBackend, upload_collection
+from upload_standin import StandinServer
+
+ITEMS = 12
+
+
+@pytest.fixture
+def standin(tmp_path):
+    servers = []
+
+    def start(**faults):
+        server = StandinServer(tmp_path / "store", port=0, **faults)
+        threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def assets(tmp_path):
+    out = tmp_path / "assets"
+    out.mkdir()
+    for n in range(ITEMS):
+        write_item(out, n, f"png-{n}".encode() * 50)
+    (out / "collection.png").write_bytes(b"collection" * 50)
+    (out / "collection.json").write_text(json.dumps({"name": "C", "image": "collection.png"}), encoding="utf-8")
+    return out
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(upload_assets, "BACKOFF_BASE", 0.01)
+    monkeypatch.setattr(upload_assets, "BACKOFF_MAX", 0.05)
+
+
+def write_item(out, n, png):
+    (out / f"{n}.png").write_bytes(png)
+    meta = {"name": f"#{n}", "image": f"{n}.png", "properties": {"files": [{"uri": f"{n}.png", "type": "image/png"}]}}
+    (out / f"{n}.json").write_text(json.dumps(meta), encoding="utf-8")
+
+
+def fetch(uri):
+    with urllib.request.urlopen(uri, timeout=10) as resp:
+        return resp.read()
+
+
+def run(assets, backend, **kwargs):
+    return asyncio.run(upload_collection(assets, backend, **{"concurrency": 8, **kwargs}))
+
+
+def names(assets):
+    return json.loads((assets / UPLOAD_MANIFEST_NAME).read_text(encoding="utf-8"))["backends"]
+
+
+def check_uploaded(assets, key):
+    """Every file has a URI whose content is the local media, or the JSON with rewritten links."""
+    uris = names(assets)[key]["names"]
+    assert len(uris) == 2 * ITEMS + 2
+    for n in [*range(ITEMS), "collection"]:
+        assert fetch(uris[f"{n}.png"]) == (assets / f"{n}.png").read_bytes()
+        meta = json.loads(fetch(uris[f"{n}.json"]))
+        assert meta["image"] == uris[f"{n}.png"]
+    return uris
+
+
+def test_upload_then_rerun_uploads_nothing(standin, assets):
+    server = standin()
+    stats = run(assets, HttpPutBackend(server.url + "/assets", 8))
+    assert stats["failed"] == {}
+    assert stats["uploaded"] == 2 * ITEMS + 2
+    uris = check_uploaded(assets, f"put:{server.url}/assets")
+    meta = json.loads(fetch(uris["3.json"]))
+    assert meta["properties"]["files"][0]["uri"] == uris["3.png"]
+    assert json.loads((assets / "3.json").read_text(encoding="utf-8"))["image"] == "3.png"  # disk untouched
+    # Keep-alive: far fewer connections than requests
+    assert stats["connections"] <= 8
+
+    stored = server.stats["stored"]
+    stats = run(assets, HttpPutBackend(server.url + "/assets", 8))
+    assert (stats["uploaded"], stats["unchanged"], stats["failed"]) == (0, 2 * ITEMS + 2, {})
+    assert server.stats["stored"] == stored
+
+
+def test_changed_media_reuploads_it_and_its_json(standin, assets):
+    server = standin()
+    run(assets, HttpPutBackend(server.url + "/assets", 8))
+    write_item(assets, 5, b"changed" * 40)
+    stats = run(assets, HttpPutBackend(server.url + "/assets", 8))
+    assert stats["uploaded"] == 2
+    check_uploaded(assets, f"put:{server.url}/assets")
+
+
+def test_retries_through_503s_and_dropped_connections(standin, assets):
+    random.seed(1234)
+    server = standin(fail_rate=0.3, drop_rate=0.15)
+    stats = run(assets, HttpPutBackend(server.url + "/assets", 8), retries=30)
+    assert stats["failed"] == {}
+    assert stats["retries"] > 0
+    assert server.stats["failed"] > 0 and server.stats["dropped"] > 0
+    check_uploaded(assets, f"put:{server.url}/assets")
+
+
+def test_failures_are_reported_and_resumed(standin, assets):
+    server = standin(fail_rate=1.0)
+    stats = run(assets, HttpPutBackend(server.url + "/assets", 8), retries=1)
+    assert stats["uploaded"] == 0
+    assert set(stats["failed"]) == {f"{n}.{ext}" for n in [*range(ITEMS), "collection"] for ext in ("png", "json")}
+    assert "HTTP 503" in stats["failed"]["0.png"]
+    assert stats["failed"]["0.json"] == "not uploaded: 0.png"
+
+    server.fail_rate = 0.0
+    stats = run(assets, HttpPutBackend(server.url + "/assets", 8))
+    assert stats["failed"] == {}
+    check_uploaded(assets, f"put:{server.url}/assets")
+
+
+class InterruptingBackend(HttpPutBackend):
+    """Delivers a real SIGINT (as Ctrl-C would) once `after` uploads have finished."""
+
+    def __init__(self, url, after):
+        super().__init__(url, 4)
+        self.after = after
+        self.done = 0
+
+    async def upload(self, name, data, content_type, digest):
+        uri = await super().upload(name, data, content_type, digest)
+        self.done += 1
+        if self.done == self.after:
+            signal.raise_signal(signal.SIGINT)
+        return uri
+
+
+def test_resume_after_ctrl_c(standin, assets):
+    server = standin()
+    key = f"put:{server.url}/assets"
+    with pytest.raises(KeyboardInterrupt):
+        run(assets, InterruptingBackend(server.url + "/assets", after=5), concurrency=4)
+    recorded = len(names(assets)[key]["objects"])
+    assert 5 <= recorded < 2 * ITEMS + 2
+
+    stats = run(assets, HttpPutBackend(server.url + "/assets", 8))
+    assert stats["failed"] == {}
+    assert stats["unchanged"] == recorded
+    assert stats["uploaded"] == 2 * ITEMS + 2 - recorded
+    check_uploaded(assets, key)
+
+
+def test_pinata_backend(standin, assets):
+    server = standin(fail_rate=0.2)
+    backend = PinataBackend(server.url, 8, token="test", gateway=server.url)
+    stats = run(assets, backend, retries=20)
+    assert stats["failed"] == {}
+    uris = check_uploaded(assets, backend.key)
+    assert uris["0.png"].startswith(f"{server.url}/ipfs/bafkrei")
+
+
+class PausingBackend:
+    """Waits `pause` seconds before the `before`-th upload, long enough for the server to drop its idle connection."""
+
+    def __init__(self, *args, before, pause, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.before = before
+        self.pause = pause
+        self.calls = 0
+
+    async def upload(self, name, data, content_type, digest):
+        self.calls += 1
+        if self.calls == self.before:
+            await asyncio.sleep(self.pause)
+        return await super().upload(name, data, content_type, digest)
+
+
+class PausingPinata(PausingBackend, PinataBackend):
+    pass
+
+
+class PausingPut(PausingBackend, HttpPutBackend):
+    pass
+
+
+def test_post_on_a_dropped_idle_connection_is_a_counted_retry(standin, assets):
+    server = standin(idle_timeout=0.2)
+    backend = PausingPinata(server.url, 1, token="test", gateway=server.url, before=4, pause=0.5)
+    stats = run(assets, backend, concurrency=1)
+    assert stats["failed"] == {}
+    # The POST written to the dead connection was not replayed behind the retry counter
+    assert stats["retries"] == 1
+    assert server.stats["requests"] == stats["uploaded"]
+    assert server.stats["connections"] == 2
+    check_uploaded(assets, backend.key)
+
+
+def test_put_on_a_dropped_idle_connection_is_replayed(standin, assets):
+    server = standin(idle_timeout=0.2)
+    backend = PausingPut(server.url + "/assets", 1, before=4, pause=0.5)
+    stats = run(assets, backend, concurrency=1)
+    assert stats["failed"] == {}
+    assert stats["retries"] == 0
+    assert server.stats["connections"] == 2
+    check_uploaded(assets, backend.key)
+
+
+def test_dry_run_sends_nothing(standin, assets):
+    server = standin()
+    stats = run(assets, HttpPutBackend(server.url + "/assets", 8), dry_run=True)
+    assert stats["pending"] == 2 * ITEMS + 2
+    assert server.stats["requests"] == 0
@@ -0,0 +1,97 @@
+import random
+import shutil
+
+import pytest
+
+import bench
+import build_assets as ba
+import fswatch
+from fswatch import Batch, PollingWatcher
+from helpers import make_sources, outputs
+from test_build import VOLATILE
+
+ITEMS = 20
+
+
+@pytest.fixture
+def tree(tmp_path):
+    root = tmp_path / "images"
+    (root / "a").mkdir(parents=True)
+    (root / "out").mkdir()
+    (root / "a" / "1_fire.png").write_bytes(b"one")
+    return root
+
+
+def watchers():
+    yield "polling"
+    if fswatch._libc() is not None:
+        yield "inotify"
+
+
+def open_watcher(kind, root):
+    if kind == "polling":
+        return PollingWatcher(root, [root / "out"], interval=0.01)
+    return fswatch.InotifyWatcher(root, [root / "out"])
+
+
+@pytest.mark.parametrize("kind", list(watchers()))
+def test_reports_png_changes_only(tree, kind):
+    with open_watcher(kind, tree) as watcher:
+        assert watcher.poll(0.05) is None
+        (tree / "a" / "2_water.png").write_bytes(b"two")
+        (tree / "a" / "notes.txt").write_text("ignored")
+        (tree / "out" / "0.png").write_bytes(b"output")  # the build's own output dir
+        batch = watcher.poll(1.0)
+        assert batch == Batch({tree / "a" / "2_water.png"})
+
+        (tree / "a" / "1_fire.png").rename(tree / "a" / "1_earth.png")
+        paths = set()
+        while (batch := watcher.poll(0.1)) is not None:
+            paths |= batch.paths
+        assert paths == {tree / "a" / "1_fire.png", tree / "a" / "1_earth.png"}
+
+
+@pytest.mark.parametrize("kind", list(watchers()))
+def test_moved_folder_asks_for_a_rescan(tree, kind):
+    with open_watcher(kind, tree) as watcher:
+        shutil.move(str(tree / "a"), str(tree / "b"))
+        batch = watcher.poll(1.0)
+        while (more := watcher.poll(0.1)) is not None:
+            batch = batch.merge(more)
+        assert batch.rescan
+
+
+class ScriptedWatcher:
+    def __init__(self, batches):
+        self.batches = list(batches)
+
+    def poll(self, timeout=None):
+        return self.batches.pop(0) if self.batches else None
+
+
+def test_debounce_merges_a_burst():
+    watcher = ScriptedWatcher([Batch({1}), Batch({2}), Batch({3}, rescan=True), None, Batch({4})])
+    it = fswatch.debounced(watcher, quiet=0.01)
+    assert next(it) == Batch({1, 2, 3}, rescan=True)
+    assert next(it) == Batch({4})
+
+
+def test_build_with_changed_sources_equals_full_build(tmp_path, run_build):
+    src = make_sources(tmp_path / "gen", ITEMS)
+    out = tmp_path / "watched"
+    run_build(src, out)
+
+    edited = sorted(src.rglob("*.png"))[4]
+    edited.write_bytes(bench.tiny_png(random.Random(7)))
+    removed = next(src.rglob("009_*.png"))
+    removed.unlink()
+    added = src / "009_fire_mushroom.png"  # slot 9 renamed to new traits
+    added.write_bytes(bench.tiny_png(random.Random(8)))
+
+    stats = ba.build(ba.parse_args([]), sources=ba.discover_images(), changed={edited, removed, added})
+    assert (stats["pngs_copied"], stats["jsons_written"]) == (2, 1)
+    assert "Mushroom" in (out / "9.json").read_text(encoding="utf-8")
+    # The watched build only visited the changed sources, yet matches a clean build
+    full = tmp_path / "full"
+    run_build(src, full, "--full")
+    assert outputs(out, VOLATILE) == outputs(full, VOLATILE)
@@ -0,0 +1,79 @@
+"""
+Preview tiers for the build's optional thumbnail stage (build_assets.WRITE_THUMBNAILS).
+Needs Pillow (pip install pillow); optimized PNG tiers also need NumPy (see png_optimize.py).
+
+Each source is decoded once and downscaled so its longest side is each tier size (aspect
+kept, never enlarged), largest tier first so smaller tiers resample from an already reduced
+image. Tiers are written as <size>.<format> into one folder per source; build_assets.py keeps
+those folders in its build cache and links/copies them into the output's thumbnail folder.
+"""
+
+import io
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from PIL import Image
+
+RESAMPLE = {"lanczos": Image.Resampling.LANCZOS, "nearest": Image.Resampling.NEAREST, "bicubic": Image.Resampling.BICUBIC}
+MIME_TYPES = {"png": "image/png", "webp": "image/webp"}
+
+
+def tier_names(sizes: Sequence[int], formats: Sequence[str]) -> List[str]:
+    return [f"{size}.{fmt}" for size in sizes for fmt in formats]
+
+
+def encode_tier(img: Image.Image, fmt: str, webp_quality: Optional[int] = None, optimize_png: bool = False) -> bytes:
+    buf = io.BytesIO()
+    if fmt == "webp":
+        # Flat-color art is usually smaller lossless than lossy; a quality switches to lossy
+        if webp_quality is None:
+            img.save(buf, "WEBP", lossless=True, quality=100, method=6)
+        else:
+            img.save(buf, "WEBP", quality=webp_quality, method=6)
+        return buf.getvalue()
+    img.save(buf, "PNG", compress_level=9)
+    if optimize_png:
+        import png_optimize
+
+        return min(buf.getvalue(), png_optimize.optimize_png(buf.getvalue()), key=len)
+    return buf.getvalue()
+
+
+def render_tiers(src, out_dir, sizes: Sequence[int], formats: Sequence[str], resample: str = "lanczos",
+                 webp_quality: Optional[int] = None, optimize_png: bool = False) -> Dict[str, int]:
+    """Render every size x format tier of `src` into `out_dir`; returns {file name: bytes}.
+
+    The folder is assembled under a temporary name and renamed into place, so an existing
+    `out_dir` is always complete.
+    """
+    out_dir = Path(out_dir)
+    tmp = out_dir.with_name(f".{out_dir.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    written = {}
+    try:
+        with Image.open(src) as img:
+            img.load()
+            img = img.convert("RGBA")
+        for size in sorted(sizes, reverse=True):
+            scale = min(1.0, size / max(img.size))
+            target = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+            if target != img.size:
+                img = img.resize(target, RESAMPLE[resample])
+            for fmt in formats:
+                data = encode_tier(img, fmt, webp_quality, optimize_png)
+                (tmp / f"{size}.{fmt}").write_bytes(data)
+                written[f"{size}.{fmt}"] = len(data)
+        try:
+            os.rename(tmp, out_dir)
+        except OSError:
+            if not out_dir.is_dir():
+                raise
+            shutil.rmtree(tmp)  # another worker rendered the same source first
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return written
@@ -0,0 +1,207 @@
+"""
+Delta maintenance for candy_machine/assets/_trait_audit.json.
+
+Instead of recounting every N.json, callers report each item's old and new attributes and the
+audit's counts are adjusted in place. Per-value reference counts are kept under
+"value_ref_counts" so a value can be dropped from unique_values_by_trait as soon as its last
+item loses it.
+
+Every N.json that was counted is remembered in the hidden sidecar .trait_audit_state.json
+(size, mtime, BLAKE2 digest and attributes), so refresh() only has to stat the collection and
+re-read the files that changed since the last audit: keeping the audit current costs O(changed
+items). The sidecar records the digest of the audit it belongs to and is ignored when the two
+disagree; the audit itself holds only counts and values, so identical builds give identical bytes.
+"""
+
+import hashlib
+import json
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+AUDIT_NAME = "_trait_audit.json"
+AUDIT_STATE_NAME = ".trait_audit_state.json"
+ITEM_JSON_RE = re.compile(r"^\d+\.json$")
+# Counted by the build but left out of N.json unless INCLUDE_VARIANTS_IN_METADATA is on
+BUILD_ONLY_TRAITS = frozenset({"Variant"})
+
+
+def text_digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def merge_build_only(old_attrs: List[Dict[str, str]], json_attrs: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """An item's audited attributes after its N.json changed to `json_attrs`.
+
+    A JSON without build-only traits can't say anything about them, so the ones recorded in
+    `old_attrs` are kept; the recorded list itself is returned when nothing else changed.
+    """
+    if any(a.get("trait_type") in BUILD_ONLY_TRAITS for a in json_attrs):
+        return json_attrs
+    kept = [a for a in old_attrs if a.get("trait_type") in BUILD_ONLY_TRAITS]
+    if not kept:
+        return json_attrs
+    if [a for a in old_attrs if a.get("trait_type") not in BUILD_ONLY_TRAITS] == json_attrs:
+        return old_attrs
+    return json_attrs + kept
+
+
+def audit_state_text(audit_text: str, files: Dict[str, Dict]) -> str:
+    """The sidecar for an audit written as `audit_text`, with `files` in collection order."""
+    ordered = dict(sorted(files.items(), key=lambda kv: int(kv[0][:-5])))
+    return json.dumps({"audit_digest": text_digest(audit_text.encode("utf-8")), "files": ordered}, indent=2)
+
+
+class TraitAudit:
+    def __init__(self, path: Path, data: Optional[Dict] = None, files: Optional[Dict[str, Dict]] = None) -> None:
+        self.path = Path(path)
+        self.data = data if data is not None else {}
+        self.trait_counts = Counter(self.data.get("trait_types_seen", {}))
+        refs = self.data.get("value_ref_counts")
+        self.value_refs: Optional[Dict[str, Counter]] = (
+            {tt: Counter(vals) for tt, vals in refs.items()} if refs is not None else None
+        )
+        # "N.json" -> {"size", "mtime_ns", "digest", "attributes"} from the sidecar; None when it is
+        # missing or belongs to another audit. "attributes" are the counted ones, so they include
+        # build-only traits the JSON omits.
+        self.files: Optional[Dict[str, Dict]] = files
+
+    @property
+    def state_path(self) -> Path:
+        return self.path.with_name(AUDIT_STATE_NAME)
+
+    @classmethod
+    def load(cls, assets_dir: Path) -> "TraitAudit":
+        path = Path(assets_dir) / AUDIT_NAME
+        try:
+            text = path.read_text(encoding="utf-8")
+            data = json.loads(text)
+        except (OSError, ValueError):
+            return cls(path, {})
+        data.pop("files", None)  # audits that predate the sidecar kept file states inline
+        try:
+            state = json.loads(path.with_name(AUDIT_STATE_NAME).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            state = {}
+        files = state.get("files") if state.get("audit_digest") == text_digest(text.encode("utf-8")) else None
+        return cls(path, data, files)
+
+    def seed_value_refs(self, all_attributes: Iterable[List[Dict[str, str]]]) -> None:
+        """Build value reference counts from every item's current attributes (older audits lack them)."""
+        self.value_refs = {}
+        for attrs in all_attributes:
+            self._count(attrs, +1, counts=False)
+
+    def _count(self, attrs: List[Dict[str, str]], sign: int, counts: bool = True) -> None:
+        for a in attrs:
+            tt = a.get("trait_type", "")
+            vv = a.get("value", "")
+            if counts:
+                self.trait_counts[tt] += sign
+                if self.trait_counts[tt] <= 0:
+                    del self.trait_counts[tt]
+            if vv and self.value_refs is not None:
+                refs = self.value_refs.setdefault(tt, Counter())
+                refs[vv] += sign
+                if refs[vv] <= 0:
+                    del refs[vv]
+                if not refs:
+                    del self.value_refs[tt]
+
+    def apply_delta(self, old_attrs: List[Dict[str, str]], new_attrs: List[Dict[str, str]]) -> None:
+        """Account for one item whose attributes changed from old_attrs to new_attrs."""
+        self._count(old_attrs, -1)
+        self._count(new_attrs, +1)
+
+    def update_file(self, path: Path, old_attrs: List[Dict[str, str]], new_attrs: List[Dict[str, str]],
+                    data: Optional[bytes] = None) -> None:
+        """Account for a rewritten N.json. `data` is its new content if the caller already has it.
+
+        The recorded attributes take precedence over `old_attrs` (they include build-only traits);
+        `old_attrs` is used for a file the audit has no state for.
+        """
+        path = Path(path)
+        if self.files is None:
+            self.apply_delta(old_attrs, new_attrs)
+            return
+        state = self.files.get(path.name)
+        if state is not None:
+            old_attrs = state["attributes"]
+        new_attrs = merge_build_only(old_attrs, new_attrs)
+        self.apply_delta(old_attrs, new_attrs)
+        self.files[path.name] = self._file_state(path, new_attrs, data)
+
+    @staticmethod
+    def _file_state(path: Path, attrs: List[Dict[str, str]], data: Optional[bytes] = None) -> Dict:
+        st = path.stat()
+        if data is None:
+            data = path.read_bytes()
+        return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "digest": text_digest(data), "attributes": attrs}
+
+    def refresh(self, assets_dir: Path) -> List[str]:
+        """Bring the audit up to date with the N.json files in `assets_dir`; returns changed names.
+
+        Files whose size and mtime match the recorded state are skipped without being read;
+        touched-but-identical files are caught by the digest. An audit without file states
+        (written before they existed) is rebuilt from scratch.
+        """
+        if self.files is None:
+            self.files = {}
+            self.trait_counts = Counter()
+            self.value_refs = {}
+        elif self.value_refs is None:
+            self.seed_value_refs(state["attributes"] for state in self.files.values())
+
+        changed = []
+        present = set()
+        with os.scandir(assets_dir) as it:
+            entries = sorted((e for e in it if ITEM_JSON_RE.match(e.name)), key=lambda e: int(e.name[:-5]))
+        for e in entries:
+            present.add(e.name)
+            st = e.stat()
+            state = self.files.get(e.name)
+            if state and state["size"] == st.st_size and state["mtime_ns"] == st.st_mtime_ns:
+                continue
+            data = Path(e.path).read_bytes()
+            digest = text_digest(data)
+            if state and state.get("digest") == digest:
+                state["size"], state["mtime_ns"] = st.st_size, st.st_mtime_ns
+                continue
+            try:
+                attrs = json.loads(data.decode("utf-8")).get("attributes", [])
+            except (UnicodeDecodeError, ValueError, AttributeError):
+                attrs = []  # unreadable JSONs are audit_nfts.py's job; count them as empty
+            old_attrs = state["attributes"] if state else []
+            attrs = merge_build_only(old_attrs, attrs)
+            if attrs != old_attrs:
+                changed.append(e.name)
+            self.apply_delta(old_attrs, attrs)
+            self.files[e.name] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "digest": digest, "attributes": attrs}
+
+        for name in sorted(set(self.files) - present, key=lambda n: int(n[:-5])):
+            self.apply_delta(self.files.pop(name)["attributes"], [])
+            changed.append(name)
+
+        self.data["items_written"] = len(self.files)
+        return changed
+
+    def save(self) -> None:
+        self.data["trait_types_seen"] = dict(self.trait_counts)
+        if self.value_refs is not None:
+            # Keep the existing trait order so an unchanged collection saves identical bytes
+            seen = self.data.get("unique_values_by_trait", {})
+            order = [tt for tt in seen if tt in self.value_refs] + [tt for tt in self.value_refs if tt not in seen]
+            self.data["unique_values_by_trait"] = {tt: sorted(self.value_refs[tt]) for tt in order}
+            self.data["value_ref_counts"] = {tt: dict(sorted(refs.items())) for tt, refs in sorted(self.value_refs.items())}
+        text = json.dumps(self.data, indent=2)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, self.path)
+        if self.files is None:
+            self.state_path.unlink(missing_ok=True)
+            return
+        tmp = self.state_path.with_name(AUDIT_STATE_NAME + ".tmp")
+        tmp.write_text(audit_state_text(text, self.files), encoding="utf-8")
+        os.replace(tmp, self.state_path)
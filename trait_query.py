@@ -0,0 +1,262 @@
+"""
+Trait queries over the generated collection.
+
+Builds an inverted index (trait_type/value -> bitmap of rows, as Python ints) from
+_collection_snapshot.bin, or from the N.json files when there is no snapshot or they changed
+since it was written, and answers boolean expressions with bitwise AND/OR/NOT:
+
+    Type=Mushroom AND NOT Strain=*
+    (Element=Fire OR Element=Water) AND Sprite Color=Pink
+    Strain="Pink Kush" OR Accessory=Hat
+
+Terms are `Trait=Value` or `Trait=*` (item has the trait at all). Names and values may contain
+spaces; quote them if they contain AND/OR/NOT, parentheses or '='. Matching ignores case.
+AND binds tighter than OR.
+
+Usage:
+  python trait_query.py "Type=Mushroom AND NOT Strain=*"        # matching indices
+  python trait_query.py --count "Element=Fire" "Element=Water"
+  echo "Accessory=Hat" | python trait_query.py --json           # one query per stdin line
+"""
+
+import argparse
+import json
+import re
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Tuple
+
+ASSETS_DIR = Path("candy_machine/assets")
+
+
+class QueryError(ValueError):
+    pass
+
+
+def bitmap(rows: Iterable[int], size: int) -> int:
+    buf = bytearray((size + 7) // 8)
+    for r in rows:
+        buf[r >> 3] |= 1 << (r & 7)
+    return int.from_bytes(buf, "little")
+
+
+def bitmap_rows(bits: int) -> List[int]:
+    return [i for i, b in enumerate(reversed(bin(bits))) if b == "1"]
+
+
+# ---- expression parsing ----
+TOKEN_RE = re.compile(r'\s*(?:(?P<paren>[()])|(?P<eq>=)|"(?P<quoted>[^"]*)"|(?P<word>[^\s()="]+))')
+KEYWORDS = {"AND", "OR", "NOT"}
+
+# Compiled query: TraitIndex -> bitmap of matching rows
+Plan = Callable[["TraitIndex"], int]
+
+
+def tokenize(expr: str) -> List[Tuple[str, str, int]]:
+    """Split into (kind, text, position) with kind in: ( ) = AND OR NOT NAME."""
+    tokens = []
+    pos = 0
+    expr = expr.rstrip()
+    open_word = False  # last token is an unquoted name that the next word extends
+    while pos < len(expr):
+        m = TOKEN_RE.match(expr, pos)
+        if not m:
+            raise QueryError(f"unexpected character at {pos}: {expr[pos:pos + 10]!r}")
+        start = m.start(m.lastgroup)
+        word = m.group("word")
+        if m.group("paren"):
+            tokens.append((m.group("paren"), m.group("paren"), start))
+        elif m.group("eq"):
+            tokens.append(("=", "=", start))
+        elif m.group("quoted") is not None:
+            tokens.append(("NAME", m.group("quoted"), start))
+        elif word.upper() in KEYWORDS:
+            tokens.append((word.upper(), word, start))
+        elif open_word:
+            # Unquoted names run across spaces: "Sprite Color", "Pink Kush"
+            _kind, text, at = tokens.pop()
+            tokens.append(("NAME", f"{text} {word}", at))
+        else:
+            tokens.append(("NAME", word, start))
+        open_word = bool(word) and word.upper() not in KEYWORDS
+        pos = m.end()
+    return tokens
+
+
+class _Parser:
+    def __init__(self, expr: str) -> None:
+        self.tokens = tokenize(expr)
+        self.pos = 0
+
+    def peek(self) -> str:
+        return self.tokens[self.pos][0] if self.pos < len(self.tokens) else "END"
+
+    def take(self, kind: str) -> str:
+        if self.peek() != kind:
+            where = self.tokens[self.pos][2] if self.pos < len(self.tokens) else "end"
+            raise QueryError(f"expected {kind} at {where}, got {self.peek()}")
+        text = self.tokens[self.pos][1]
+        self.pos += 1
+        return text
+
+    def parse(self) -> Plan:
+        plan = self.parse_or()
+        if self.peek() != "END":
+            self.take("END")
+        return plan
+
+    def parse_or(self) -> Plan:
+        parts = [self.parse_and()]
+        while self.peek() == "OR":
+            self.take("OR")
+            parts.append(self.parse_and())
+        if len(parts) == 1:
+            return parts[0]
+
+        def union(index: "TraitIndex") -> int:
+            bits = 0
+            for p in parts:
+                bits |= p(index)
+            return bits
+        return union
+
+    def parse_and(self) -> Plan:
+        parts = [self.parse_not()]
+        while self.peek() == "AND":
+            self.take("AND")
+            parts.append(self.parse_not())
+        if len(parts) == 1:
+            return parts[0]
+
+        def intersection(index: "TraitIndex") -> int:
+            bits = parts[0](index)
+            for p in parts[1:]:
+                if not bits:
+                    break
+                bits &= p(index)
+            return bits
+        return intersection
+
+    def parse_not(self) -> Plan:
+        if self.peek() == "NOT":
+            self.take("NOT")
+            inner = self.parse_not()
+            return lambda index: index.universe & ~inner(index)
+        if self.peek() == "(":
+            self.take("(")
+            plan = self.parse_or()
+            self.take(")")
+            return plan
+        trait = self.take("NAME").strip()
+        self.take("=")
+        value = self.take("NAME").strip()
+        if value == "*":
+            return lambda index: index.any_value(trait)
+        return lambda index: index.value(trait, value)
+
+
+@lru_cache(maxsize=1024)
+def compile_query(expr: str) -> Plan:
+    return _Parser(expr).parse()
+
+
+# ---- index ----
+class TraitIndex:
+    def __init__(self, indices: List[int], rows_by_value: Dict[Tuple[str, str], List[int]]) -> None:
+        self.indices = indices
+        size = len(indices)
+        self.universe = (1 << size) - 1
+        self.bitmaps: Dict[Tuple[str, str], int] = {}
+        self.trait_bitmaps: Dict[str, int] = {}
+        for (tt, vv), rows in rows_by_value.items():
+            bits = bitmap(rows, size)
+            self.bitmaps[(tt.lower(), vv.lower())] = bits
+            self.trait_bitmaps[tt.lower()] = self.trait_bitmaps.get(tt.lower(), 0) | bits
+
+    @classmethod
+    def from_snapshot(cls, path: Path) -> "TraitIndex":
+        from snapshot import Snapshot
+
+        rows_by_value: Dict[Tuple[str, str], List[int]] = {}
+        with Snapshot(path) as snap:
+            indices = list(snap.index)
+            for tt, spec in snap.traits.items():
+                per_code: List[List[int]] = [[] for _ in spec["values"]]
+                codes = snap.column(f"{tt}/codes")
+                if spec["layout"] == "dense":
+                    for row, c in enumerate(codes):
+                        if c >= 0:
+                            per_code[c].append(row)
+                else:
+                    offsets = snap.column(f"{tt}/offsets")
+                    for row in range(snap.items):
+                        for c in codes[offsets[row]:offsets[row + 1]]:
+                            per_code[c].append(row)
+                for value, rows in zip(spec["values"], per_code):
+                    rows_by_value[(tt, value)] = rows
+        return cls(indices, rows_by_value)
+
+    @classmethod
+    def from_json(cls, assets_dir: Path) -> "TraitIndex":
+        paths = sorted((p for p in Path(assets_dir).glob("*.json") if p.stem.isdigit()), key=lambda p: int(p.stem))
+        rows_by_value: Dict[Tuple[str, str], List[int]] = {}
+        for row, p in enumerate(paths):
+            for a in json.loads(p.read_text(encoding="utf-8")).get("attributes", []):
+                rows_by_value.setdefault((a["trait_type"], a["value"]), []).append(row)
+        return cls([int(p.stem) for p in paths], rows_by_value)
+
+    @classmethod
+    def load(cls, assets_dir: Path = ASSETS_DIR) -> "TraitIndex":
+        from snapshot import SNAPSHOT_NAME, snapshot_is_current
+
+        path = Path(assets_dir) / SNAPSHOT_NAME
+        return cls.from_snapshot(path) if snapshot_is_current(path) else cls.from_json(assets_dir)
+
+    def value(self, trait_type: str, value: str) -> int:
+        return self.bitmaps.get((trait_type.lower(), value.lower()), 0)
+
+    def any_value(self, trait_type: str) -> int:
+        return self.trait_bitmaps.get(trait_type.lower(), 0)
+
+    def bitmap(self, expr: str) -> int:
+        return compile_query(expr)(self)
+
+    def count(self, expr: str) -> int:
+        return bin(self.bitmap(expr)).count("1")
+
+    def query(self, expr: str) -> List[int]:
+        """Final indices (N of N.json) of the items matching `expr`, ascending."""
+        return sorted(self.indices[r] for r in bitmap_rows(self.bitmap(expr)))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Query the collection's traits")
+    parser.add_argument("queries", nargs="*", help="query expressions (default: one per line on stdin)")
+    parser.add_argument("--assets", type=Path, default=ASSETS_DIR, help="assets dir (default: %(default)s)")
+    parser.add_argument("--count", action="store_true", help="print only the number of matches")
+    parser.add_argument("--json", action="store_true", help="print one JSON object per query")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    index = TraitIndex.load(args.assets)
+    queries = args.queries or (line.strip() for line in sys.stdin)
+    status = 0
+    for expr in queries:
+        if not expr:
+            continue
+        try:
+            matches = index.query(expr)
+        except QueryError as e:
+            print(f"error: {expr}: {e}", file=sys.stderr)
+            status = 2
+            continue
+        if args.json:
+            print(json.dumps({"query": expr, "count": len(matches), "indices": [] if args.count else matches}))
+        elif args.count:
+            print(len(matches))
+        else:
+            print(" ".join(map(str, matches)))
+    sys.exit(status)
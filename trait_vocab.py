@@ -0,0 +1,219 @@
+"""
+Trait vocabulary shared by build_assets.py, audit_nfts.py and check_deep.py.
+
+The tables live in trait_vocab.json (versioned; edit that, not the code). load_vocab() compiles
+them once into a frozen form -- frozensets, alias maps, the phrase trie and the token -> traits
+table parse_traits classifies with -- and caches it next to the JSON as .trait_vocab.cache
+(marshal). Later loads hash the JSON and unmarshal the cache; an edited JSON, a new compiler
+layout or a different Python rebuilds it. Loads are memoized per file, so every tool in one
+process shares the same Vocab.
+
+    vocab = load_vocab()
+    vocab.type_aliases["shroom"]      # "Mushroom"
+    vocab.strain_types()["Kush"]      # "Cannabis"
+"""
+
+import hashlib
+import json
+import marshal
+import os
+import sys
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+
+VOCAB_FILE = Path(__file__).with_name("trait_vocab.json")
+VOCAB_VERSION = 1     # trait_vocab.json "version" this module understands
+COMPILER_VERSION = 1  # bump when the compiled layout below changes
+
+SET_TABLES = ("elements", "strain_tokens", "mushroom_strains", "cannabis_strains", "plant_strains", "extra_color_tokens", "variant_ignore")
+MAP_TABLES = ("type_aliases", "accessory_aliases", "motif_aliases", "color_aliases")
+# Strain -> Type the builder forces, in the order parse_traits checks them
+STRAIN_TYPE_TABLES = (("mushroom_strains", "Mushroom"), ("cannabis_strains", "Cannabis"), ("plant_strains", "Plant"))
+
+_LOADED: Dict[str, "Vocab"] = {}
+
+
+def titleish(s: str) -> str:
+    s = s.replace("-", " ").replace(".", " ").strip()
+    return " ".join(w.capitalize() for w in s.split() if w)
+
+
+def canonical(tables: Mapping) -> Dict:
+    """The matcher tables in trait_vocab.json's layout (sets sorted), for comparing two vocabularies."""
+    out: Dict = {name: sorted(tables[name]) for name in SET_TABLES}
+    out.update((name, dict(tables[name])) for name in MAP_TABLES)
+    out["phrase_traits"] = [[list(phrase), list(trait)] for phrase, trait in tables["phrase_traits"]]
+    return out
+
+
+def compile_matcher(tables: Mapping) -> Dict:
+    """Fold the tables into {"phrase_trie", "tokens"} for build_assets.TraitMatcher.
+
+    Phrases are ranked longest-first (stable on list order). Trie nodes map token -> child
+    node; the None key holds (rank, trait_type, value) for a phrase ending there. "tokens"
+    maps each known token to (element, type, strain, aura, motif, accessory, color).
+    """
+    trie: Dict = {}
+    ranked = sorted(tables["phrase_traits"], key=lambda x: len(x[0]), reverse=True)
+    for rank, (phrase, (tt, val)) in enumerate(ranked):
+        node = trie
+        for token in phrase:
+            node = node.setdefault(token, {})
+        node.setdefault(None, (rank, tt, val))
+
+    elements = tables["elements"]
+    type_aliases = tables["type_aliases"]
+    strain_tokens = tables["strain_tokens"]
+    motifs = tables["motif_aliases"]
+    accessories = tables["accessory_aliases"]
+    colors = tables["color_aliases"]
+    extra_colors = tables["extra_color_tokens"]
+
+    tokens = {}
+    keys = set(elements) | set(type_aliases) | set(strain_tokens) | {"aura"} | set(motifs) | set(accessories) | set(colors) | set(extra_colors)
+    for t in keys:
+        low = t.lower().strip()
+        is_color = (low in colors or low in extra_colors) and low not in elements
+        tokens[t] = (
+            t in elements,
+            type_aliases.get(t),
+            t in strain_tokens,
+            t == "aura",
+            motifs.get(t),
+            accessories.get(t),
+            colors.get(low, titleish(low)) if is_color else None,
+        )
+    return {"phrase_trie": trie, "tokens": tokens}
+
+
+def _check_strings(path, name, value) -> None:
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise ValueError(f"{path}: '{name}' must be a list of strings")
+
+
+def compile_vocab(doc: Dict, path="trait_vocab.json") -> Dict:
+    """Validate a parsed trait_vocab.json and return its compiled (marshal-able) form."""
+    if doc.get("version") != VOCAB_VERSION:
+        raise ValueError(f"{path}: unsupported vocab version {doc.get('version')!r} (expected {VOCAB_VERSION})")
+    for name in SET_TABLES:
+        _check_strings(path, name, doc.get(name))
+    for name in MAP_TABLES:
+        table = doc.get(name)
+        if not isinstance(table, dict) or not all(isinstance(v, str) for v in table.values()):
+            raise ValueError(f"{path}: '{name}' must map strings to strings")
+    phrases = doc.get("phrase_traits")
+    if not isinstance(phrases, list):
+        raise ValueError(f"{path}: 'phrase_traits' must be a list")
+    for entry in phrases:
+        ok = isinstance(entry, list) and len(entry) == 2 and isinstance(entry[0], list) and entry[0] and isinstance(entry[1], list) and len(entry[1]) == 2
+        if not ok or not all(isinstance(v, str) for v in entry[0] + entry[1]):
+            raise ValueError(f"{path}: bad phrase_traits entry {entry!r} (want [[token, ...], [trait_type, value]])")
+    hints = doc.get("strain_type_hints", {})
+    if not isinstance(hints, dict):
+        raise ValueError(f"{path}: 'strain_type_hints' must map a Type to a list of strains")
+    for type_value, strains in hints.items():
+        _check_strings(path, f"strain_type_hints.{type_value}", strains)
+
+    tables: Dict = {name: frozenset(doc[name]) for name in SET_TABLES}
+    tables.update((name, dict(doc[name])) for name in MAP_TABLES)
+    tables["phrase_traits"] = tuple((tuple(phrase), tuple(trait)) for phrase, trait in phrases)
+    return {
+        "tables": tables,
+        "strain_type_hints": {type_value: frozenset(strains) for type_value, strains in hints.items()},
+        "matcher": compile_matcher(tables),
+    }
+
+
+class Vocab:
+    """One compiled vocabulary. Sets are frozensets and maps read-only; copy before editing."""
+
+    def __init__(self, compiled: Dict, path: Path, key: Tuple = ()) -> None:
+        self.path = path
+        self.key = key
+        tables = compiled["tables"]
+        self.elements: frozenset = tables["elements"]
+        self.type_aliases: Mapping[str, str] = MappingProxyType(tables["type_aliases"])
+        self.accessory_aliases: Mapping[str, str] = MappingProxyType(tables["accessory_aliases"])
+        self.motif_aliases: Mapping[str, str] = MappingProxyType(tables["motif_aliases"])
+        self.phrase_traits: Tuple[Tuple[Tuple[str, ...], Tuple[str, str]], ...] = tables["phrase_traits"]
+        self.strain_tokens: frozenset = tables["strain_tokens"]
+        self.mushroom_strains: frozenset = tables["mushroom_strains"]
+        self.cannabis_strains: frozenset = tables["cannabis_strains"]
+        self.plant_strains: frozenset = tables["plant_strains"]
+        self.color_aliases: Mapping[str, str] = MappingProxyType(tables["color_aliases"])
+        self.extra_color_tokens: frozenset = tables["extra_color_tokens"]
+        self.variant_ignore: frozenset = tables["variant_ignore"]
+        self.strain_type_hints: Mapping[str, frozenset] = MappingProxyType(compiled["strain_type_hints"])
+        # Shared with every TraitMatcher built from this vocab; treat as read-only
+        self.matcher: Dict = compiled["matcher"]
+
+    def tables(self) -> Dict:
+        return canonical(vars(self))
+
+    def strain_types(self, hints: bool = True) -> Dict[str, str]:
+        """Strain value -> the Type it implies; `hints` adds strain_type_hints (checks only)."""
+        out: Dict[str, str] = {}
+        groups = [(getattr(self, name), type_value) for name, type_value in STRAIN_TYPE_TABLES]
+        if hints:
+            groups += [(strains, type_value) for type_value, strains in self.strain_type_hints.items()]
+        for strains, type_value in groups:
+            for strain in strains:
+                out.setdefault(strain, type_value)
+        return out
+
+
+def cache_path(path: Path) -> Path:
+    return path.with_name(f".{path.stem}.cache")
+
+
+def _cache_key(source: bytes) -> Tuple:
+    return (COMPILER_VERSION, marshal.version, tuple(sys.version_info[:2]), hashlib.blake2b(source, digest_size=16).hexdigest())
+
+
+def _read_cache(path: Path, key: Tuple) -> Optional[Dict]:
+    try:
+        stored_key, compiled = marshal.loads(cache_path(path).read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    return compiled if stored_key == key else None
+
+
+def _write_cache(path: Path, key: Tuple, compiled: Dict) -> None:
+    dst = cache_path(path)
+    tmp = dst.with_name(f"{dst.name}.{os.getpid()}.tmp")
+    try:
+        tmp.write_bytes(marshal.dumps((key, compiled)))
+        os.replace(tmp, dst)
+    except OSError:
+        # Read-only checkout: keep working from the in-memory compile
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+
+def load_vocab(path: Optional[Path] = None, use_cache: bool = True) -> Vocab:
+    """The compiled vocabulary for `path` (default trait_vocab.json next to this module)."""
+    path = Path(path or VOCAB_FILE)
+    source = path.read_bytes()
+    key = _cache_key(source)
+    memo = _LOADED.get(str(path))
+    if memo is not None and memo.key == key:
+        return memo
+
+    compiled = _read_cache(path, key) if use_cache else None
+    if compiled is None:
+        try:
+            doc = json.loads(source)
+        except ValueError as e:
+            raise ValueError(f"{path}: {e}") from None
+        if not isinstance(doc, dict):
+            raise ValueError(f"{path}: expected a JSON object")
+        compiled = compile_vocab(doc, path)
+        if use_cache:
+            _write_cache(path, key, compiled)
+
+    vocab = Vocab(compiled, path, key)
+    _LOADED[str(path)] = vocab
+    return vocab
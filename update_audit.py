@@ -1,32 +1,35 @@
-import json, os
-from collections import Counter, defaultdict
-
-base = r"d:\00_2026_Files\sol-sprites\solsprites_backup\source_files\assets\images\candy_machine\assets"
-audit_path = os.path.join(base, "_trait_audit.json")
-
-trait_counts = Counter()
-values_by_trait = defaultdict(set)
-
-for idx in range(333):
-    p = os.path.join(base, f"{idx}.json")
-    d = json.load(open(p))
-    for a in d.get("attributes", []):
-        tt = a["trait_type"]
-        vv = a["value"]
-        trait_counts[tt] += 1
-        if vv:
-            values_by_trait[tt].add(vv)
-
-with open(audit_path, "r") as f:
-    audit = json.load(f)
-
-audit["trait_types_seen"] = dict(trait_counts)
-audit["unique_values_by_trait"] = {k: sorted(list(v)) for k, v in values_by_trait.items()}
-
-with open(audit_path, "w") as f:
-    json.dump(audit, f, indent=2)
-
-print("Updated _trait_audit.json")
-for k, v in sorted(trait_counts.items()):
-    print(f"  {k}: {v}")
-print("Type values:", sorted(values_by_trait["Type"]))
+"""
+Bring _trait_audit.json up to date with the collection's N.json files.
+Only files whose size/mtime changed since the last audit are re-read (see trait_audit.py);
+an audit without per-file state is rebuilt from every JSON once.
+
+Usage: python update_audit.py [assets_dir]   (also: python cli.py update-audit ...)
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from trait_audit import TraitAudit
+
+ASSETS_DIR = Path(r"d:\00_2026_Files\sol-sprites\solsprites_backup\source_files\assets\images\candy_machine\assets")
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Bring _trait_audit.json up to date with the collection's N.json files.")
+    parser.add_argument("assets_dir", nargs="?", type=Path, default=ASSETS_DIR, help="collection to audit (default: ASSETS_DIR)")
+    args = parser.parse_args(argv)
+
+    audit = TraitAudit.load(args.assets_dir)
+    changed = audit.refresh(args.assets_dir)
+    audit.save()
+
+    print(f"Updated _trait_audit.json ({len(changed)} of {len(audit.files)} files changed)")
+    for k, v in sorted(audit.trait_counts.items()):
+        print(f"  {k}: {v}")
+    print("Type values:", sorted(audit.value_refs.get("Type", {})))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
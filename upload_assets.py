@@ -0,0 +1,525 @@
+"""
+Bulk upload of the built collection (candy_machine/assets) to a storage backend.
+
+Runs after build_assets.py. Media goes first: every N.png, collection.png and any other local
+file a metadata JSON links to (e.g. thumbs/ when THUMBNAILS_IN_METADATA is on). Then each
+N.json / collection.json is uploaded with those links (image, animation_url,
+properties.files[].uri) rewritten to the uploaded URIs; the JSONs on disk are left alone.
+
+Uploads run on asyncio with at most `concurrency` requests in flight, over keep-alive
+HTTP/1.1 connections that are reused across files. Connection errors, timeouts and
+408/429/5xx answers are retried with exponential backoff and full jitter (Retry-After is
+honoured). A request that fails because the server dropped an idle keep-alive connection is
+replayed at once on a fresh one only if its method is idempotent (PUT); anything else (the
+Pinata POST) goes through the counted retries, since the server may already have acted on it.
+
+_upload_manifest.json in the assets dir maps content hash (SHA-256) -> remote URI per
+backend, and each local file name -> its current URI (what the deploy step needs). It is
+saved every few seconds while uploading and when the run stops, so an interrupted upload
+resumes where it left off and a rerun only uploads files whose content changed. A per-file
+size/mtime cache means unchanged media isn't even re-hashed.
+
+Backends (stdlib only):
+  put     PUT <url>/<sha256><ext>; URI = the response Location, else <url>/<sha256><ext>
+  pinata  POST <url>/pinning/pinFileToIPFS with the bearer token in $PINATA_JWT;
+          URI = <gateway>/ipfs/<CID>
+
+upload_standin.py serves both APIs locally, with injectable failures, for trying this out:
+
+    python upload_standin.py /tmp/store --port 8765 &
+    python upload_assets.py candy_machine/assets --url http://127.0.0.1:8765/assets -j 64
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import ssl
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+ASSETS_DIR = Path("candy_machine/assets")
+UPLOAD_MANIFEST_NAME = "_upload_manifest.json"
+UPLOAD_MANIFEST_VERSION = 1
+CONCURRENCY = 32             # requests in flight (= keep-alive connections per host)
+RETRIES = 5                  # extra attempts per file after the first
+BACKOFF_BASE = 0.5           # seconds; retry n waits a random 0..min(BACKOFF_MAX, BACKOFF_BASE * 2**n)
+BACKOFF_MAX = 30.0
+REQUEST_TIMEOUT = 60.0       # seconds per request, connect included
+MANIFEST_SAVE_SECONDS = 2.0  # how often the manifest is saved while uploading
+PINATA_GATEWAY = "https://gateway.pinata.cloud"
+
+ITEM_RE = re.compile(r"^(\d+|collection)\.(png|json)$")
+CONTENT_TYPES = {".png": "image/png", ".webp": "image/webp", ".gif": "image/gif", ".jpg": "image/jpeg", ".jpeg": "image/jpeg",
+                 ".mp4": "video/mp4", ".glb": "model/gltf-binary", ".json": "application/json"}
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+# Safe to send twice, so replayed on a fresh connection when a reused one turns out to be dead
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"})
+
+
+class UploadError(Exception):
+    def __init__(self, message: str, retryable: bool = False, retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+# ---- HTTP/1.1 over asyncio streams ----
+class Response(NamedTuple):
+    status: int
+    headers: Dict[str, str]  # lower-cased names
+    body: bytes
+
+
+class ConnectionPool:
+    """Keep-alive connections to one origin; at most `size` requests in flight at once."""
+
+    def __init__(self, url: str, size: int = CONCURRENCY, timeout: float = REQUEST_TIMEOUT) -> None:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"not an http(s) URL: {url}")
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.host_header = parts.netloc.rsplit("@", 1)[-1]
+        self.ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self.timeout = timeout
+        self.size = size
+        self.idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self.slots: Optional[asyncio.Semaphore] = None  # created on first use, inside the running loop
+        self.opened = 0
+
+    async def _open(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        conn = await asyncio.open_connection(self.host, self.port, ssl=self.ssl, server_hostname=self.host if self.ssl else None)
+        self.opened += 1
+        return conn
+
+    @staticmethod
+    def _close(conn) -> None:
+        conn[1].close()
+
+    async def _exchange(self, conn, method: str, path: str, headers: Dict[str, str], body: bytes) -> Tuple[Response, bool]:
+        reader, writer = conn
+        head = [f"{method} {path} HTTP/1.1", f"Host: {self.host_header}", f"Content-Length: {len(body)}"]
+        head += [f"{k}: {v}" for k, v in headers.items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("connection closed before a response")
+        version, status, _reason = (status_line.decode("latin-1").rstrip("\r\n").split(" ", 2) + [""])[:3]
+        resp_headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            resp_headers[name.strip().lower()] = value.strip()
+
+        keep = version == "HTTP/1.1" and resp_headers.get("connection", "").lower() != "close"
+        if "chunked" in resp_headers.get("transfer-encoding", "").lower():
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";", 1)[0], 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            resp_body = b"".join(chunks)
+        elif "content-length" in resp_headers:
+            resp_body = await reader.readexactly(int(resp_headers["content-length"]))
+        elif int(status) in (204, 304) or method == "HEAD":
+            resp_body = b""
+        else:
+            resp_body = await reader.read()
+            keep = False
+        return Response(int(status), resp_headers, resp_body), keep
+
+    async def request(self, method: str, path: str, headers: Optional[Dict[str, str]] = None, body: bytes = b"") -> Response:
+        if self.slots is None:
+            self.slots = asyncio.Semaphore(self.size)
+        async with self.slots:
+            for fresh in (False, True):
+                reused = not fresh and bool(self.idle)
+                try:
+                    conn = self.idle.pop() if reused else await asyncio.wait_for(self._open(), self.timeout)
+                except (OSError, asyncio.TimeoutError) as e:
+                    raise UploadError(f"connect to {self.host}:{self.port}: {e!r}", retryable=True) from None
+                try:
+                    resp, keep = await asyncio.wait_for(self._exchange(conn, method, path, headers or {}, body), self.timeout)
+                except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError) as e:
+                    self._close(conn)
+                    if reused and method in IDEMPOTENT_METHODS and isinstance(e, (ConnectionError, asyncio.IncompleteReadError)):
+                        continue  # the server dropped an idle keep-alive connection; replay on a fresh one
+                    raise UploadError(f"{method} {path}: {e!r}", retryable=True) from None
+                if keep:
+                    self.idle.append(conn)
+                else:
+                    self._close(conn)
+                return resp
+        raise AssertionError("unreachable")
+
+    async def close(self) -> None:
+        while self.idle:
+            self._close(self.idle.pop())
+
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return min(BACKOFF_MAX, max(0.0, float(value))) if value else None
+    except ValueError:
+        return None  # an HTTP date; fall back to our own backoff
+
+
+def _check(resp: Response, what: str) -> None:
+    if 200 <= resp.status < 300:
+        return
+    detail = resp.body[:200].decode("utf-8", "replace").strip()
+    raise UploadError(f"{what}: HTTP {resp.status} {detail}".rstrip(), retryable=resp.status in RETRY_STATUSES,
+                      retry_after=_retry_after(resp.headers.get("retry-after")))
+
+
+# ---- backends ----
+class Backend:
+    """Where files go. Subclasses implement upload(); `key` names the store in the upload
+    manifest, so URIs recorded for one store are never reused for another."""
+
+    key = ""
+
+    def __init__(self, url: str, concurrency: int = CONCURRENCY, timeout: float = REQUEST_TIMEOUT) -> None:
+        self.url = url.rstrip("/")
+        self.prefix = urlsplit(self.url).path
+        self.pool = ConnectionPool(self.url, concurrency, timeout)
+
+    async def upload(self, name: str, data: bytes, content_type: str, digest: str) -> str:
+        """Store `data` (SHA-256 `digest`, local file `name`); returns its URI."""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+
+class HttpPutBackend(Backend):
+    """PUT each file to <url>/<sha256><ext>: any store that takes plain PUTs (WebDAV, nginx
+    dav, S3-style buckets behind a signing proxy). Objects are content-addressed, so a changed
+    file never overwrites a URI that older metadata may still point at."""
+
+    def __init__(self, url: str, concurrency: int = CONCURRENCY, timeout: float = REQUEST_TIMEOUT, headers: Optional[Dict[str, str]] = None) -> None:
+        super().__init__(url, concurrency, timeout)
+        self.headers = dict(headers or {})
+        self.key = f"put:{self.url}"
+
+    async def upload(self, name: str, data: bytes, content_type: str, digest: str) -> str:
+        obj = f"{digest}{Path(name).suffix.lower()}"
+        resp = await self.pool.request("PUT", f"{self.prefix}/{obj}", {"Content-Type": content_type, "X-Content-SHA256": digest, **self.headers}, data)
+        _check(resp, f"PUT {name}")
+        location = resp.headers.get("location", "")
+        return location if "://" in location else f"{self.url}/{obj}"
+
+
+class PinataBackend(Backend):
+    """Pin each file to IPFS through Pinata's pinFileToIPFS API; URIs point at `gateway`."""
+
+    PIN_PATH = "/pinning/pinFileToIPFS"
+
+    def __init__(self, url: str, concurrency: int = CONCURRENCY, timeout: float = REQUEST_TIMEOUT, token: str = "", gateway: str = PINATA_GATEWAY) -> None:
+        super().__init__(url, concurrency, timeout)
+        self.token = token
+        self.gateway = gateway.rstrip("/")
+        self.key = f"pinata:{self.url}:{self.gateway}"
+
+    async def upload(self, name: str, data: bytes, content_type: str, digest: str) -> str:
+        boundary = f"solsprites-{digest[:32]}"
+        filename = Path(name).name.replace('"', "")
+        body = b"".join([
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\nContent-Type: {content_type}\r\n\r\n'.encode("utf-8"),
+            data,
+            f'\r\n--{boundary}\r\nContent-Disposition: form-data; name="pinataMetadata"\r\n\r\n'.encode("utf-8"),
+            json.dumps({"name": name}).encode("utf-8"),
+            f"\r\n--{boundary}--\r\n".encode("utf-8"),
+        ])
+        headers = {"Authorization": f"Bearer {self.token}", "Content-Type": f"multipart/form-data; boundary={boundary}"}
+        resp = await self.pool.request("POST", self.prefix + self.PIN_PATH, headers, body)
+        _check(resp, f"pin {name}")
+        try:
+            cid = json.loads(resp.body)["IpfsHash"]
+        except (ValueError, KeyError, TypeError):
+            raise UploadError(f"pin {name}: unexpected response {resp.body[:200]!r}") from None
+        return f"{self.gateway}/ipfs/{cid}"
+
+
+BACKENDS = {"put": HttpPutBackend, "pinata": PinataBackend}
+
+
+# ---- manifest ----
+def sha256_file(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class UploadManifest:
+    """_upload_manifest.json:
+        "files":    local name -> [size, mtime_ns, sha256]  (skips re-hashing unchanged media)
+        "backends": backend key -> {"objects": {sha256: uri}, "names": {local name: uri}}
+    """
+
+    def __init__(self, path: Path, backend_key: str, data: Optional[Dict] = None) -> None:
+        data = data or {}
+        self.path = path
+        self.files: Dict[str, List] = data.get("files", {})
+        self.backends: Dict[str, Dict] = data.get("backends", {})
+        store = self.backends.setdefault(backend_key, {})
+        self.objects: Dict[str, str] = store.setdefault("objects", {})
+        self.names: Dict[str, str] = store.setdefault("names", {})
+        self.dirty = False
+        self.saved_at = time.monotonic()
+
+    @classmethod
+    def load(cls, path: Path, backend_key: str) -> "UploadManifest":
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = None
+        if not isinstance(data, dict) or data.get("version") != UPLOAD_MANIFEST_VERSION:
+            data = None
+        return cls(path, backend_key, data)
+
+    def digest_of(self, name: str, path: Path) -> str:
+        st = path.stat()
+        cached = self.files.get(name)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        digest = sha256_file(path)
+        self.files[name] = [st.st_size, st.st_mtime_ns, digest]
+        self.dirty = True
+        return digest
+
+    def record(self, digest: str, uri: str) -> None:
+        self.objects[digest] = uri
+        self.dirty = True
+
+    def save(self, force: bool = False) -> None:
+        if not self.dirty or (not force and time.monotonic() - self.saved_at < MANIFEST_SAVE_SECONDS):
+            return
+        payload = {"version": UPLOAD_MANIFEST_VERSION, "files": self.files, "backends": self.backends}
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.path)
+        self.dirty = False
+        self.saved_at = time.monotonic()
+
+
+# ---- planning ----
+class Job(NamedTuple):
+    name: str
+    digest: str
+    content_type: str
+    path: Optional[Path]    # read when uploaded ...
+    data: Optional[bytes]   # ... unless the bytes are already in memory (rewritten JSON)
+
+
+def content_type_of(name: str) -> str:
+    return CONTENT_TYPES.get(Path(name).suffix.lower(), "application/octet-stream")
+
+
+def _index_key(name: str) -> Tuple[int, str]:
+    stem = Path(name).stem
+    return (int(stem), name) if stem.isdigit() else (1 << 62, name)
+
+
+def local_links(meta: Dict) -> Iterable[str]:
+    """Relative file links in a metadata JSON (image, animation_url, properties.files[].uri)."""
+    links = [meta.get("image"), meta.get("animation_url")]
+    links += [f.get("uri") for f in (meta.get("properties") or {}).get("files") or [] if isinstance(f, dict)]
+    for link in links:
+        if isinstance(link, str) and link and "://" not in link and not link.startswith(("/", "data:")):
+            yield link
+
+
+def rewrite_links(meta: Dict, uris: Dict[str, str]) -> Dict:
+    """A copy of `meta` with every local link that has an uploaded URI replaced by it."""
+    out = dict(meta)
+    for key in ("image", "animation_url"):
+        if out.get(key) in uris:
+            out[key] = uris[out[key]]
+    props = out.get("properties")
+    if isinstance(props, dict) and isinstance(props.get("files"), list):
+        files = [dict(f, uri=uris[f["uri"]]) if isinstance(f, dict) and f.get("uri") in uris else f for f in props["files"]]
+        out["properties"] = {**props, "files": files}
+    return out
+
+
+# ---- upload ----
+async def upload_one(backend: Backend, job: Job, retries: int, stats: Dict) -> str:
+    for attempt in range(retries + 1):
+        try:
+            data = job.data if job.data is not None else job.path.read_bytes()
+            return await backend.upload(job.name, data, job.content_type, job.digest)
+        except UploadError as e:
+            if not e.retryable or attempt == retries:
+                raise
+            stats["retries"] += 1
+            delay = e.retry_after if e.retry_after is not None else random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+            await asyncio.sleep(delay)
+    raise AssertionError("unreachable")
+
+
+async def upload_jobs(backend: Backend, jobs: List[Job], manifest: UploadManifest, concurrency: int, retries: int, stats: Dict) -> Dict[str, str]:
+    """Upload `jobs` (one per distinct digest) with `concurrency` workers; returns {name: error} for failures."""
+    failures: Dict[str, str] = {}
+    pending = iter(jobs)
+
+    async def worker() -> None:
+        # Workers share one iterator, so at most `concurrency` uploads (and file reads) are in flight
+        for job in pending:
+            try:
+                uri = await upload_one(backend, job, retries, stats)
+            except UploadError as e:
+                failures[job.name] = str(e)
+                continue
+            except OSError as e:
+                failures[job.name] = f"read {job.path}: {e.strerror}"
+                continue
+            manifest.record(job.digest, uri)
+            stats["uploaded"] += 1
+            stats["bytes"] += len(job.data) if job.data is not None else manifest.files.get(job.name, [0])[0]
+            manifest.save()
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(jobs))))))
+    return failures
+
+
+def _distinct(jobs: Iterable[Job], known: Dict[str, str]) -> List[Job]:
+    """One job per digest not uploaded yet (identical files are uploaded once)."""
+    seen = set(known)
+    out = []
+    for job in jobs:
+        if job.digest not in seen:
+            seen.add(job.digest)
+            out.append(job)
+    return out
+
+
+async def upload_collection(assets_dir: Path, backend: Backend, concurrency: int = CONCURRENCY, retries: int = RETRIES, dry_run: bool = False) -> Dict:
+    """Upload media then rewritten metadata from `assets_dir`; returns run stats (failures under
+    "failed"; with `dry_run` nothing is sent and "pending" counts what would be)."""
+    start = time.perf_counter()
+    manifest = UploadManifest.load(assets_dir / UPLOAD_MANIFEST_NAME, backend.key)
+    stats = {"uploaded": 0, "bytes": 0, "unchanged": 0, "pending": 0, "retries": 0, "failed": {}, "connections": 0}
+
+    names = sorted((n for n in os.listdir(assets_dir) if ITEM_RE.match(n)), key=_index_key)
+    metas = {n: json.loads((assets_dir / n).read_text(encoding="utf-8")) for n in names if n.endswith(".json")}
+    media = {n for n in names if not n.endswith(".json")}
+    media.update(link for meta in metas.values() for link in local_links(meta) if ".." not in Path(link).parts and (assets_dir / link).is_file())
+
+    try:
+        # Media: digests come from the stat cache where possible
+        media_jobs = [Job(n, manifest.digest_of(n, assets_dir / n), content_type_of(n), assets_dir / n, None) for n in sorted(media, key=_index_key)]
+        todo = _distinct(media_jobs, manifest.objects)
+        stats["unchanged"] += len(media_jobs) - len(todo)
+        if dry_run:
+            stats["pending"] += len(todo)
+        elif todo:
+            stats["failed"].update(await upload_jobs(backend, todo, manifest, concurrency, retries, stats))
+        uris = {job.name: manifest.objects[job.digest] for job in media_jobs if job.digest in manifest.objects}
+
+        # Metadata: rewritten against the media URIs, so a JSON changes whenever one of its files does
+        meta_jobs = []
+        for n, meta in metas.items():
+            missing = sorted({link for link in local_links(meta) if link in media and link not in uris})
+            if missing:
+                if dry_run:
+                    stats["pending"] += 1
+                else:
+                    stats["failed"][n] = f"not uploaded: {', '.join(missing)}"
+                continue
+            data = json.dumps(rewrite_links(meta, uris), indent=2).encode("utf-8")
+            meta_jobs.append(Job(n, hashlib.sha256(data).hexdigest(), "application/json", None, data))
+        todo = _distinct(meta_jobs, manifest.objects)
+        stats["unchanged"] += len(meta_jobs) - len(todo)
+        if dry_run:
+            stats["pending"] += len(todo)
+        elif todo:
+            stats["failed"].update(await upload_jobs(backend, todo, manifest, concurrency, retries, stats))
+        uris.update((job.name, manifest.objects[job.digest]) for job in meta_jobs if job.digest in manifest.objects)
+
+        if manifest.names != uris and not dry_run:
+            manifest.names.clear()
+            manifest.names.update(uris)
+            manifest.dirty = True
+    finally:
+        # Also on failure or Ctrl-C: whatever finished is recorded, so the next run resumes
+        manifest.save(force=True)
+        stats["connections"] = backend.pool.opened
+        await backend.close()
+
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    return stats
+
+
+def make_backend(args: argparse.Namespace) -> Backend:
+    if args.backend == "pinata":
+        token = os.environ.get(args.token_env, "")
+        if not token and not args.dry_run:
+            raise SystemExit(f"Set ${args.token_env} to a Pinata API JWT.")
+        return PinataBackend(args.url, args.jobs, args.timeout, token=token, gateway=args.gateway)
+    headers = {}
+    for header in args.header:
+        name, sep, value = header.partition(":")
+        if not sep or not name.strip():
+            raise SystemExit(f"--header expects 'Name: value', got {header!r}")
+        headers[name.strip()] = value.strip()
+    return HttpPutBackend(args.url, args.jobs, args.timeout, headers=headers)
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Upload the built collection (media, then metadata with rewritten links) to a storage backend.")
+    parser.add_argument("assets_dir", nargs="?", type=Path, default=ASSETS_DIR, help="built collection (default: ASSETS_DIR)")
+    parser.add_argument("--url", required=True, help="put: base URL objects are PUT under; pinata: API base (e.g. https://api.pinata.cloud)")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="put", help="storage backend (default: put)")
+    parser.add_argument("--header", action="append", default=[], metavar="'NAME: VALUE'", help="extra request header for the put backend; repeatable")
+    parser.add_argument("--gateway", default=PINATA_GATEWAY, help=f"pinata: gateway the URIs point at (default: {PINATA_GATEWAY})")
+    parser.add_argument("--token-env", default="PINATA_JWT", metavar="VAR", help="pinata: environment variable holding the API JWT (default: PINATA_JWT)")
+    parser.add_argument("--jobs", "-j", type=int, default=CONCURRENCY, metavar="N", help=f"uploads in flight (default: {CONCURRENCY})")
+    parser.add_argument("--retries", type=int, default=RETRIES, metavar="N", help=f"retries per file on connection errors, timeouts and 408/429/5xx (default: {RETRIES})")
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT, metavar="SECONDS", help=f"per-request timeout (default: {REQUEST_TIMEOUT:g})")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be uploaded")
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    try:
+        stats = asyncio.run(upload_collection(args.assets_dir, make_backend(args), args.jobs, args.retries, args.dry_run))
+    except KeyboardInterrupt:
+        print(f"Interrupted; finished uploads are recorded in {args.assets_dir / UPLOAD_MANIFEST_NAME}, rerun to resume")
+        return 130
+    if args.dry_run:
+        print(f"Would upload {stats['pending']} files ({stats['unchanged']} unchanged)")
+        return 0
+    failed = stats["failed"]
+    print(f"Uploaded {stats['uploaded']} files ({stats['bytes']} bytes) in {stats['seconds']}s; "
+          f"{stats['unchanged']} unchanged, {stats['retries']} retries, {stats['connections']} connections")
+    if failed:
+        print(f"{len(failed)} files failed (rerun to resume):")
+        for name, error in sorted(failed.items(), key=lambda kv: _index_key(kv[0]))[:50]:
+            print(f"  {name}: {error}")
+        if len(failed) > 50:
+            print(f"  ... and {len(failed) - 50} more")
+        return 1
+    print(f"URIs: {args.assets_dir / UPLOAD_MANIFEST_NAME} (\"names\")")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
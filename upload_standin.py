@@ -0,0 +1,182 @@
+"""
+Local stand-in for the upload_assets.py backends, for trying uploads without a real store:
+
+    python upload_standin.py /tmp/store --port 8765 --fail-rate 0.1 --drop-rate 0.02
+    python upload_assets.py candy_machine/assets --url http://127.0.0.1:8765/assets
+    python upload_assets.py candy_machine/assets --backend pinata --url http://127.0.0.1:8765 --gateway http://127.0.0.1:8765
+
+PUT <path> stores the body under the root dir and GET <path> serves it back. POST
+/pinning/pinFileToIPFS takes Pinata's multipart form and answers {"IpfsHash": <CID>} with a
+fake CID derived from the file's SHA-256, stored as ipfs/<CID> so GET /ipfs/<CID> works as a
+gateway. --fail-rate answers that share of uploads with 503 + Retry-After and --drop-rate
+closes the connection without answering, so retries and resumes can be exercised.
+Connections are kept alive (HTTP/1.1); --idle-timeout closes ones that sit idle longer, as
+real servers do. Request/connection counts are printed on exit.
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+
+PIN_PATH = "/pinning/pinFileToIPFS"
+
+
+def fake_cid(data: bytes) -> str:
+    return "bafkrei" + base64.b32encode(hashlib.sha256(data).digest()).decode("ascii").lower().rstrip("=")[:52]
+
+
+def multipart_file(content_type: str, body: bytes) -> Optional[bytes]:
+    """The `file` field of a multipart/form-data body, or None."""
+    msg = BytesParser(policy=HTTP).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body)
+    for part in msg.iter_parts() if msg.is_multipart() else ():
+        if part.get_param("name", header="content-disposition") == "file":
+            return part.get_payload(decode=True)
+    return None
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "StandinServer"
+
+    def setup(self) -> None:
+        self.timeout = self.server.idle_timeout  # applied to the socket by StreamRequestHandler.setup
+        super().setup()
+        self.server.count("connections")
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: bytes = b"", content_type: str = "application/json", headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _target(self) -> Optional[Path]:
+        path = (self.server.root / self.path.split("?", 1)[0].lstrip("/")).resolve()
+        return path if path.is_relative_to(self.server.root) and path != self.server.root else None
+
+    def _fault(self) -> bool:
+        """Inject a failure for this upload; True if one was sent (or the connection dropped)."""
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        roll = random.random()
+        if roll < self.server.drop_rate:
+            self.server.count("dropped")
+            self.close_connection = True
+            return True
+        if roll < self.server.drop_rate + self.server.fail_rate:
+            self.server.count("failed")
+            self._send(503, b'{"error": "injected failure"}', headers={"Retry-After": "0"})
+            return True
+        return False
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def do_PUT(self) -> None:
+        body = self._read_body()
+        self.server.count("requests")
+        if self._fault():
+            return
+        target = self._target()
+        if target is None:
+            self._send(403, b'{"error": "outside the store"}')
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(body)
+        self.server.count("stored")
+        self._send(201)
+
+    def do_POST(self) -> None:
+        body = self._read_body()
+        self.server.count("requests")
+        if self.path.split("?", 1)[0] != PIN_PATH:
+            self._send(404, b'{"error": "not found"}')
+            return
+        if self._fault():
+            return
+        data = multipart_file(self.headers.get("Content-Type", ""), body)
+        if data is None:
+            self._send(400, b'{"error": "no file field"}')
+            return
+        cid = fake_cid(data)
+        target = self.server.root / "ipfs" / cid
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        self.server.count("stored")
+        self._send(200, json.dumps({"IpfsHash": cid, "PinSize": len(data)}).encode("utf-8"))
+
+    def do_GET(self) -> None:
+        self.server.count("requests")
+        target = self._target()
+        if target is None or not target.is_file():
+            self._send(404, b'{"error": "not found"}')
+            return
+        self._send(200, target.read_bytes(), "application/octet-stream")
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # the default listen backlog of 5 drops SYNs from a wide upload pool
+
+    def __init__(self, root: Path, host: str = "127.0.0.1", port: int = 0, fail_rate: float = 0.0, drop_rate: float = 0.0, latency: float = 0.0,
+                 idle_timeout: Optional[float] = None) -> None:
+        super().__init__((host, port), StandinHandler)
+        self.root = Path(root).resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.fail_rate = fail_rate
+        self.drop_rate = drop_rate
+        self.latency = latency
+        self.idle_timeout = idle_timeout
+        self.stats: Dict[str, int] = {"connections": 0, "requests": 0, "stored": 0, "failed": 0, "dropped": 0}
+        self._lock = threading.Lock()
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Serve a local stand-in for the upload backends (PUT store + Pinata pinFileToIPFS).")
+    parser.add_argument("root", type=Path, help="directory uploads are stored in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fail-rate", type=float, default=0.0, metavar="P", help="share of uploads answered with 503 (default: 0)")
+    parser.add_argument("--drop-rate", type=float, default=0.0, metavar="P", help="share of uploads whose connection is closed unanswered (default: 0)")
+    parser.add_argument("--latency", type=float, default=0.0, metavar="SECONDS", help="added delay per upload (default: 0)")
+    parser.add_argument("--idle-timeout", type=float, metavar="SECONDS", help="close keep-alive connections idle this long (default: never)")
+    args = parser.parse_args(argv)
+
+    server = StandinServer(args.root, args.host, args.port, args.fail_rate, args.drop_rate, args.latency, args.idle_timeout)
+    print(f"Stand-in store at {server.url} -> {server.root}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(" ".join(f"{k}={v}" for k, v in server.stats.items()), flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())